@@ -17,6 +17,9 @@ export function UploadAvailability({ userId, subcontractorId, onSuccess }: Uploa
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
     const [success, setSuccess] = useState(false);
+    const [csvFile, setCsvFile] = useState<File | null>(null);
+    const [importing, setImporting] = useState(false);
+    const [importStatus, setImportStatus] = useState<string | null>(null);
 
     const [formData, setFormData] = useState({
         availabilityFrom: '',
@@ -36,6 +39,82 @@ export function UploadAvailability({ userId, subcontractorId, onSuccess }: Uploa
         setFormData({ ...formData, [name]: value });
     };
 
+    const resolveSubcontractorId = async () => {
+        let targetScId = subcontractorId;
+
+        if (!targetScId) {
+            // Look up the subcontractor profile of the user
+            const token = localStorage.getItem('token');
+            const res = await fetch(`http://localhost:5000/api/users/${userId}/subcontractor`, {
+                headers: { 'Authorization': `Bearer ${token}` }
+            });
+            if (res.ok) {
+                const data = await res.json();
+                targetScId = data.id;
+            } else {
+                throw new Error('Could not find Subcontractor profile');
+            }
+        }
+        return targetScId;
+    };
+
+    // CSV rows are streamed to the backend; with an NDJSON response it reports progress per batch
+    const handleCsvImport = async (e: React.FormEvent) => {
+        e.preventDefault();
+        if (!csvFile) return;
+        setImporting(true);
+        setError(null);
+        setImportStatus(null);
+
+        try {
+            const targetScId = await resolveSubcontractorId();
+            const body = new FormData();
+            body.append('file', csvFile);
+
+            const token = localStorage.getItem('token');
+            const response = await fetch(`http://localhost:3001/api/sc/${targetScId}/availability/import`, {
+                method: 'POST',
+                headers: {
+                    'Accept': 'application/x-ndjson',
+                    'Authorization': `Bearer ${token}`
+                },
+                body
+            });
+
+            if (!response.ok || !response.body) {
+                const data = await response.json();
+                throw new Error(data.error?.message || 'Failed to import availability');
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            for (;;) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop() || '';
+                for (const line of lines.filter(Boolean)) {
+                    const message = JSON.parse(line);
+                    if (message.error) {
+                        throw new Error(message.error.message);
+                    }
+                    const counts = message.progress || message;
+                    setImportStatus(`${message.done ? 'Imported' : 'Importing...'} ${counts.rowsInserted} rows` +
+                        (counts.rowsSkipped ? ` (${counts.rowsSkipped} skipped)` : ''));
+                }
+            }
+
+            setCsvFile(null);
+            if (onSuccess) onSuccess();
+        } catch (err: any) {
+            setError(err.message);
+        } finally {
+            setImporting(false);
+        }
+    };
+
     const handleSubmit = async (e: React.FormEvent) => {
         e.preventDefault();
         setLoading(true);
@@ -43,30 +122,7 @@ export function UploadAvailability({ userId, subcontractorId, onSuccess }: Uploa
         setSuccess(false);
 
         try {
-            // If we don't have subcontractorId, we might need to fetch it or use a different endpoint
-            // For now assuming we have it or the user is the subcontractor
-            // But wait, the route is /api/sc/:id/availability
-            // We need the Subcontractor ID, not the User ID.
-            // Let's assume for now we can get it from local storage or context, or we fetch it first.
-
-            let targetScId = subcontractorId;
-
-            if (!targetScId) {
-                // Fetch SC ID using User ID
-                // This is a placeholder. In a real app, we'd probably have this in the user context
-                // or fetch it on mount.
-                // For this implementation, let's assume the parent passes it or we fail.
-                const token = localStorage.getItem('token');
-                const res = await fetch(`http://localhost:5000/api/users/${userId}/subcontractor`, {
-                    headers: { 'Authorization': `Bearer ${token}` }
-                });
-                if (res.ok) {
-                    const data = await res.json();
-                    targetScId = data.id;
-                } else {
-                    throw new Error('Could not find Subcontractor profile');
-                }
-            }
+            const targetScId = await resolveSubcontractorId();
 
             const token = localStorage.getItem('token');
             const response = await fetch(`http://localhost:3001/api/sc/${targetScId}/availability`, {
@@ -219,6 +275,28 @@ export function UploadAvailability({ userId, subcontractorId, onSuccess }: Uploa
                         {loading ? 'Uploading...' : 'Submit Availability'}
                     </Button>
                 </form>
+
+                <form onSubmit={handleCsvImport} className="space-y-4 mt-6 border-t pt-6">
+                    <div className="space-y-2">
+                        <Label htmlFor="availabilityCsv">Import from CSV</Label>
+                        <Input
+                            id="availabilityCsv"
+                            type="file"
+                            accept=".csv,text/csv"
+                            onChange={(e) => setCsvFile(e.target.files?.[0] || null)}
+                        />
+                        <p className="text-xs text-muted-foreground">
+                            Columns: availability_from, availability_to, location, work_type, material_cost_per_sqm,
+                            labor_cost_per_sqm, maximum_capacity. Rates per ft² and areas in SF are converted.
+                        </p>
+                    </div>
+
+                    {importStatus && <p className="text-sm text-green-500">{importStatus}</p>}
+
+                    <Button type="submit" variant="outline" className="w-full" disabled={importing || !csvFile}>
+                        {importing ? 'Importing...' : 'Import CSV'}
+                    </Button>
+                </form>
             </CardContent>
         </Card>
     );
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk bid scoring and what-if analysis (CPython 3, needs numpy; psycopg2 for the database)
+
+Scores every open project against every subcontractor availability row at once, with
+the same rules as GET /api/matches/projects/:projectId/find (routes/matches.js):
+
+    eligible   same location and work type, schedule overlaps availability
+    estimate   (materialCostPerSqm + laborCostPerSqm) * totalQuantity
+    score      trust / 30 * 70  +  max(0, 30 - |estimate - totalConstructionCost| / totalConstructionCost * 30)
+
+Projects, availability and trust factors are loaded with one query each into arrays.
+Scores are computed as project x availability matrices, a chunk of projects at a
+time, and reduced to the best availability row per subcontractor and the top k
+subcontractors per project.
+
+Usage:
+    python analytics/bid_scoring.py                        # top 10 per OPEN/MATCHING project as JSON
+    python analytics/bid_scoring.py --top 5 --write        # also replace PENDING rows in ProjectMatches
+    python analytics/bid_scoring.py --weights 70:30 --weights 50:50 --weights 90:10   # what-if summary
+
+The database is taken from DATABASE_URL, or DB_HOST / DB_PORT / DB_NAME / DB_USER /
+DB_PASSWORD as in src/config/database.js.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from collections import namedtuple
+
+import numpy as np
+
+DEFAULT_STATUSES = ('OPEN', 'MATCHING')
+
+# Score cells computed at once (projects per chunk x availability rows), ~64 MB per float64 matrix
+CHUNK_CELLS = 8 * 1024 * 1024
+
+# Insert page size for ProjectMatches
+WRITE_PAGE_SIZE = 1000
+
+# trust: weight of the trust score, cost: weight of cost competitiveness,
+# max_trust: the best possible trust score (three factors rated 1-10)
+Weights = namedtuple('Weights', 'trust cost max_trust')
+DEFAULT_WEIGHTS = Weights(70.0, 30.0, 30.0)
+
+
+class BidData:
+    """Projects, availability rows and trust scores as arrays"""
+
+    def __init__(self, projects, availability, trust):
+        # Location and work type strings become integer codes shared by both sides
+        locations = {}
+        work_types = {}
+
+        def codes(values, table):
+            return np.array([table.setdefault(v, len(table)) for v in values], dtype=np.int64)
+
+        self.project_ids = [p[0] for p in projects]
+        gc_ids = sorted(set(p[1] for p in projects))
+        gc_index = dict((gc, i) for i, gc in enumerate(gc_ids))
+        self.project_gc = np.array([gc_index[p[1]] for p in projects], dtype=np.int64)
+        self.project_location = codes([p[2] for p in projects], locations)
+        self.project_work_type = codes([p[3] for p in projects], work_types)
+        self.project_from = np.array([p[4] for p in projects], dtype=np.float64)
+        self.project_to = np.array([p[5] for p in projects], dtype=np.float64)
+        self.project_quantity = np.array([p[6] or 0 for p in projects], dtype=np.float64)
+        self.project_baseline = np.array([p[7] or 0 for p in projects], dtype=np.float64)
+
+        # Availability rows are ordered by subcontractor, so rows of one subcontractor
+        # are a contiguous block of columns (see best_per_subcontractor)
+        availability = sorted(availability, key=lambda row: row[1])
+        self.sc_data_ids = [a[0] for a in availability]
+        self.sc_ids = sorted(set(a[1] for a in availability))
+        sc_index = dict((sc, i) for i, sc in enumerate(self.sc_ids))
+        self.avail_sc = np.array([sc_index[a[1]] for a in availability], dtype=np.int64)
+        self.avail_location = codes([a[2] for a in availability], locations)
+        self.avail_work_type = codes([a[3] for a in availability], work_types)
+        self.avail_from = np.array([a[4] for a in availability], dtype=np.float64)
+        self.avail_to = np.array([a[5] for a in availability], dtype=np.float64)
+        self.avail_cost_per_sqm = np.array([a[6] or 0 for a in availability], dtype=np.float64)
+
+        # First column of every subcontractor's block
+        if availability:
+            self.sc_starts = np.flatnonzero(np.r_[True, np.diff(self.avail_sc) != 0])
+        else:
+            self.sc_starts = np.zeros(0, dtype=np.int64)
+
+        # trust[gc, sc]; 0 where the GC has not rated the subcontractor
+        self.trust = np.zeros((len(gc_ids), len(self.sc_ids)), dtype=np.float64)
+        for sc_id, gc_id, score in trust:
+            if gc_id in gc_index and sc_id in sc_index:
+                self.trust[gc_index[gc_id], sc_index[sc_id]] = score
+
+    @property
+    def shape(self):
+        return len(self.project_ids), len(self.sc_data_ids)
+
+
+def connect():
+    import psycopg2
+
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        return psycopg2.connect(url)
+    return psycopg2.connect(
+        host=os.environ.get('DB_HOST', 'localhost'),
+        port=int(os.environ.get('DB_PORT', 5432)),
+        dbname=os.environ.get('DB_NAME', 'bbaps_db'),
+        user=os.environ.get('DB_USER', 'postgres'),
+        password=os.environ.get('DB_PASSWORD', 'password'))
+
+
+def load(conn, statuses=DEFAULT_STATUSES):
+    """Load projects with the given statuses, the availability that can overlap them and trust scores"""
+    with conn.cursor() as cur:
+        cur.execute(
+            'SELECT "id", "gcId", "location", "workType", '
+            '       EXTRACT(EPOCH FROM "scheduleFrom"), EXTRACT(EPOCH FROM "scheduleTo"), '
+            '       "totalQuantity"::float8, "totalConstructionCost"::float8 '
+            '  FROM "Projects" WHERE "status"::text = ANY(%s) ORDER BY "id"',
+            (list(statuses),))
+        projects = [(str(r[0]), str(r[1]), r[2], r[3], float(r[4]), float(r[5]), r[6], r[7])
+                    for r in cur.fetchall()]
+        if not projects:
+            return BidData([], [], [])
+
+        earliest = min(p[4] for p in projects)
+        cur.execute(
+            'SELECT "id", "subcontractorId", "location", "workType", '
+            '       EXTRACT(EPOCH FROM "availabilityFrom"), EXTRACT(EPOCH FROM "availabilityTo"), '
+            '       ("materialCostPerSqm" + "laborCostPerSqm")::float8 '
+            '  FROM "SubcontractorData" WHERE EXTRACT(EPOCH FROM "availabilityTo") >= %s',
+            (earliest,))
+        availability = [(str(r[0]), str(r[1]), r[2], r[3], float(r[4]), float(r[5]), r[6])
+                        for r in cur.fetchall()]
+
+        # The matches route uses the first rating of a GC for a subcontractor
+        cur.execute(
+            'SELECT DISTINCT ON ("subcontractorId", "gcId") "subcontractorId", "gcId", '
+            '       "costConformity" + "timeConformity" + "qualityConformity" '
+            '  FROM "TrustFactors" ORDER BY "subcontractorId", "gcId", "createdAt"')
+        trust = [(str(r[0]), str(r[1]), r[2]) for r in cur.fetchall()]
+
+    return BidData(projects, availability, trust)
+
+
+def score_chunk(data, rows, weights=DEFAULT_WEIGHTS):
+    """
+    Score projects[rows] against every availability row
+    Returns (scores, estimates, trust), each len(rows) x availability; ineligible
+    pairs score -inf.
+    """
+    p_from = data.project_from[rows, None]
+    p_to = data.project_to[rows, None]
+    eligible = ((data.project_location[rows, None] == data.avail_location[None, :]) &
+                (data.project_work_type[rows, None] == data.avail_work_type[None, :]) &
+                ~((p_to < data.avail_from[None, :]) | (p_from > data.avail_to[None, :])))
+
+    estimates = data.project_quantity[rows, None] * data.avail_cost_per_sqm[None, :]
+    trust = data.trust[data.project_gc[rows, None], data.avail_sc[None, :]]
+
+    baseline = data.project_baseline[rows, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = np.abs(estimates - baseline) / baseline
+    # No baseline cost: nothing to be competitive against
+    cost_component = np.where(baseline > 0, np.maximum(0.0, weights.cost - deviation * weights.cost), 0.0)
+
+    scores = trust / weights.max_trust * weights.trust + cost_component
+    scores[~eligible] = -np.inf
+    return scores, estimates, trust
+
+
+def best_per_subcontractor(data, scores):
+    """
+    Reduce a projects x availability score matrix to projects x subcontractors.
+    Returns (best scores, column of the best availability row); -inf / -1 when none is eligible.
+    """
+    if scores.shape[1] == 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty, empty.astype(np.int64)
+
+    best = np.maximum.reduceat(scores, data.sc_starts, axis=1)
+    # First column in each block that reaches the block's best score
+    counts = np.diff(np.r_[data.sc_starts, scores.shape[1]])
+    is_best = (scores == np.repeat(best, counts, axis=1)) & np.isfinite(scores)
+    columns = np.where(is_best, np.arange(scores.shape[1])[None, :], scores.shape[1])
+    best_column = np.minimum.reduceat(columns, data.sc_starts, axis=1)
+    best_column[best_column == scores.shape[1]] = -1
+    return best, best_column
+
+
+def top_matches(data, k=10, weights=DEFAULT_WEIGHTS):
+    """
+    Top k subcontractors per project (best availability row of each subcontractor).
+    Returns {projectId: [match, ...]} with matches ordered by score, shaped like the
+    entries of the matches route.
+    """
+    n_projects, n_avail = data.shape
+    results = dict((project_id, []) for project_id in data.project_ids)
+    if n_projects == 0 or n_avail == 0:
+        return results
+
+    chunk = max(1, CHUNK_CELLS // n_avail)
+    for start in range(0, n_projects, chunk):
+        rows = np.arange(start, min(start + chunk, n_projects))
+        scores, estimates, trust = score_chunk(data, rows, weights)
+        best, best_column = best_per_subcontractor(data, scores)
+
+        kk = min(k, best.shape[1])
+        # Unordered top k per row, then sorted
+        top = np.argpartition(-best, kk - 1, axis=1)[:, :kk]
+        top_scores = np.take_along_axis(best, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+
+        for i, row in enumerate(rows):
+            matches = results[data.project_ids[row]]
+            for sc in top[i]:
+                column = best_column[i, sc]
+                if column < 0:
+                    break
+                matches.append({
+                    'subcontractorId': data.sc_ids[sc],
+                    'scDataId': data.sc_data_ids[column],
+                    'costEstimate': round(float(estimates[i, column]), 2),
+                    'trustScore': int(trust[i, column]),
+                    'scheduleMatch': True,
+                    'locationMatch': True,
+                    'matchScore': round(float(best[i, sc]), 2),
+                })
+    return results
+
+
+def what_if(data, scenarios, k=10):
+    """
+    Rerun scoring under several weightings. The first scenario is the reference; for
+    every scenario reports the mean top score and how many projects get a different
+    first pick or a different top k set than the reference.
+    """
+    reference = None
+    summary = []
+    for weights in scenarios:
+        results = top_matches(data, k, weights)
+        firsts = dict((p, m[0]['subcontractorId'] if m else None) for p, m in results.items())
+        sets = dict((p, frozenset(x['subcontractorId'] for x in m)) for p, m in results.items())
+        top_scores = [m[0]['matchScore'] for m in results.values() if m]
+        if reference is None:
+            reference = (firsts, sets)
+        summary.append({
+            'weights': weights._asdict(),
+            'projectsMatched': len(top_scores),
+            'meanTopScore': round(float(np.mean(top_scores)), 2) if top_scores else None,
+            'firstPickChanged': sum(1 for p in firsts if firsts[p] != reference[0][p]),
+            'topKChanged': sum(1 for p in sets if sets[p] != reference[1][p]),
+        })
+    return summary
+
+
+def write_matches(conn, results):
+    """
+    Replace the PENDING ProjectMatches of the scored projects with the results, in one
+    transaction. Matches a GC already acted on (ACCEPTED, REJECTED, SELECTED) are kept
+    and not duplicated. Returns the number of rows inserted.
+    """
+    from psycopg2.extras import execute_values
+
+    # Projects left with no matches lose their stale PENDING rows too
+    project_ids = list(results.keys())
+    if not project_ids:
+        return 0
+
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                'DELETE FROM "ProjectMatches" WHERE "projectId" = ANY(%s::uuid[]) AND "status" = %s',
+                (project_ids, 'PENDING'))
+            cur.execute(
+                'SELECT "projectId"::text, "subcontractorId"::text FROM "ProjectMatches" '
+                ' WHERE "projectId" = ANY(%s::uuid[])',
+                (project_ids,))
+            decided = set(cur.fetchall())
+
+            rows = [(str(uuid.uuid4()), project_id, m['subcontractorId'], m['matchScore'], m['trustScore'],
+                     m['locationMatch'], m['scheduleMatch'], m['costEstimate'])
+                    for project_id in project_ids
+                    for m in results[project_id]
+                    if (project_id, m['subcontractorId']) not in decided]
+            if not rows:
+                return 0
+            execute_values(
+                cur,
+                'INSERT INTO "ProjectMatches" ("id", "projectId", "subcontractorId", "matchScore", "trustScore", '
+                '"locationMatch", "scheduleMatch", "costEstimate", "status", "createdAt", "updatedAt") VALUES %s',
+                rows,
+                template="(%s, %s, %s, %s, %s, %s, %s, %s, 'PENDING', now(), now())",
+                page_size=WRITE_PAGE_SIZE)
+    return len(rows)
+
+
+def parse_weights(text):
+    """'70:30' or '70:30:30' (trust:cost[:max_trust])"""
+    parts = [float(x) for x in text.split(':')]
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError('weights are trust:cost or trust:cost:max_trust')
+    return Weights(parts[0], parts[1], parts[2] if len(parts) == 3 else DEFAULT_WEIGHTS.max_trust)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score all open projects against all subcontractors')
+    parser.add_argument('--top', type=int, default=10, help='matches kept per project')
+    parser.add_argument('--status', action='append', help='project statuses to score (default OPEN, MATCHING)')
+    parser.add_argument('--weights', action='append', type=parse_weights,
+                        help='trust:cost weights; given more than once, prints a what-if summary')
+    parser.add_argument('--write', action='store_true', help='replace PENDING ProjectMatches with the results')
+    parser.add_argument('--json', help='write the results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        started = time.time()
+        data = load(conn, args.status or DEFAULT_STATUSES)
+        loaded = time.time()
+        sys.stderr.write('Loaded {} projects, {} availability rows, {} subcontractors in {:.2f}s\n'.format(
+            data.shape[0], data.shape[1], len(data.sc_ids), loaded - started))
+
+        scenarios = args.weights or [DEFAULT_WEIGHTS]
+        if len(scenarios) > 1:
+            output = what_if(data, scenarios, args.top)
+        else:
+            output = top_matches(data, args.top, scenarios[0])
+            sys.stderr.write('Scored in {:.2f}s\n'.format(time.time() - loaded))
+            if args.write:
+                inserted = write_matches(conn, output)
+                sys.stderr.write('Wrote {} ProjectMatches\n'.format(inserted))
+    finally:
+        conn.close()
+
+    text = json.dumps(output, indent=2)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+'use strict';
+
+/**
+ * Partition elements by month of createdAt.
+ *
+ * Replaces the unpartitioned elements table (created by sequelize.sync) with a table
+ * range partitioned on "createdAt": one partition per month, named elements_pYYYY_MM,
+ * plus elements_default. Indexes on projectId, (createdBy, updatedAt), category and
+ * (projectId, revitId) are created on every partition, and projectId gets a foreign key.
+ * Existing rows are copied in the same transaction; the indexes sequelize.sync created on
+ * the old table are renamed out of the way first. revitId is taken from the old table's
+ * revitId column (or bimMetadata.revitId); rows synced before that column existed have none.
+ *
+ * Later months are created by src/utils/elementPartitions.js (on server start and daily),
+ * which also archives old months by detaching their partitions.
+ */
+
+const MONTHS_AHEAD = 3;
+
+const addMonths = (date, months) => new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth() + months, 1));
+
+const partitionName = (date) =>
+  `elements_p${date.getUTCFullYear()}_${String(date.getUTCMonth() + 1).padStart(2, '0')}`;
+
+const COLUMNS = '"id", "name", "category", "quantity", "unit", "properties", "bimMetadata", "projectId", "createdBy", "createdAt", "updatedAt"';
+
+module.exports = {
+  async up(queryInterface) {
+    const { sequelize } = queryInterface;
+
+    await sequelize.transaction(async (transaction) => {
+      const query = (sql, options = {}) => sequelize.query(sql, { transaction, ...options });
+
+      const [[state]] = await query(
+        `SELECT to_regclass('elements') IS NOT NULL AS "exists",
+                EXISTS (SELECT 1 FROM pg_partitioned_table p
+                          JOIN pg_class c ON c.oid = p.partrelid
+                         WHERE c.oid = to_regclass('elements')) AS "partitioned"`
+      );
+      if (state.partitioned) return;
+
+      let hasRevitIdColumn = false;
+      if (state.exists) {
+        await query('ALTER TABLE "elements" RENAME TO "elements_unpartitioned"');
+
+        // sequelize.sync may already have created the model's indexes (elements_project_id, ...)
+        // on the old table; rename all of them, not only the primary key, so the names are free
+        const [indexes] = await query(
+          `SELECT indexname FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = 'elements_unpartitioned'`
+        );
+        for (const { indexname } of indexes) {
+          await query(`ALTER INDEX "${indexname}" RENAME TO "${indexname.slice(0, 50)}_unpartitioned"`);
+        }
+
+        const [columns] = await query(
+          `SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'elements_unpartitioned'
+              AND column_name = 'revitId'`
+        );
+        hasRevitIdColumn = columns.length > 0;
+      }
+
+      // The primary key of a partitioned table must include the partition key
+      await query(`
+        CREATE TABLE "elements" (
+          "id" UUID NOT NULL,
+          "name" VARCHAR(255) NOT NULL,
+          "category" VARCHAR(255) NOT NULL,
+          "quantity" DECIMAL(10, 2) NOT NULL,
+          "unit" VARCHAR(255) NOT NULL,
+          "properties" JSONB DEFAULT '{}'::jsonb,
+          "bimMetadata" JSONB DEFAULT '{}'::jsonb,
+          "revitId" VARCHAR(255),
+          "projectId" UUID REFERENCES "Projects" ("id") ON DELETE SET NULL,
+          "createdBy" UUID NOT NULL,
+          "createdAt" TIMESTAMP WITH TIME ZONE NOT NULL,
+          "updatedAt" TIMESTAMP WITH TIME ZONE NOT NULL,
+          PRIMARY KEY ("id", "createdAt")
+        ) PARTITION BY RANGE ("createdAt")
+      `);
+
+      // Indexes on the parent are created on every partition, including future ones
+      await query('CREATE INDEX "elements_project_id" ON "elements" ("projectId")');
+      await query('CREATE INDEX "elements_created_by_updated_at" ON "elements" ("createdBy", "updatedAt")');
+      await query('CREATE INDEX "elements_category" ON "elements" ("category")');
+      await query('CREATE INDEX "elements_project_id_revit_id" ON "elements" ("projectId", "revitId")');
+
+      await query('CREATE TABLE "elements_default" PARTITION OF "elements" DEFAULT');
+
+      let first = new Date();
+      if (state.exists) {
+        const [[range]] = await query('SELECT MIN("createdAt") AS "first" FROM "elements_unpartitioned"');
+        if (range.first && new Date(range.first) < first) first = new Date(range.first);
+      }
+
+      const last = addMonths(new Date(), MONTHS_AHEAD);
+      for (let month = addMonths(first, 0); month <= last; month = addMonths(month, 1)) {
+        await query(
+          `CREATE TABLE "${partitionName(month)}" PARTITION OF "elements"
+             FOR VALUES FROM (:from) TO (:to)`,
+          { replacements: { from: month.toISOString(), to: addMonths(month, 1).toISOString() } }
+        );
+      }
+
+      if (state.exists) {
+        // The batch sync writes revitId as a top-level field: it is in the revitId column when
+        // sync({ alter: true }) already added it. Rows stored before that column existed lost
+        // their revitId (only link provenance is in bimMetadata), so they keep NULL.
+        const revitId = hasRevitIdColumn
+          ? `COALESCE(e."revitId", e."bimMetadata"->>'revitId')`
+          : `e."bimMetadata"->>'revitId'`;
+
+        // Elements of deleted projects would violate the new foreign key
+        await query(`
+          INSERT INTO "elements" (${COLUMNS}, "revitId")
+          SELECT e."id", e."name", e."category", e."quantity", e."unit", e."properties", e."bimMetadata",
+                 p."id", e."createdBy", e."createdAt", e."updatedAt", ${revitId}
+            FROM "elements_unpartitioned" e
+            LEFT JOIN "Projects" p ON p."id" = e."projectId"
+        `);
+        await query('DROP TABLE "elements_unpartitioned"');
+      }
+    });
+  },
+
+  async down(queryInterface) {
+    const { sequelize } = queryInterface;
+
+    await sequelize.transaction(async (transaction) => {
+      const query = (sql) => sequelize.query(sql, { transaction });
+
+      await query('ALTER TABLE "elements" RENAME TO "elements_partitioned"');
+      await query('ALTER INDEX "elements_pkey" RENAME TO "elements_partitioned_pkey"');
+      await query(`
+        CREATE TABLE "elements" (
+          "id" UUID PRIMARY KEY,
+          "name" VARCHAR(255) NOT NULL,
+          "category" VARCHAR(255) NOT NULL,
+          "quantity" DECIMAL(10, 2) NOT NULL,
+          "unit" VARCHAR(255) NOT NULL,
+          "properties" JSONB DEFAULT '{}'::jsonb,
+          "bimMetadata" JSONB DEFAULT '{}'::jsonb,
+          "projectId" UUID,
+          "createdBy" UUID NOT NULL,
+          "createdAt" TIMESTAMP WITH TIME ZONE NOT NULL,
+          "updatedAt" TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+      `);
+      // Archived (detached) partitions are left in the elements_archive schema
+      await query(`INSERT INTO "elements" (${COLUMNS}) SELECT ${COLUMNS} FROM "elements_partitioned"`);
+      await query('DROP TABLE "elements_partitioned"');
+    });
+  }
+};
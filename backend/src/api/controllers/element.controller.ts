@@ -1,9 +1,12 @@
 import { Response } from 'express';
+import { Sequelize } from 'sequelize';
 import { AuthRequest } from '../middleware/auth.middleware';
 import { Element } from '../../models/Element';
 import { Pricing } from '../../models/Pricing';
-import { OpenAIService } from '../../services/openai.service';
+import { PriceBookService } from '../../services/pricebook.service';
+import { ClassificationService, ClassifiableElement } from '../../services/classification.service';
 import { CreateElementRequest } from '@common/types/element.types';
+import { UserRole } from '@common/types/user.types';
 
 export class ElementController {
     /**
@@ -70,6 +73,7 @@ export class ElementController {
      * POST /elements/batch - Create multiple elements from BIM data
      */
     static async createBatch(req: AuthRequest, res: Response) {
+        const started = Date.now();
         try {
             const elements: CreateElementRequest[] = req.body.elements;
             const userId = req.user?.userId;
@@ -100,7 +104,11 @@ export class ElementController {
             }));
 
             // Batch insert using bulkCreate for better performance
+            const dbStarted = Date.now();
             const createdElements = await Element.bulkCreate(elementsWithUser);
+            const dbMs = Date.now() - dbStarted;
+
+            res.set('Server-Timing', `db;dur=${dbMs}, total;dur=${Date.now() - started}`);
 
             res.status(201).json({
                 message: `Successfully created ${createdElements.length} elements`,
@@ -111,6 +119,77 @@ export class ElementController {
         }
     }
 
+    /**
+     * POST /elements/classify - Classify elements into MasterFormat divisions
+     * Body: { elements: [{ name, category?, properties?, bimMetadata? }] } to classify inline,
+     * or { projectId, apply? } for every element of a synced project; with apply (GC admins
+     * only, it rewrites elements of every user on the project) the division is stored in
+     * properties.masterFormat.
+     */
+    static async classify(req: AuthRequest, res: Response) {
+        const started = Date.now();
+        try {
+            const { projectId, apply = false } = req.body;
+
+            if (apply && req.user?.role !== UserRole.GC_ADMIN) {
+                return res.status(403).json({ error: 'Only GC admins can apply classifications to a project' });
+            }
+
+            if (!projectId) {
+                const elements: ClassifiableElement[] = req.body.elements;
+                if (!Array.isArray(elements) || elements.length === 0 || elements.some(el => !el || !el.name)) {
+                    return res.status(400).json({
+                        error: 'Invalid request: elements array with names, or projectId, is required'
+                    });
+                }
+
+                const { categories, stats } = await ClassificationService.classifyBatch(elements);
+                res.set('Server-Timing', `total;dur=${Date.now() - started}`);
+                return res.json({ categories, stats });
+            }
+
+            const elements = await Element.findAll({
+                where: { projectId },
+                attributes: ['id', 'name', 'category', 'properties', 'bimMetadata'],
+            });
+            const { categories, stats } = await ClassificationService.classifyBatch(elements);
+
+            // One grouped update per division rather than one per element
+            const idsByDivision = new Map<string, string[]>();
+            elements.forEach((element, index) => {
+                const ids = idsByDivision.get(categories[index]) || [];
+                ids.push(element.id);
+                idsByDivision.set(categories[index], ids);
+            });
+
+            if (apply) {
+                for (const [division, ids] of idsByDivision) {
+                    await Element.update(
+                        {
+                            properties: Sequelize.fn(
+                                'jsonb_set',
+                                Sequelize.fn('COALESCE', Sequelize.col('properties'), Sequelize.literal(`'{}'::jsonb`)),
+                                Sequelize.literal(`'{masterFormat}'`),
+                                Sequelize.fn('to_jsonb', Sequelize.cast(division, 'text'))
+                            ),
+                        },
+                        { where: { id: ids } }
+                    );
+                }
+            }
+
+            res.set('Server-Timing', `total;dur=${Date.now() - started}`);
+            res.json({
+                projectId,
+                applied: Boolean(apply),
+                divisions: Object.fromEntries([...idsByDivision].map(([division, ids]) => [division, ids.length])),
+                stats,
+            });
+        } catch (error: any) {
+            res.status(500).json({ error: error.message });
+        }
+    }
+
     /**
      * GET /elements/:id - Get element by ID
      */
@@ -163,7 +242,8 @@ export class ElementController {
     }
 
     /**
-     * GET /elements/:id/suggest-price - Get AI pricing suggestion
+     * GET /elements/:id/suggest-price - Get pricing suggestion
+     * Answered from the price book when the type has history, otherwise from OpenAI
      */
     static async suggestPrice(req: AuthRequest, res: Response) {
         try {
@@ -172,7 +252,7 @@ export class ElementController {
                 return res.status(404).json({ error: 'Element not found' });
             }
 
-            const suggestion = await OpenAIService.suggestPricing({
+            const suggestion = await PriceBookService.suggestPricing({
                 name: element.name,
                 category: element.category,
                 quantity: parseFloat(element.quantity.toString()),
@@ -185,4 +265,23 @@ export class ElementController {
             res.status(500).json({ error: error.message });
         }
     }
+
+    /**
+     * POST /elements/price-book/import - Add a takeoff cost export to the price book
+     */
+    static async importPriceBook(req: AuthRequest, res: Response) {
+        try {
+            const { csvContent } = req.body;
+            if (!csvContent) {
+                return res.status(400).json({ error: 'CSV content required' });
+            }
+
+            const rowsImported = PriceBookService.importTakeoffCsv(csvContent);
+            PriceBookService.save();
+
+            res.json({ rowsImported });
+        } catch (error: any) {
+            res.status(500).json({ error: error.message });
+        }
+    }
 }
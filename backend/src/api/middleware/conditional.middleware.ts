@@ -0,0 +1,118 @@
+import crypto from 'crypto';
+import { Response, NextFunction } from 'express';
+import { fn, col, ModelStatic, Model } from 'sequelize';
+import { AuthRequest } from './auth.middleware';
+
+interface TableVersion {
+    count: number;
+    lastModified: Date | null;
+}
+
+/**
+ * Row count and latest updatedAt of a model - one cheap aggregate query
+ */
+const tableVersion = async (model: ModelStatic<Model>): Promise<TableVersion> => {
+    const updatedAt = model.getAttributes().updatedAt?.field || 'updatedAt';
+    const row = (await model.findOne({
+        attributes: [
+            [fn('COUNT', col('*')), 'count'],
+            [fn('MAX', col(updatedAt)), 'lastModified'],
+        ],
+        raw: true,
+    })) as unknown as { count: string; lastModified: string | null };
+    return {
+        count: Number(row.count) || 0,
+        lastModified: row.lastModified ? new Date(row.lastModified) : null,
+    };
+};
+
+/**
+ * Version of a single row from a primary key lookup; null if it does not exist
+ */
+const rowVersion = async (model: ModelStatic<Model>, id: string): Promise<TableVersion | null> => {
+    const row = await model.findByPk(id, { attributes: [model.primaryKeyAttribute, 'updatedAt'] });
+    if (!row) return null;
+    const updatedAt = row.get('updatedAt') as Date | null;
+    return { count: 1, lastModified: updatedAt ? new Date(updatedAt) : null };
+};
+
+/**
+ * Set ETag and Last-Modified from versions; answers 304 and returns true when the client's copy is current
+ */
+const notModified = (req: AuthRequest, res: Response, versions: TableVersion[]): boolean => {
+    const lastModified = versions.reduce<Date | null>(
+        (latest, v) => (v.lastModified && (!latest || v.lastModified > latest) ? v.lastModified : latest),
+        null
+    );
+
+    // Responses differ per URL (query and params) and per user
+    const hash = crypto.createHash('sha1')
+        .update(JSON.stringify([
+            req.originalUrl,
+            req.user?.userId ?? null,
+            versions.map(v => [v.count, v.lastModified?.getTime() ?? null]),
+        ]))
+        .digest('base64')
+        .replace(/=+$/, '');
+    const etag = `W/"${hash}"`;
+
+    res.set('ETag', etag);
+    res.set('Cache-Control', 'private, no-cache');
+    res.set('Vary', 'Authorization');
+    if (lastModified) {
+        res.set('Last-Modified', lastModified.toUTCString());
+    }
+
+    const ifNoneMatch = req.headers['if-none-match'];
+    if (ifNoneMatch) {
+        const tags = ifNoneMatch.split(',').map(tag => tag.trim());
+        if (tags.includes(etag) || tags.includes('*')) {
+            res.status(304).end();
+            return true;
+        }
+    } else if (lastModified && req.headers['if-modified-since']) {
+        // Weaker than the ETag: deletes do not move max(updatedAt)
+        const since = new Date(req.headers['if-modified-since']).getTime();
+        // HTTP dates have second resolution
+        if (!isNaN(since) && Math.floor(lastModified.getTime() / 1000) <= Math.floor(since / 1000)) {
+            res.status(304).end();
+            return true;
+        }
+    }
+    return false;
+};
+
+/**
+ * Conditional GET for list routes: weak ETag and Last-Modified from row counts and
+ * max(updatedAt) of the models a route reads, answered with 304 before the route runs its query.
+ */
+export const conditional = (...models: ModelStatic<Model>[]) => {
+    return async (req: AuthRequest, res: Response, next: NextFunction) => {
+        let versions: TableVersion[];
+        try {
+            versions = await Promise.all(models.map(tableVersion));
+        } catch (error) {
+            // Validators are an optimization; serve the full response if they cannot be computed
+            console.error('Conditional GET error:', error);
+            return next();
+        }
+        if (!notModified(req, res, versions)) next();
+    };
+};
+
+/**
+ * Conditional GET for single-row routes (/:id): validators from the row's own updatedAt,
+ * one primary key lookup instead of table-wide aggregates. A missing row is left to the route (404).
+ */
+export const conditionalRow = (model: ModelStatic<Model>) => {
+    return async (req: AuthRequest, res: Response, next: NextFunction) => {
+        let version: TableVersion | null;
+        try {
+            version = await rowVersion(model, req.params.id);
+        } catch (error) {
+            console.error('Conditional GET error:', error);
+            return next();
+        }
+        if (!version || !notModified(req, res, [version])) next();
+    };
+};
@@ -0,0 +1,87 @@
+import { Request, Response, NextFunction } from 'express';
+import {
+    registry,
+    httpRequestDuration,
+    httpRequestSize,
+    httpResponseSize,
+    dbQueriesPerRequest,
+    dbTimePerRequest,
+    seconds,
+    trackRequest,
+} from '../../services/metrics.service';
+
+// Requests running more queries than this are logged (usually an N+1 pattern)
+const QUERY_COUNT_THRESHOLD = parseInt(process.env.METRICS_QUERY_THRESHOLD || '25', 10);
+
+const routeLabel = (req: Request): string => (req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched');
+
+const byteLength = (chunk: any): number =>
+    chunk && typeof chunk !== 'function' ? Buffer.byteLength(chunk) : 0;
+
+/**
+ * Record latency, payload sizes and DB usage of every request
+ */
+export const metrics = (req: Request, res: Response, next: NextFunction) => {
+    const start = process.hrtime.bigint();
+    let responseBytes = 0;
+
+    // Count the bytes actually written, streamed responses have no Content-Length
+    const write = res.write.bind(res) as (...args: any[]) => boolean;
+    const end = res.end.bind(res) as (...args: any[]) => Response;
+    res.write = ((chunk: any, ...args: any[]) => {
+        responseBytes += byteLength(chunk);
+        return write(chunk, ...args);
+    }) as Response['write'];
+    res.end = ((chunk?: any, ...args: any[]) => {
+        responseBytes += byteLength(chunk);
+        return end(chunk, ...args);
+    }) as Response['end'];
+
+    const context = trackRequest(next);
+
+    res.on('finish', () => {
+        const elapsed = seconds(start);
+        const labels = { method: req.method, route: routeLabel(req) };
+
+        httpRequestDuration.observe({ ...labels, status: res.statusCode }, elapsed);
+        httpRequestSize.observe(labels, parseInt(req.get('Content-Length') || '0', 10));
+        httpResponseSize.observe(labels, responseBytes);
+        dbQueriesPerRequest.observe(labels, context.queries);
+        dbTimePerRequest.observe(labels, context.dbSeconds);
+
+        if (context.queries > QUERY_COUNT_THRESHOLD) {
+            console.warn(
+                `[metrics] ${req.method} ${req.originalUrl} ran ${context.queries} queries ` +
+                `(${Math.round(context.dbSeconds * 1000)} ms DB, ${Math.round(elapsed * 1000)} ms total)`
+            );
+        }
+    });
+};
+
+const LOOPBACK_ADDRESSES = ['127.0.0.1', '::1', '::ffff:127.0.0.1'];
+
+// Request made on this machine and not forwarded by a proxy
+const isLocalRequest = (req: Request): boolean =>
+    LOOPBACK_ADDRESSES.includes(req.socket.remoteAddress || '') && !req.headers['x-forwarded-for'];
+
+/**
+ * GET /metrics in Prometheus text format; requires METRICS_TOKEN as bearer token when set,
+ * otherwise only local requests are served
+ */
+export const metricsEndpoint = async (req: Request, res: Response) => {
+    const token = process.env.METRICS_TOKEN;
+    if (token && req.headers.authorization !== `Bearer ${token}`) {
+        return res.status(401).json({ error: 'Invalid metrics token' });
+    }
+    if (!token && !isLocalRequest(req)) {
+        return res.status(403).json({ error: 'Metrics are only served locally; set METRICS_TOKEN to scrape remotely' });
+    }
+
+    try {
+        res.set('Content-Type', registry.contentType);
+        res.end(await registry.metrics());
+    } catch (error) {
+        console.error('Metrics error:', error);
+        res.status(500).json({ error: 'Failed to collect metrics' });
+    }
+};
@@ -1,6 +1,8 @@
 import { Router } from 'express';
 import { ElementController } from '../controllers/element.controller';
 import { authenticateToken, requireRole } from '../middleware/auth.middleware';
+import { conditional, conditionalRow } from '../middleware/conditional.middleware';
+import { Element } from '../../models/Element';
 import { UserRole } from '@common/types/user.types';
 
 const router = Router();
@@ -9,14 +11,16 @@ const router = Router();
 router.use(authenticateToken);
 
 // List and create elements
-router.get('/', ElementController.list);
+router.get('/', conditional(Element), ElementController.list);
 
 // Batch operations (must come before /:id to match correctly)
 router.post('/batch', requireRole(UserRole.GC_USER, UserRole.GC_ADMIN), ElementController.createBatch);
+router.post('/classify', requireRole(UserRole.GC_USER, UserRole.GC_ADMIN), ElementController.classify);
+router.post('/price-book/import', requireRole(UserRole.GC_ADMIN), ElementController.importPriceBook);
 
 // Single element operations
 router.post('/', requireRole(UserRole.GC_USER, UserRole.GC_ADMIN), ElementController.create);
-router.get('/:id', ElementController.getById);
+router.get('/:id', conditionalRow(Element), ElementController.getById);
 router.get('/:id/suggest-price', ElementController.suggestPrice);
 router.put('/:id/pricing', requireRole(UserRole.GC_ADMIN), ElementController.updatePricing);
 
@@ -1,5 +1,42 @@
 require('dotenv').config();
 
+const int = (value, fallback) => (value === undefined || value === '' ? fallback : parseInt(value, 10));
+
+/**
+ * Connection pool and timeouts, defaults per environment, overridable from the environment.
+ * With read replicas the pool size applies to each replica and to the primary.
+ */
+const poolSettings = (defaults) => ({
+  pool: {
+    max: int(process.env.DB_POOL_MAX, defaults.max),
+    min: int(process.env.DB_POOL_MIN, defaults.min),
+    // Time to wait for a free connection before the query fails
+    acquire: int(process.env.DB_POOL_ACQUIRE_MS, defaults.acquire),
+    idle: int(process.env.DB_POOL_IDLE_MS, defaults.idle)
+  },
+  // Server side statement_timeout; applied by src/models/index.js, not to CLI migrations
+  statementTimeout: int(process.env.DB_STATEMENT_TIMEOUT_MS, defaults.statementTimeout)
+});
+
+/**
+ * Read replicas from DB_READ_HOSTS ("host" or "host:port", comma separated).
+ * Credentials and database default to the primary's.
+ */
+const readReplicas = () => (process.env.DB_READ_HOSTS || '')
+  .split(',')
+  .map(entry => entry.trim())
+  .filter(Boolean)
+  .map((entry) => {
+    const [host, port] = entry.split(':');
+    return {
+      host,
+      port: port || process.env.DB_READ_PORT || process.env.DB_PORT || 5432,
+      username: process.env.DB_READ_USER || process.env.DB_USER,
+      password: process.env.DB_READ_PASSWORD || process.env.DB_PASSWORD,
+      database: process.env.DB_READ_NAME || process.env.DB_NAME
+    };
+  });
+
 module.exports = {
   development: {
     username: process.env.DB_USER || 'postgres',
@@ -8,7 +45,9 @@ module.exports = {
     host: process.env.DB_HOST || 'localhost',
     port: process.env.DB_PORT || 5432,
     dialect: 'postgres',
-    logging: false
+    logging: false,
+    ...poolSettings({ max: 10, min: 0, acquire: 30000, idle: 10000, statementTimeout: 60000 }),
+    readReplicas: readReplicas()
   },
   test: {
     username: process.env.DB_USER || 'postgres',
@@ -17,7 +56,9 @@ module.exports = {
     host: process.env.DB_HOST || 'localhost',
     port: process.env.DB_PORT || 5432,
     dialect: 'postgres',
-    logging: false
+    logging: false,
+    ...poolSettings({ max: 5, min: 0, acquire: 10000, idle: 10000, statementTimeout: 30000 }),
+    readReplicas: readReplicas()
   },
   production: {
     username: process.env.DB_USER,
@@ -32,6 +73,9 @@ module.exports = {
         require: true,
         rejectUnauthorized: false
       }
-    }
+    },
+    // Fail fast when the pool is exhausted rather than queueing requests for long
+    ...poolSettings({ max: 20, min: 2, acquire: 10000, idle: 10000, statementTimeout: 30000 }),
+    readReplicas: readReplicas()
   }
 };
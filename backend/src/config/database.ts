@@ -1,18 +1,25 @@
 import { Sequelize } from 'sequelize';
+import { instrumentSequelize } from '../services/metrics.service';
 
 const databaseUrl = process.env.DATABASE_URL || 'postgresql://localhost:5432/baps';
 
 export const sequelize = new Sequelize(databaseUrl, {
     dialect: 'postgres',
     logging: process.env.NODE_ENV === 'development' ? console.log : false,
+    // Same DB_POOL_* / DB_STATEMENT_TIMEOUT_MS settings as src/config/database.js
     pool: {
-        max: 5,
-        min: 0,
-        acquire: 30000,
-        idle: 10000,
+        max: parseInt(process.env.DB_POOL_MAX || '10', 10),
+        min: parseInt(process.env.DB_POOL_MIN || '0', 10),
+        acquire: parseInt(process.env.DB_POOL_ACQUIRE_MS || '30000', 10),
+        idle: parseInt(process.env.DB_POOL_IDLE_MS || '10000', 10),
+    },
+    dialectOptions: {
+        statement_timeout: parseInt(process.env.DB_STATEMENT_TIMEOUT_MS || '60000', 10),
     },
 });
 
+instrumentSequelize(sequelize);
+
 console.log('[DB] Sequelize instance exported successfully');
 
 export async function connectDatabase() {
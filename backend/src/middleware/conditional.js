@@ -0,0 +1,145 @@
+const crypto = require('crypto');
+const { fn, col } = require('sequelize');
+const logger = require('../utils/logger');
+
+/**
+ * Row count and latest updatedAt of a model - one cheap aggregate query
+ * where: optional filter, so large tables are only counted over the rows a route returns
+ */
+const tableVersion = async (Model, where) => {
+  const updatedAt = Model.rawAttributes.updatedAt.field || 'updatedAt';
+  const row = await Model.findOne({
+    attributes: [
+      [fn('COUNT', col('*')), 'count'],
+      [fn('MAX', col(updatedAt)), 'lastModified']
+    ],
+    where,
+    raw: true
+  });
+  return {
+    count: Number(row.count) || 0,
+    lastModified: row.lastModified ? new Date(row.lastModified) : null
+  };
+};
+
+const entryVersion = (req, entry) => (
+  Array.isArray(entry) ? tableVersion(entry[0], entry[1](req)) : tableVersion(entry)
+);
+
+/**
+ * Version of one row and the rows included with it, from a single primary key lookup:
+ * [count, latest updatedAt] of the row and of each include. null if the row does not exist.
+ */
+const rowVersion = async (Model, id, include) => {
+  const row = await Model.findByPk(id, {
+    attributes: [Model.primaryKeyAttribute, 'updatedAt'],
+    include: include.map(entry => ({ ...entry, attributes: ['updatedAt'] }))
+  });
+  if (!row) return null;
+
+  const versions = [{ count: 1, lastModified: row.updatedAt }];
+  for (const entry of include) {
+    const as = entry.as || Object.values(Model.associations).find(a => a.target === entry.model).as;
+    const value = row.get(as);
+    const related = [].concat(value || []);
+    versions.push({
+      count: related.length,
+      lastModified: related.reduce((latest, r) => (!latest || r.updatedAt > latest ? r.updatedAt : latest), null)
+    });
+  }
+  return versions;
+};
+
+/**
+ * Set ETag and Last-Modified from versions; answers 304 Not Modified and returns true when
+ * the client's copy is current.
+ */
+const notModified = (req, res, versions) => {
+  const lastModified = versions.reduce(
+    (latest, v) => (v.lastModified && (!latest || v.lastModified > latest) ? v.lastModified : latest),
+    null
+  );
+
+  // Responses differ per URL (query and params) and, behind auth, per user
+  const hash = crypto.createHash('sha1')
+    .update(JSON.stringify([
+      req.originalUrl,
+      req.user ? req.user.id : null,
+      versions.map(v => [v.count, v.lastModified && v.lastModified.getTime()])
+    ]))
+    .digest('base64')
+    .replace(/=+$/, '');
+  const etag = `W/"${hash}"`;
+
+  res.set('ETag', etag);
+  res.set('Cache-Control', 'private, no-cache');
+  res.set('Vary', 'Authorization');
+  if (lastModified) {
+    res.set('Last-Modified', lastModified.toUTCString());
+  }
+
+  const ifNoneMatch = req.headers['if-none-match'];
+  if (ifNoneMatch) {
+    const tags = ifNoneMatch.split(',').map(tag => tag.trim());
+    if (tags.includes(etag) || tags.includes('*')) {
+      res.status(304).end();
+      return true;
+    }
+  } else if (lastModified && req.headers['if-modified-since']) {
+    // Weaker than the ETag: deletes do not move max(updatedAt)
+    const since = new Date(req.headers['if-modified-since']);
+    // HTTP dates have second resolution
+    if (!isNaN(since) && Math.floor(lastModified.getTime() / 1000) <= Math.floor(since.getTime() / 1000)) {
+      res.status(304).end();
+      return true;
+    }
+  }
+  return false;
+};
+
+/**
+ * Conditional GET for list routes.
+ * Builds a weak ETag and Last-Modified from the row counts and max(updatedAt) of the
+ * models the route reads, before the route runs its query. A matching If-None-Match
+ * (or If-Modified-Since) is answered with 304 Not Modified and no body.
+ *
+ * Usage: router.get('/', auth, conditional(Project, GeneralContractor), handler)
+ * A model can be given as [Model, req => where] to version only the rows the route reads.
+ */
+const conditional = (...models) => async (req, res, next) => {
+  let versions;
+  try {
+    versions = await Promise.all(models.map(entry => entryVersion(req, entry)));
+  } catch (error) {
+    // Validators are an optimization; serve the full response if they cannot be computed
+    logger.error('Conditional GET error:', error);
+    return next();
+  }
+  if (!notModified(req, res, versions)) next();
+};
+
+/**
+ * Conditional GET for single-row routes (/:id): validators come from the updatedAt of the
+ * row and of the rows the route includes with it, not from table-wide aggregates.
+ * include: the route's includes ({ model, as }); models: other models the route reads,
+ * as for conditional (give them a where, e.g. [TrustFactor, req => ({ subcontractorId: req.params.id })]).
+ * A missing row is left to the route to answer 404.
+ *
+ * Usage: router.get('/:id', conditionalRow(GeneralContractor, [{ model: User }]), handler)
+ */
+const conditionalRow = (Model, include = [], ...models) => async (req, res, next) => {
+  let versions;
+  try {
+    const [row, ...others] = await Promise.all([
+      rowVersion(Model, req.params.id, include),
+      ...models.map(entry => entryVersion(req, entry))
+    ]);
+    versions = row && [...row, ...others];
+  } catch (error) {
+    logger.error('Conditional GET error:', error);
+    return next();
+  }
+  if (!versions || !notModified(req, res, versions)) next();
+};
+
+module.exports = { conditional, conditionalRow, tableVersion };
@@ -0,0 +1,110 @@
+const logger = require('../utils/logger');
+const {
+  registry,
+  httpRequestDuration,
+  httpRequestSize,
+  httpResponseSize,
+  dbQueriesPerRequest,
+  dbTimePerRequest,
+  seconds,
+  trackRequest
+} = require('../utils/metrics');
+
+// Requests running more queries than this are logged (usually an N+1 pattern)
+const QUERY_COUNT_THRESHOLD = parseInt(process.env.METRICS_QUERY_THRESHOLD || '25', 10);
+
+/**
+ * Route template the request matched ("/api/projects/:id"), so labels stay low cardinality
+ */
+const routeLabel = (req) => (req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched');
+
+/**
+ * Record latency, payload sizes and DB usage of every request
+ */
+const metrics = (req, res, next) => {
+  const start = process.hrtime.bigint();
+  let responseBytes = 0;
+
+  // Count the bytes actually written, streamed responses have no Content-Length
+  const { write, end } = res;
+  res.write = function (chunk, ...args) {
+    if (chunk && typeof chunk !== 'function') responseBytes += Buffer.byteLength(chunk);
+    return write.call(this, chunk, ...args);
+  };
+  res.end = function (chunk, ...args) {
+    if (chunk && typeof chunk !== 'function') responseBytes += Buffer.byteLength(chunk);
+    return end.call(this, chunk, ...args);
+  };
+
+  const context = trackRequest(next);
+
+  res.on('finish', () => {
+    const elapsed = seconds(start);
+    const labels = { method: req.method, route: routeLabel(req) };
+
+    httpRequestDuration.observe({ ...labels, status: res.statusCode }, elapsed);
+    httpRequestSize.observe(labels, parseInt(req.get('Content-Length') || '0', 10));
+    httpResponseSize.observe(labels, responseBytes);
+    dbQueriesPerRequest.observe(labels, context.queries);
+    dbTimePerRequest.observe(labels, context.dbSeconds);
+
+    if (context.queries > QUERY_COUNT_THRESHOLD) {
+      logger.warn('Request exceeded query threshold', {
+        method: req.method,
+        route: labels.route,
+        url: req.originalUrl,
+        status: res.statusCode,
+        queries: context.queries,
+        dbMs: Math.round(context.dbSeconds * 1000),
+        durationMs: Math.round(elapsed * 1000)
+      });
+    }
+  });
+};
+
+const LOOPBACK_ADDRESSES = ['127.0.0.1', '::1', '::ffff:127.0.0.1'];
+
+/**
+ * Request made on this machine and not forwarded by a proxy
+ */
+const isLocalRequest = (req) =>
+  LOOPBACK_ADDRESSES.includes(req.socket.remoteAddress) && !req.headers['x-forwarded-for'];
+
+/**
+ * GET /metrics in Prometheus text format. When METRICS_TOKEN is set, scrapers must send
+ * it as a bearer token; without it only local requests are served.
+ */
+const metricsEndpoint = async (req, res) => {
+  const token = process.env.METRICS_TOKEN;
+  if (token && req.headers.authorization !== `Bearer ${token}`) {
+    return res.status(401).json({
+      error: {
+        message: 'Invalid metrics token',
+        status: 401
+      }
+    });
+  }
+  if (!token && !isLocalRequest(req)) {
+    return res.status(403).json({
+      error: {
+        message: 'Metrics are only served locally; set METRICS_TOKEN to scrape remotely',
+        status: 403
+      }
+    });
+  }
+
+  try {
+    res.set('Content-Type', registry.contentType);
+    res.end(await registry.metrics());
+  } catch (error) {
+    logger.error('Metrics error:', error);
+    res.status(500).json({
+      error: {
+        message: 'Failed to collect metrics',
+        status: 500
+      }
+    });
+  }
+};
+
+module.exports = { metrics, metricsEndpoint };
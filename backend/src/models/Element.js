@@ -1,3 +1,5 @@
+const { isPartitioned } = require('../utils/elementPartitions');
+
 module.exports = (sequelize, DataTypes) => {
     const Element = sequelize.define('Element', {
         id: {
@@ -31,6 +33,10 @@ module.exports = (sequelize, DataTypes) => {
             allowNull: true,
             defaultValue: {},
         },
+        revitId: {
+            type: DataTypes.STRING,
+            allowNull: true,
+        },
         projectId: {
             type: DataTypes.UUID,
             allowNull: true,
@@ -42,8 +48,25 @@ module.exports = (sequelize, DataTypes) => {
     }, {
         tableName: 'elements',
         timestamps: true,
+        // Created on every monthly partition by migrations/002_partition_elements.js
+        indexes: [
+            { name: 'elements_project_id', fields: ['projectId'] },
+            { name: 'elements_created_by_updated_at', fields: ['createdBy', 'updatedAt'] },
+            { name: 'elements_category', fields: ['category'] },
+            { name: 'elements_project_id_revit_id', fields: ['projectId', 'revitId'] }
+        ]
     });
 
+    // sync({ alter: true }) cannot alter a partitioned table; once migration 002 has
+    // partitioned elements, its schema is managed by migrations only
+    const syncTable = Element.sync.bind(Element);
+    Element.sync = async function (options) {
+        if (await isPartitioned(sequelize)) {
+            return Element;
+        }
+        return syncTable(options);
+    };
+
     Element.associate = function (models) {
         // Define associations here if needed
         // Element.belongsTo(models.User, { foreignKey: 'createdBy' });
@@ -8,6 +8,7 @@ export class Element extends Model {
     declare unit: string;
     declare properties: Record<string, any>;
     declare bimMetadata: any;
+    declare revitId: string | null;
     declare projectId: string | null;
     declare createdBy: string;
     declare readonly createdAt: Date;
@@ -52,6 +53,10 @@ export const initializeElement = (sequelize: Sequelize) => {
                 allowNull: true,
                 defaultValue: {},
             },
+            revitId: {
+                type: DataTypes.STRING,
+                allowNull: true,
+            },
             projectId: {
                 type: DataTypes.UUID,
                 allowNull: true,
@@ -65,8 +70,26 @@ export const initializeElement = (sequelize: Sequelize) => {
             sequelize,
             tableName: 'elements',
             timestamps: true,
+            // Created on every monthly partition by migrations/002_partition_elements.js
+            indexes: [
+                { name: 'elements_project_id', fields: ['projectId'] },
+                { name: 'elements_created_by_updated_at', fields: ['createdBy', 'updatedAt'] },
+                { name: 'elements_category', fields: ['category'] },
+                { name: 'elements_project_id_revit_id', fields: ['projectId', 'revitId'] },
+            ],
         }
     );
 
+    // sync({ alter: true }) cannot alter a partitioned table; once migration 002 has
+    // partitioned elements, its schema is managed by migrations only
+    const syncTable = Element.sync.bind(Element);
+    Element.sync = (async (options?: any) => {
+        const [rows] = await sequelize.query(
+            `SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid
+              WHERE c.oid = to_regclass('elements')`
+        );
+        return rows.length > 0 ? Element : syncTable(options);
+    }) as unknown as typeof Element.sync;
+
     initialized = true;
 };
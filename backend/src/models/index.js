@@ -2,17 +2,42 @@ const fs = require('fs');
 const path = require('path');
 const { Sequelize } = require('sequelize');
 const config = require('../config/database');
+const { routeReads } = require('../utils/readRouting');
+const { instrumentSequelize } = require('../utils/metrics');
 
 const env = process.env.NODE_ENV || 'development';
 const dbConfig = config[env];
 
+const primary = {
+  host: dbConfig.host,
+  port: dbConfig.port,
+  username: dbConfig.username,
+  password: dbConfig.password,
+  database: dbConfig.database
+};
+
 const sequelize = new Sequelize(dbConfig.database, dbConfig.username, dbConfig.password, {
   host: dbConfig.host,
   port: dbConfig.port,
   dialect: dbConfig.dialect,
-  logging: dbConfig.logging
+  logging: dbConfig.logging,
+  pool: dbConfig.pool,
+  dialectOptions: {
+    ...dbConfig.dialectOptions,
+    // Cancel runaway queries instead of letting them hold a pooled connection
+    statement_timeout: dbConfig.statementTimeout
+  },
+  // SELECTs outside a transaction go to a replica, everything else to the primary
+  replication: dbConfig.readReplicas.length > 0
+    ? { read: dbConfig.readReplicas, write: primary }
+    : false
 });
 
+if (dbConfig.readReplicas.length > 0) {
+  routeReads(sequelize);
+}
+instrumentSequelize(sequelize);
+
 const db = {};
 
 // Load all models
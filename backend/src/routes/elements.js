@@ -4,6 +4,7 @@ const { body, validationResult } = require('express-validator');
 const db = require('../models');
 const logger = require('../utils/logger');
 const { auth, authorize } = require('../middleware/auth');
+const { conditional } = require('../middleware/conditional');
 
 const Element = db.Element;
 
@@ -116,6 +117,7 @@ router.post('/', auth, authorize('GENERAL_CONTRACTOR', 'GC_USER', 'GC_ADMIN', 'A
  *         description: Elements created successfully
  */
 router.post('/batch', auth, authorize('GENERAL_CONTRACTOR', 'GC_USER', 'GC_ADMIN', 'ADMIN'), async (req, res) => {
+    const started = Date.now();
     try {
         const { elements } = req.body;
 
@@ -145,10 +147,15 @@ router.post('/batch', auth, authorize('GENERAL_CONTRACTOR', 'GC_USER', 'GC_ADMIN
         }));
 
         // Batch insert
+        const dbStarted = Date.now();
         const createdElements = await Element.bulkCreate(elementsWithUser);
+        const dbMs = Date.now() - dbStarted;
 
         logger.info(`Batch created ${createdElements.length} elements`);
 
+        // Lets clients (pyRevit sync metrics) separate server time from network time
+        res.set('Server-Timing', `db;dur=${dbMs}, total;dur=${Date.now() - started}`);
+
         res.status(201).json({
             message: `Successfully created ${createdElements.length} elements`,
             elements: createdElements
@@ -164,20 +171,60 @@ router.post('/batch', auth, authorize('GENERAL_CONTRACTOR', 'GC_USER', 'GC_ADMIN
     }
 });
 
+/**
+ * Filters of a list request: project and category, when given.
+ * Each is served by an index on every monthly elements partition.
+ */
+const listScope = (req) => {
+    const where = {};
+    if (req.query.projectId) {
+        where.projectId = req.query.projectId;
+    }
+    if (req.query.category) {
+        where.category = req.query.category;
+    }
+    return where;
+};
+
 /**
  * @swagger
  * /api/elements:
  *   get:
- *     summary: List all elements
+ *     summary: List all elements, optionally filtered by project and category
  *     tags: [Elements]
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - in: query
+ *         name: projectId
+ *         schema:
+ *           type: string
+ *       - in: query
+ *         name: category
+ *         schema:
+ *           type: string
+ *       - in: query
+ *         name: limit
+ *         schema:
+ *           type: integer
+ *       - in: query
+ *         name: offset
+ *         schema:
+ *           type: integer
  *     responses:
  *       200:
  *         description: List of elements
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  */
-router.get('/', auth, async (req, res) => {
+router.get('/', auth, conditional([Element, listScope]), async (req, res) => {
     try {
+        const { limit, offset = 0 } = req.query;
+
         const elements = await Element.findAll({
-            order: [['createdAt', 'DESC']]
+            where: listScope(req),
+            order: [['createdAt', 'DESC']],
+            ...(limit ? { limit: parseInt(limit), offset: parseInt(offset) } : {})
         });
 
         res.json(elements);
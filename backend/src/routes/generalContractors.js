@@ -4,6 +4,7 @@ const { body, validationResult } = require('express-validator');
 const db = require('../models');
 const logger = require('../utils/logger');
 const { auth, authorize } = require('../middleware/auth');
+const { conditional, conditionalRow } = require('../middleware/conditional');
 
 const GeneralContractor = db.GeneralContractor;
 const User = db.User;
@@ -101,8 +102,10 @@ router.post('/', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), [
  *     responses:
  *       200:
  *         description: List of General Contractors
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  */
-router.get('/', async (req, res) => {
+router.get('/', conditional(GeneralContractor, User), async (req, res) => {
   try {
     const { limit = 10, offset = 0 } = req.query;
 
@@ -145,10 +148,12 @@ router.get('/', async (req, res) => {
  *     responses:
  *       200:
  *         description: General Contractor found
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  *       404:
  *         description: General Contractor not found
  */
-router.get('/:id', async (req, res) => {
+router.get('/:id', conditionalRow(GeneralContractor, [{ model: User }]), async (req, res) => {
   try {
     const gc = await GeneralContractor.findByPk(req.params.id, {
       include: [{ model: User, attributes: ['email', 'firstName', 'lastName', 'phone'] }]
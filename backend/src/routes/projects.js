@@ -4,11 +4,17 @@ const { body, validationResult } = require('express-validator');
 const db = require('../models');
 const logger = require('../utils/logger');
 const { auth, authorize } = require('../middleware/auth');
-const Papa = require('papaparse');
+const { conditional, conditionalRow } = require('../middleware/conditional');
+const takeoff = require('../config/takeoff.json');
+const {
+  CsvImportError, csvRows, ingestRows, respondWithProgress, pick, headerKey, splitQuantity, normalizeUnit,
+  parseNumber
+} = require('../utils/csvIngest');
 
 const Project = db.Project;
 const GeneralContractor = db.GeneralContractor;
 const ProjectMatch = db.ProjectMatch;
+const Element = db.Element;
 
 /**
  * @swagger
@@ -140,8 +146,10 @@ router.post('/', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), [
  *     responses:
  *       200:
  *         description: List of projects
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  */
-router.get('/', async (req, res) => {
+router.get('/', conditional(Project, GeneralContractor), async (req, res) => {
   try {
     const { status, limit = 10, offset = 0 } = req.query;
     const where = status ? { status } : {};
@@ -186,10 +194,12 @@ router.get('/', async (req, res) => {
  *     responses:
  *       200:
  *         description: Project found
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  *       404:
  *         description: Project not found
  */
-router.get('/:id', async (req, res) => {
+router.get('/:id', conditionalRow(Project, [{ model: GeneralContractor }]), async (req, res) => {
   try {
     const project = await Project.findByPk(req.params.id, {
       include: [{ model: GeneralContractor, attributes: ['companyName', 'id'] }]
@@ -278,11 +288,56 @@ router.put('/:id', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), async (req, r
   }
 });
 
+// Header keys (see csvIngest.headerKey) of takeoff columns, in order of preference;
+// Revit export headers come from the shared takeoff tables
+const NAME_HEADERS = ['name', ...takeoff.typeHeaders.map(headerKey), 'description'];
+const QUANTITY_HEADERS = ['quantity', ...takeoff.quantityHeaders.map(headerKey), 'qty'];
+const UNIT_HEADERS = ['unit', 'units', 'uom'];
+const CATEGORY_HEADERS = ['category', 'revitcategory'];
+const REVIT_ID_HEADERS = ['revitid', 'elementid', 'id'];
+
+// Infer a building category from an element name (keywords from the shared takeoff tables)
+const inferCategory = (name) => {
+  const text = name.toLowerCase();
+  const match = takeoff.categoryKeywords.find(([keyword]) => text.includes(keyword));
+  return match ? match[1] : 'Uncategorized';
+};
+
+/**
+ * Convert a takeoff row to an element, or the reason the row is skipped
+ */
+const takeoffElement = (project, user, filename) => (row, rowNumber, original) => {
+  const name = pick(row, NAME_HEADERS);
+  if (!name) return 'missing name';
+
+  const quantity = splitQuantity(pick(row, QUANTITY_HEADERS));
+  if (quantity.value === null) return 'missing or non-numeric quantity';
+
+  const unit = pick(row, UNIT_HEADERS);
+  return {
+    name,
+    category: pick(row, CATEGORY_HEADERS) || inferCategory(name),
+    quantity: quantity.value,
+    unit: unit ? normalizeUnit(unit) : quantity.unit,
+    revitId: pick(row, REVIT_ID_HEADERS),
+    properties: original,
+    bimMetadata: { source: 'import-bim', sourceFile: filename, row: rowNumber },
+    projectId: project.id,
+    createdBy: user.id
+  };
+};
+
 /**
  * @swagger
  * /api/projects/{id}/import-bim:
  *   post:
- *     summary: Import BIM data from CSV
+ *     summary: Import BIM takeoff rows from CSV as project elements
+ *     description: |
+ *       The CSV is parsed row by row and every row is stored as an element of the project,
+ *       in batches of CSV_IMPORT_BATCH_SIZE rows per transaction. Quantities such as "45 m²"
+ *       are split into value and normalized unit. Project costs, quantity, location and work
+ *       type are taken from the first row (material_cost, labor_cost, quantity, location, work_type).
+ *       Send "Accept: application/x-ndjson" to receive a progress line after every batch.
  *     tags: [Projects]
  *     security:
  *       - bearerAuth: []
@@ -295,6 +350,16 @@ router.put('/:id', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), async (req, r
  *     requestBody:
  *       required: true
  *       content:
+ *         multipart/form-data:
+ *           schema:
+ *             type: object
+ *             properties:
+ *               file:
+ *                 type: string
+ *                 format: binary
+ *         text/csv:
+ *           schema:
+ *             type: string
  *         application/json:
  *           schema:
  *             type: object
@@ -305,20 +370,13 @@ router.put('/:id', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), async (req, r
  *     responses:
  *       200:
  *         description: BIM data imported successfully
+ *       400:
+ *         description: No CSV content
+ *       413:
+ *         description: CSV file larger than CSV_UPLOAD_LIMIT
  */
 router.post('/:id/import-bim', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), async (req, res) => {
   try {
-    const { csvContent } = req.body;
-
-    if (!csvContent) {
-      return res.status(400).json({
-        error: {
-          message: 'CSV content required',
-          status: 400
-        }
-      });
-    }
-
     const project = await Project.findByPk(req.params.id, {
       include: [{ model: GeneralContractor }]
     });
@@ -342,48 +400,51 @@ router.post('/:id/import-bim', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), a
       });
     }
 
-    // Parse CSV
-    const parsedData = Papa.parse(csvContent, {
-      header: true,
-      dynamicTyping: true,
-      skipEmptyLines: true
-    });
-
-    if (parsedData.errors.length > 0) {
-      return res.status(400).json({
-        error: {
-          message: 'CSV parsing error',
-          details: parsedData.errors
-        }
+    const { rows, filename } = await csvRows(req);
+    const toElement = takeoffElement(project, req.user, filename);
+    let firstRow = null;
+
+    await respondWithProgress(req, res, async (onProgress) => {
+      const result = await ingestRows(db.sequelize, rows, {
+        toRecord: (row, rowNumber, original) => {
+          if (!firstRow) firstRow = original;
+          return toElement(row, rowNumber, original);
+        },
+        insertBatch: (elements, transaction) => Element.bulkCreate(elements, { transaction }),
+        onProgress
       });
-    }
 
-    // Process parsed data and update project
-    const firstRow = parsedData.data[0];
-    if (firstRow) {
-      const updates = {};
-      if (firstRow.material_cost) updates.materialUnitCost = firstRow.material_cost;
-      if (firstRow.labor_cost) updates.laborUnitCost = firstRow.labor_cost;
-      if (firstRow.quantity) updates.totalQuantity = firstRow.quantity;
-      if (firstRow.location) updates.location = firstRow.location;
-      if (firstRow.work_type) updates.workType = firstRow.work_type;
-
-      await project.update(updates);
-    }
+      // Process parsed data and update project
+      if (firstRow) {
+        const updates = {};
+        if (firstRow.material_cost) updates.materialUnitCost = parseNumber(firstRow.material_cost);
+        if (firstRow.labor_cost) updates.laborUnitCost = parseNumber(firstRow.labor_cost);
+        if (firstRow.quantity) updates.totalQuantity = splitQuantity(firstRow.quantity).value;
+        if (firstRow.location) updates.location = firstRow.location;
+        if (firstRow.work_type) updates.workType = firstRow.work_type;
 
-    logger.info(`BIM data imported for project: ${project.id}`);
+        await project.update(updates);
+      }
 
-    res.json({
-      message: 'BIM data imported successfully',
-      rowsProcessed: parsedData.data.length,
-      data: project
+      logger.info(`BIM data imported for project: ${project.id} (${result.rowsInserted} elements)`);
+
+      return {
+        message: 'BIM data imported successfully',
+        ...result,
+        elementsCreated: result.rowsInserted,
+        data: project
+      };
     });
   } catch (error) {
     logger.error('Import BIM error:', error);
-    res.status(500).json({
+    if (res.headersSent) {
+      return res.end();
+    }
+    const status = error instanceof CsvImportError ? error.status : 500;
+    res.status(status).json({
       error: {
-        message: 'Failed to import BIM data',
-        status: 500
+        message: error instanceof CsvImportError ? error.message : 'Failed to import BIM data',
+        status
       }
     });
   }
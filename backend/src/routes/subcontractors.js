@@ -4,6 +4,10 @@ const { body, validationResult } = require('express-validator');
 const db = require('../models');
 const logger = require('../utils/logger');
 const { auth, authorize } = require('../middleware/auth');
+const { conditional, conditionalRow } = require('../middleware/conditional');
+const {
+  CsvImportError, csvRows, ingestRows, respondWithProgress, pick, parseRatePerSqm, parseAreaSqm
+} = require('../utils/csvIngest');
 
 const Subcontractor = db.Subcontractor;
 const SubcontractorData = db.SubcontractorData;
@@ -102,8 +106,10 @@ router.post('/', auth, authorize('SUBCONTRACTOR', 'ADMIN'), [
  *     responses:
  *       200:
  *         description: List of Subcontractors
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  */
-router.get('/', async (req, res) => {
+router.get('/', conditional(Subcontractor, User), async (req, res) => {
   try {
     const { limit = 10, offset = 0 } = req.query;
 
@@ -146,10 +152,16 @@ router.get('/', async (req, res) => {
  *     responses:
  *       200:
  *         description: Subcontractor found
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  *       404:
  *         description: Subcontractor not found
  */
-router.get('/:id', async (req, res) => {
+router.get('/:id', conditionalRow(
+  Subcontractor,
+  [{ model: User }, { model: SubcontractorData }],
+  [TrustFactor, req => ({ subcontractorId: req.params.id })]
+), async (req, res) => {
   try {
     const sc = await Subcontractor.findByPk(req.params.id, {
       include: [
@@ -355,6 +367,152 @@ router.post('/:id/availability', auth, authorize('SUBCONTRACTOR', 'ADMIN'), [
   }
 });
 
+// Header keys (see csvIngest.headerKey) of availability columns, in order of preference
+const AVAILABILITY_HEADERS = {
+  availabilityFrom: ['availabilityfrom', 'availablefrom', 'from', 'startdate', 'start'],
+  availabilityTo: ['availabilityto', 'availableto', 'to', 'enddate', 'end'],
+  location: ['location', 'city', 'region'],
+  workType: ['worktype', 'trade', 'type'],
+  materialCostPerSqm: ['materialcostpersqm', 'materialcost', 'material'],
+  laborCostPerSqm: ['laborcostpersqm', 'laborcost', 'labourcost', 'labor', 'labour'],
+  maximumCapacity: ['maximumcapacity', 'capacity', 'maxcapacity'],
+  specialization: ['specialization', 'specialty'],
+  notes: ['notes', 'comments']
+};
+
+const parseDate = (cell) => {
+  const date = cell ? new Date(cell) : null;
+  return date && !isNaN(date) ? date : null;
+};
+
+/**
+ * Convert an availability row to SubcontractorData, or the reason the row is skipped
+ * Rates per ft² and capacities in ft² are converted to m².
+ */
+const availabilityRecord = (subcontractorId) => (row) => {
+  const cell = field => pick(row, AVAILABILITY_HEADERS[field]);
+
+  const availabilityFrom = parseDate(cell('availabilityFrom'));
+  const availabilityTo = parseDate(cell('availabilityTo'));
+  if (!availabilityFrom || !availabilityTo) return 'missing or invalid availability dates';
+
+  const location = cell('location');
+  const workType = cell('workType');
+  if (!location || !workType) return 'missing location or work type';
+
+  const materialCostPerSqm = parseRatePerSqm(cell('materialCostPerSqm'));
+  const laborCostPerSqm = parseRatePerSqm(cell('laborCostPerSqm'));
+  if (materialCostPerSqm === null || laborCostPerSqm === null) return 'missing or non-numeric costs';
+
+  const maximumCapacity = parseAreaSqm(cell('maximumCapacity'));
+  return {
+    subcontractorId,
+    availabilityFrom,
+    availabilityTo,
+    location,
+    workType,
+    materialCostPerSqm: Math.round(materialCostPerSqm * 100) / 100,
+    laborCostPerSqm: Math.round(laborCostPerSqm * 100) / 100,
+    maximumCapacity: maximumCapacity === null ? null : Math.round(maximumCapacity * 100) / 100,
+    specialization: (cell('specialization') || '').split(/[;,]/).map(item => item.trim()).filter(Boolean),
+    notes: cell('notes')
+  };
+};
+
+/**
+ * @swagger
+ * /api/sc/{id}/availability/import:
+ *   post:
+ *     summary: Import availability and rates from CSV
+ *     description: |
+ *       One availability record per row (availability_from, availability_to, location, work_type,
+ *       material_cost_per_sqm, labor_cost_per_sqm, maximum_capacity). Costs like "$1.10 / ft²" and
+ *       capacities like "5,000 SF" are converted to m². Rows are inserted in batched transactions;
+ *       send "Accept: application/x-ndjson" to receive a progress line after every batch.
+ *     tags: [Subcontractors]
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - in: path
+ *         name: id
+ *         schema:
+ *           type: string
+ *         required: true
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         multipart/form-data:
+ *           schema:
+ *             type: object
+ *             properties:
+ *               file:
+ *                 type: string
+ *                 format: binary
+ *         text/csv:
+ *           schema:
+ *             type: string
+ *     responses:
+ *       200:
+ *         description: Availability data imported
+ *       400:
+ *         description: No CSV content
+ *       413:
+ *         description: CSV file larger than CSV_UPLOAD_LIMIT
+ */
+router.post('/:id/availability/import', auth, authorize('SUBCONTRACTOR', 'ADMIN'), async (req, res) => {
+  try {
+    const sc = await Subcontractor.findByPk(req.params.id);
+
+    if (!sc) {
+      return res.status(404).json({
+        error: {
+          message: 'Subcontractor not found',
+          status: 404
+        }
+      });
+    }
+
+    // Check authorization
+    if (sc.userId !== req.user.id && req.user.role !== 'ADMIN') {
+      return res.status(403).json({
+        error: {
+          message: 'Not authorized to add availability data',
+          status: 403
+        }
+      });
+    }
+
+    const { rows } = await csvRows(req);
+
+    await respondWithProgress(req, res, async (onProgress) => {
+      const result = await ingestRows(sequelize, rows, {
+        toRecord: availabilityRecord(sc.id),
+        insertBatch: (records, transaction) => SubcontractorData.bulkCreate(records, { transaction }),
+        onProgress
+      });
+
+      logger.info(`Subcontractor availability imported: ${sc.id} (${result.rowsInserted} rows)`);
+
+      return {
+        message: 'Availability data imported successfully',
+        ...result
+      };
+    });
+  } catch (error) {
+    logger.error('Import availability error:', error);
+    if (res.headersSent) {
+      return res.end();
+    }
+    const status = error instanceof CsvImportError ? error.status : 500;
+    res.status(status).json({
+      error: {
+        message: error instanceof CsvImportError ? error.message : 'Failed to import availability data',
+        status
+      }
+    });
+  }
+});
+
 /**
  * @swagger
  * /api/sc/{id}/trust-score:
@@ -370,8 +528,10 @@ router.post('/:id/availability', auth, authorize('SUBCONTRACTOR', 'ADMIN'), [
  *     responses:
  *       200:
  *         description: Trust score retrieved
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  */
-router.get('/:id/trust-score', async (req, res) => {
+router.get('/:id/trust-score', conditional([TrustFactor, req => ({ subcontractorId: req.params.id })]), async (req, res) => {
   try {
     const trustFactors = await TrustFactor.findAll({
       where: { subcontractorId: req.params.id }
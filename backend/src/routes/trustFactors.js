@@ -4,6 +4,7 @@ const { body, validationResult } = require('express-validator');
 const db = require('../models');
 const logger = require('../utils/logger');
 const { auth, authorize } = require('../middleware/auth');
+const { conditional, conditionalRow } = require('../middleware/conditional');
 
 const TrustFactor = db.TrustFactor;
 const Subcontractor = db.Subcontractor;
@@ -162,10 +163,12 @@ router.post('/', auth, authorize('GENERAL_CONTRACTOR', 'ADMIN'), [
  *     responses:
  *       200:
  *         description: Trust factor found
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  *       404:
  *         description: Trust factor not found
  */
-router.get('/:id', async (req, res) => {
+router.get('/:id', conditionalRow(TrustFactor, [{ model: Subcontractor }, { model: GeneralContractor }]), async (req, res) => {
   try {
     const trustFactor = await TrustFactor.findByPk(req.params.id, {
       include: [
@@ -213,8 +216,10 @@ router.get('/:id', async (req, res) => {
  *     responses:
  *       200:
  *         description: List of trust factors
+ *       304:
+ *         description: Not modified (If-None-Match / If-Modified-Since)
  */
-router.get('/subcontractor/:scId', async (req, res) => {
+router.get('/subcontractor/:scId', conditional([TrustFactor, req => ({ subcontractorId: req.params.scId })], GeneralContractor), async (req, res) => {
   try {
     const trustFactors = await TrustFactor.findAll({
       where: { subcontractorId: req.params.scId },
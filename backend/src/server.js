@@ -5,6 +5,9 @@ const morgan = require('morgan');
 require('dotenv').config();
 const db = require('./models');
 const logger = require('./utils/logger');
+const { readConsistency } = require('./utils/readRouting');
+const { metrics, metricsEndpoint } = require('./middleware/metrics');
+const { isPartitioned, ensurePartitions } = require('./utils/elementPartitions');
 const swaggerUi = require('swagger-ui-express');
 const swaggerSpec = require('./utils/swagger');
 
@@ -12,10 +15,17 @@ const app = express();
 
 // Middleware
 app.use(helmet());
+app.use(metrics);
 app.use(morgan('combined', { stream: { write: message => logger.info(message.trim()) } }));
 app.use(cors());
-app.use(express.json());
+// Batch uploads from the Revit extension send up to 500 elements per request
+app.use(express.json({ limit: process.env.JSON_BODY_LIMIT || '10mb' }));
 app.use(express.urlencoded({ extended: true }));
+// Reads after a write by the same user go to the primary, not a lagging replica
+app.use(readConsistency);
+
+// Prometheus metrics
+app.get('/metrics', metricsEndpoint);
 
 // API Documentation
 app.use('/api/docs', swaggerUi.serve, swaggerUi.setup(swaggerSpec));
@@ -49,8 +59,23 @@ app.use((err, req, res, next) => {
 // Database sync and server start
 const PORT = process.env.PORT || 5000;
 
-db.sequelize.sync({ alter: true }).then(() => {
+// Check daily that the coming months have elements partitions
+const PARTITION_CHECK_INTERVAL = 24 * 60 * 60 * 1000;
+
+const maintainElementPartitions = async () => {
+  try {
+    if (await isPartitioned(db.sequelize)) {
+      await ensurePartitions(db.sequelize);
+    }
+  } catch (error) {
+    logger.error('Element partition maintenance error:', error);
+  }
+};
+
+db.sequelize.sync({ alter: true }).then(async () => {
   logger.info('Database synced successfully');
+  await maintainElementPartitions();
+  setInterval(maintainElementPartitions, PARTITION_CHECK_INTERVAL).unref();
   app.listen(PORT, () => {
     logger.info(`Server running on port ${PORT}`);
     logger.info(`API Documentation: http://localhost:${PORT}/api/docs`);
@@ -12,6 +12,7 @@ import rateLimit from 'express-rate-limit';
 import { connectDatabase, sequelize } from './config/database';
 import { config } from './config/auth';
 import { errorHandler } from './api/middleware/error.middleware';
+import { metrics, metricsEndpoint } from './api/middleware/metrics.middleware';
 import { initializeUser } from './models/User';
 import { initializeElement } from './models/Element';
 import { initializePricing } from './models/Pricing';
@@ -30,9 +31,10 @@ const PORT = process.env.PORT || 3001;
 
 // Middleware
 app.use(helmet()); // Security headers
+app.use(metrics); // Route latency, payload size and DB query metrics
 app.use(cors({ origin: config.cors.origin, credentials: true })); // CORS
 app.use(morgan('dev')); // Logging
-app.use(express.json()); // JSON body parser
+app.use(express.json({ limit: process.env.JSON_BODY_LIMIT || '10mb' })); // JSON body parser (element batches can be large)
 app.use(express.urlencoded({ extended: true }));
 
 // Rate limiting for auth endpoints
@@ -47,6 +49,8 @@ app.get('/health', (req, res) => {
     res.json({ status: 'ok', timestamp: new Date().toISOString() });
 });
 
+app.get('/metrics', metricsEndpoint); // Prometheus scrape endpoint
+
 app.use('/api/auth', authLimiter, authRoutes);
 app.use('/api/elements', elementRoutes);
 
@@ -0,0 +1,224 @@
+import { Element } from '@common/types/element.types';
+import { OpenAIService } from './openai.service';
+
+export type ClassifiableElement = Pick<Element, 'name'> & Partial<Pick<Element, 'category' | 'properties' | 'bimMetadata'>>;
+
+export interface ClassificationStats {
+    total: number;
+    rules: number;
+    cache: number;
+    model: number;
+    uncategorized: number;
+    modelCalls: number;
+}
+
+const MAX_CACHE_ENTRIES = 50000;
+const BATCH_SIZE = parseInt(process.env.CLASSIFY_BATCH_SIZE || '100', 10);
+const CONCURRENCY = parseInt(process.env.CLASSIFY_CONCURRENCY || '4', 10);
+
+/**
+ * Revit categories that belong to a single division.
+ * Walls, Floors, Structural Framing etc. depend on the material, so they are left
+ * to the name rules below.
+ */
+const REVIT_CATEGORY_DIVISIONS: Record<string, string> = {
+    'doors': 'Openings',
+    'windows': 'Openings',
+    'curtain panels': 'Openings',
+    'curtain wall mullions': 'Openings',
+    'structural foundations': 'Concrete',
+    'structural rebar': 'Concrete',
+    'roofs': 'Thermal and Moisture Protection',
+    'ceilings': 'Finishes',
+    'casework': 'Furnishings',
+    'furniture': 'Furnishings',
+    'furniture systems': 'Furnishings',
+    'specialty equipment': 'Equipment',
+    'plumbing fixtures': 'Plumbing',
+    'pipes': 'Plumbing',
+    'pipe fittings': 'Plumbing',
+    'pipe accessories': 'Plumbing',
+    'flex pipes': 'Plumbing',
+    'sprinklers': 'Fire Suppression',
+    'ducts': 'HVAC',
+    'duct fittings': 'HVAC',
+    'duct accessories': 'HVAC',
+    'flex ducts': 'HVAC',
+    'air terminals': 'HVAC',
+    'mechanical equipment': 'HVAC',
+    'electrical equipment': 'Electrical',
+    'electrical fixtures': 'Electrical',
+    'lighting fixtures': 'Electrical',
+    'lighting devices': 'Electrical',
+    'conduits': 'Electrical',
+    'conduit fittings': 'Electrical',
+    'cable trays': 'Electrical',
+    'cable tray fittings': 'Electrical',
+    'communication devices': 'Communications',
+    'data devices': 'Communications',
+    'telephone devices': 'Communications',
+    'fire alarm devices': 'Electronic Safety and Security',
+    'security devices': 'Electronic Safety and Security',
+    'nurse call devices': 'Electronic Safety and Security',
+    'topography': 'Earthwork',
+    'parking': 'Exterior Improvements',
+    'planting': 'Exterior Improvements',
+    'hardscape': 'Exterior Improvements',
+    'railings': 'Metals',
+};
+
+/**
+ * Family/type name keywords, most specific first (matched on normalized names)
+ */
+const NAME_RULES: Array<[RegExp, string]> = [
+    [/\b(toilet partition|grab bar|signage|locker|fire extinguisher)/, 'Specialties'],
+    [/\b(curtain wall|storefront|glazing|skylight|door|window|louver)/, 'Openings'],
+    [/\b(elevator|escalator|lift)\b/, 'Conveying Equipment'],
+    [/\b(sprinkler|fire pump|standpipe)/, 'Fire Suppression'],
+    [/\b(fire alarm|smoke detector|security|access control|cctv)/, 'Electronic Safety and Security'],
+    [/\b(data|telephone|communication|network|wifi)\b/, 'Communications'],
+    [/\b(duct|diffuser|grille|air terminal|ahu|vav|fan coil|hvac|chiller|boiler)/, 'HVAC'],
+    [/\b(pipe|plumbing|lavatory|sink|water closet|urinal|toilet|drain|faucet|water heater)/, 'Plumbing'],
+    [/\b(conduit|cable tray|light fixture|lighting|luminaire|receptacle|switch|panelboard|electrical|transformer)/, 'Electrical'],
+    [/\b(insulation|membrane|waterproof|vapor barrier|roofing|flashing|sealant)/, 'Thermal and Moisture Protection'],
+    [/\b(gypsum|gyp|gwb|drywall|plaster|paint|tile|carpet|vinyl|terrazzo|acoustic|ceiling)/, 'Finishes'],
+    [/\b(casework|cabinet|furniture|desk|shelving|countertop)/, 'Furnishings'],
+    [/\b(cmu|concrete block|masonry|brick|stone veneer)/, 'Masonry'],
+    [/\b(concrete|cast in place|precast|rebar|slab on grade|footing)/, 'Concrete'],
+    [/\b(steel|metal deck|metal stud|joist|w shape|hss|railing|handrail)/, 'Metals'],
+    [/\b(wood|timber|plywood|glulam|clt|lumber|millwork)/, 'Wood, Plastics, and Composites'],
+    [/\b(excavation|grading|backfill|topography|earthwork)/, 'Earthwork'],
+    [/\b(paving|asphalt|curb|sidewalk|planting|landscape|fence|parking)/, 'Exterior Improvements'],
+    [/\b(site utility|manhole|storm sewer|sanitary sewer|water main)/, 'Utilities'],
+];
+
+const norm = (text?: string | null) => (text || '').toLowerCase().split(/\s+/).filter(Boolean).join(' ');
+
+/**
+ * Normalize a family/type name for rules and the cache: lower case, sizes and
+ * dimensions replaced by '#', so "Generic - 200mm" and "Generic - 300mm" share an entry
+ */
+export const normalizeName = (text?: string | null) =>
+    (text || '')
+        .toLowerCase()
+        .replace(/\d+(?:[.,]\d+)?(?:\s*(?:mm|cm|m|in|ft)\b|["'])?/g, '#')
+        .replace(/[^a-z#]+/g, ' ')
+        .trim();
+
+const describe = (element: ClassifiableElement) => {
+    const properties = element.properties || {};
+    const metadata: NonNullable<Element['bimMetadata']> = element.bimMetadata || {};
+    return [element.name, metadata.familyName, metadata.typeName, properties['Family and Type']]
+        .filter(Boolean)
+        .join(' ');
+};
+
+/**
+ * Classification service - maps elements to MasterFormat divisions from Revit
+ * categories and name rules, remembers answers by normalized name, and sends only
+ * the rest to OpenAI, many names per prompt.
+ */
+export class ClassificationService {
+    private static cache = new Map<string, string>();
+
+    /**
+     * Classify from the Revit category and name rules; null when unresolved
+     */
+    static classifyLocally(element: ClassifiableElement): string | null {
+        const division = REVIT_CATEGORY_DIVISIONS[norm(element.category)];
+        if (division) return division;
+
+        const name = normalizeName(describe(element));
+        for (const [pattern, ruleDivision] of NAME_RULES) {
+            if (pattern.test(name)) return ruleDivision;
+        }
+        return null;
+    }
+
+    private static remember(key: string, division: string) {
+        if (this.cache.size >= MAX_CACHE_ENTRIES) {
+            // Maps iterate in insertion order, so this drops the oldest entry
+            this.cache.delete(this.cache.keys().next().value as string);
+        }
+        this.cache.set(key, division);
+    }
+
+    static clearCache() {
+        this.cache.clear();
+    }
+
+    /**
+     * Classify elements; returns one division per element, in order.
+     * Each distinct unresolved name is sent to the model once.
+     */
+    static async classifyBatch(elements: ClassifiableElement[]): Promise<{ categories: string[]; stats: ClassificationStats }> {
+        const stats: ClassificationStats = {
+            total: elements.length, rules: 0, cache: 0, model: 0, uncategorized: 0, modelCalls: 0,
+        };
+        const categories: string[] = new Array(elements.length);
+        const pending = new Map<string, { element: ClassifiableElement; indexes: number[] }>();
+
+        elements.forEach((element, index) => {
+            const key = `${norm(element.category)}|${normalizeName(describe(element))}`;
+            const cached = this.cache.get(key);
+            if (cached) {
+                categories[index] = cached;
+                stats.cache += 1;
+                return;
+            }
+
+            const local = this.classifyLocally(element);
+            if (local) {
+                this.remember(key, local);
+                categories[index] = local;
+                stats.rules += 1;
+                return;
+            }
+
+            const entry = pending.get(key);
+            if (entry) {
+                entry.indexes.push(index);
+            } else {
+                pending.set(key, { element, indexes: [index] });
+            }
+        });
+
+        const keys = [...pending.keys()];
+        const batches: string[][] = [];
+        if (process.env.OPENAI_API_KEY) {
+            for (let i = 0; i < keys.length; i += BATCH_SIZE) {
+                batches.push(keys.slice(i, i + BATCH_SIZE));
+            }
+        }
+
+        // A few prompts in flight at a time
+        let next = 0;
+        const worker = async () => {
+            while (next < batches.length) {
+                const batch = batches[next++];
+                stats.modelCalls += 1;
+                const answers = await OpenAIService.classifyElements(batch.map((key) => {
+                    const { element } = pending.get(key)!;
+                    return { name: describe(element), properties: element.category ? { category: element.category } : undefined };
+                }));
+
+                batch.forEach((key, i) => {
+                    const division = answers[i];
+                    // Failed calls (null) are not cached, so they are retried next time
+                    if (division) this.remember(key, division);
+                    for (const index of pending.get(key)!.indexes) {
+                        categories[index] = division || 'Uncategorized';
+                        stats.model += division ? 1 : 0;
+                    }
+                });
+            }
+        };
+        await Promise.all(Array.from({ length: Math.min(CONCURRENCY, batches.length) }, worker));
+
+        for (let i = 0; i < categories.length; i++) {
+            if (!categories[i]) categories[i] = 'Uncategorized';
+            if (categories[i] === 'Uncategorized') stats.uncategorized += 1;
+        }
+        return { categories, stats };
+    }
+}
@@ -1,6 +1,32 @@
 import { openaiClient, openaiConfig } from '../config/openai';
+import { observeLlmCall } from './metrics.service';
 import { Element, PricingSuggestion } from '@common/types/element.types';
 
+// CSI MasterFormat divisions used for element classification
+export const MASTERFORMAT_DIVISIONS = [
+    'Concrete',
+    'Masonry',
+    'Metals',
+    'Wood, Plastics, and Composites',
+    'Thermal and Moisture Protection',
+    'Openings',
+    'Finishes',
+    'Specialties',
+    'Equipment',
+    'Furnishings',
+    'Special Construction',
+    'Conveying Equipment',
+    'Fire Suppression',
+    'Plumbing',
+    'HVAC',
+    'Electrical',
+    'Communications',
+    'Electronic Safety and Security',
+    'Earthwork',
+    'Exterior Improvements',
+    'Utilities',
+] as const;
+
 /**
  * OpenAI Service for pricing suggestions and AI-powered features
  */
@@ -27,22 +53,24 @@ Respond in JSON format:
   "reasoning": "<brief explanation>"
 }`;
 
-            const response = await openaiClient.chat.completions.create({
-                model: openaiConfig.model,
-                temperature: openaiConfig.temperature,
-                max_tokens: openaiConfig.maxTokens,
-                messages: [
-                    {
-                        role: 'system',
-                        content: 'You are a construction procurement pricing expert. Always respond with valid JSON.',
-                    },
-                    {
-                        role: 'user',
-                        content: prompt,
-                    },
-                ],
-                response_format: { type: 'json_object' },
-            });
+            const response = await observeLlmCall('suggest_pricing', openaiConfig.model, () =>
+                openaiClient.chat.completions.create({
+                    model: openaiConfig.model,
+                    temperature: openaiConfig.temperature,
+                    max_tokens: openaiConfig.maxTokens,
+                    messages: [
+                        {
+                            role: 'system',
+                            content: 'You are a construction procurement pricing expert. Always respond with valid JSON.',
+                        },
+                        {
+                            role: 'user',
+                            content: prompt,
+                        },
+                    ],
+                    response_format: { type: 'json_object' },
+                })
+            );
 
             const content = response.choices[0]?.message?.content;
             if (!content) {
@@ -65,31 +93,80 @@ Respond in JSON format:
 
     /**
      * Classify building element category using AI
+     * For many elements use ClassificationService.classifyBatch, which only sends the
+     * names its rules and cache cannot resolve.
      */
     static async classifyElement(elementName: string, properties?: Record<string, any>): Promise<string> {
+        const [category] = await this.classifyElements([{ name: elementName, properties }]);
+        return category || 'Uncategorized';
+    }
+
+    /**
+     * Classify many elements into MasterFormat divisions with one prompt.
+     * Returns one division per element, in order; 'Uncategorized' when the model gives
+     * no valid answer, null for every element if the call fails.
+     */
+    static async classifyElements(
+        elements: Array<{ name: string; properties?: Record<string, any> }>,
+        divisions: readonly string[] = MASTERFORMAT_DIVISIONS
+    ): Promise<Array<string | null>> {
         try {
-            const prompt = `Classify the following building element into a standard CSI MasterFormat category:
-Element: ${elementName}
-Properties: ${JSON.stringify(properties || {}, null, 2)}
-
-Return only the category name (e.g., "Concrete", "Steel", "HVAC", etc.)`;
-
-            const response = await openaiClient.chat.completions.create({
-                model: openaiConfig.model,
-                temperature: 0.3,
-                max_tokens: 50,
-                messages: [
-                    {
-                        role: 'user',
-                        content: prompt,
-                    },
-                ],
-            });
+            const list = elements
+                .map((element, index) => {
+                    const properties = element.properties && Object.keys(element.properties).length > 0
+                        ? ` (${JSON.stringify(element.properties)})`
+                        : '';
+                    return `${index + 1}. ${element.name}${properties}`;
+                })
+                .join('\n');
+
+            const prompt = `Classify each of the following building elements into one CSI MasterFormat division.
+
+Divisions: ${divisions.join('; ')}
 
-            return response.choices[0]?.message?.content?.trim() || 'Uncategorized';
+Elements:
+${list}
+
+Respond in JSON format, with every element number as a key:
+{
+  "categories": { "1": "<division>", "2": "<division>" }
+}
+Use "Uncategorized" if an element fits no division.`;
+
+            const response = await observeLlmCall('classify_elements', openaiConfig.model, () =>
+                openaiClient.chat.completions.create({
+                    model: openaiConfig.model,
+                    temperature: 0,
+                    // About 10 tokens per answer
+                    max_tokens: Math.min(4096, 50 + elements.length * 12),
+                    messages: [
+                        {
+                            role: 'system',
+                            content: 'You are a construction estimator. Always respond with valid JSON only.',
+                        },
+                        {
+                            role: 'user',
+                            content: prompt,
+                        },
+                    ],
+                    response_format: { type: 'json_object' },
+                })
+            );
+
+            const content = response.choices[0]?.message?.content;
+            if (!content) {
+                throw new Error('No response from OpenAI');
+            }
+
+            const answers = JSON.parse(content).categories || {};
+            const known = new Map(divisions.map(division => [division.toLowerCase(), division]));
+            return elements.map((_, index) => {
+                const answer = String(answers[String(index + 1)] || '').trim().toLowerCase();
+                return known.get(answer) || 'Uncategorized';
+            });
         } catch (error) {
             console.error('OpenAI classification error:', error);
-            return 'Uncategorized';
+            return elements.map(() => null);
         }
     }
 
@@ -142,22 +219,24 @@ Return a JSON array with this exact structure:
 
 Be smart about parsing - if a column seems to be quantity*unit, split it intelligently.`;
 
-            const response = await openaiClient.chat.completions.create({
-                model: openaiConfig.model,
-                temperature: 0.3,
-                max_tokens: 4096,
-                messages: [
-                    {
-                        role: 'system',
-                        content: 'You are a BIM data parsing expert. Always respond with valid JSON only. No additional text.',
-                    },
-                    {
-                        role: 'user',
-                        content: prompt,
-                    },
-                ],
-                response_format: { type: 'json_object' },
-            });
+            const response = await observeLlmCall('parse_schedule', openaiConfig.model, () =>
+                openaiClient.chat.completions.create({
+                    model: openaiConfig.model,
+                    temperature: 0.3,
+                    max_tokens: 4096,
+                    messages: [
+                        {
+                            role: 'system',
+                            content: 'You are a BIM data parsing expert. Always respond with valid JSON only. No additional text.',
+                        },
+                        {
+                            role: 'user',
+                            content: prompt,
+                        },
+                    ],
+                    response_format: { type: 'json_object' },
+                })
+            );
 
             const content = response.choices[0]?.message?.content;
             if (!content) {
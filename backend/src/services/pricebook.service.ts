@@ -0,0 +1,268 @@
+import fs from 'fs';
+import path from 'path';
+import Papa from 'papaparse';
+import { Element, PricingSuggestion } from '@common/types/element.types';
+import { OpenAIService } from './openai.service';
+import takeoff from '../config/takeoff.json';
+
+/**
+ * One type/category/unit entry of the price book.
+ * Same on-disk format as pyrevit-extension/lib/price_book.py, so a book built
+ * offline from takeoff exports can be served by the backend as-is.
+ */
+interface PriceBookEntry {
+    type: string;
+    category: string;
+    unit: string;
+    observations: Array<[number, number, string?]>; // [material, labor] unit costs, plus the source schedule when synced
+}
+
+export interface PriceBookStats {
+    type: string;
+    category: string;
+    unit: string;
+    count: number;
+    min: number;
+    max: number;
+    median: number;
+}
+
+const MAX_OBSERVATIONS = 500;
+
+// Column names, unit spellings and category keywords shared with the JS routes
+// (src/config/takeoff.json; mirrored by the pyRevit takeoff reader)
+const TYPE_HEADERS = takeoff.typeHeaders;
+const QUANTITY_HEADERS = takeoff.quantityHeaders;
+const MATERIAL_COST_HEADERS = takeoff.materialCostHeaders;
+const LABOR_COST_HEADERS = takeoff.laborCostHeaders;
+const UNIT_ALIASES: Record<string, string> = takeoff.unitAliases;
+const CATEGORY_KEYWORDS = takeoff.categoryKeywords as Array<[string, string]>;
+
+const norm = (text?: string | null) => (text || '').toLowerCase().split(/\s+/).filter(Boolean).join(' ');
+const shortType = (type: string) => norm(type).split(': ').pop() as string;
+
+export const normalizeUnit = (unit?: string | null) => {
+    const text = (unit || '').trim();
+    return UNIT_ALIASES[text.toLowerCase()] ?? text;
+};
+
+/**
+ * Split a quantity cell like "45 m²" into { quantity: 45, unit: "m²" }
+ */
+export const splitQuantity = (value: unknown): { quantity: number | null; unit: string } => {
+    const match = /^\s*([-+]?[0-9][0-9,]*(?:\.[0-9]+)?)\s*(.*?)\s*$/.exec(String(value ?? ''));
+    if (!match) {
+        return { quantity: null, unit: '' };
+    }
+    return { quantity: parseFloat(match[1].replace(/,/g, '')), unit: normalizeUnit(match[2]) };
+};
+
+const parseNumber = (value: unknown): number | null => {
+    const text = String(value ?? '').replace(/[$,]/g, '').trim();
+    if (!text) return null;
+    const parsed = Number(text);
+    return Number.isFinite(parsed) ? parsed : null;
+};
+
+const inferCategory = (...names: Array<string | undefined>) => {
+    for (const name of names) {
+        const text = (name || '').toLowerCase();
+        const hit = CATEGORY_KEYWORDS.find(([keyword]) => text.includes(keyword));
+        if (hit) return hit[1];
+    }
+    return undefined;
+};
+
+const median = (sorted: number[]) => {
+    const middle = Math.floor(sorted.length / 2);
+    return sorted.length % 2 ? sorted[middle] : (sorted[middle - 1] + sorted[middle]) / 2;
+};
+
+/**
+ * Price book service - answers pricing for known types from takeoff history
+ * and only falls back to OpenAI for types without history.
+ */
+export class PriceBookService {
+    private static entries = new Map<string, PriceBookEntry>();
+    private static byType = new Map<string, Set<string>>();
+    private static byShortType = new Map<string, Set<string>>();
+    private static stats = new Map<string, PriceBookStats>();
+    private static loaded = false;
+
+    static get storePath() {
+        return process.env.PRICE_BOOK_PATH || path.resolve('data', 'price_book.json');
+    }
+
+    private static makeKey(type: string, category: string, unit: string) {
+        return [norm(type), norm(category), norm(normalizeUnit(unit))].join('|');
+    }
+
+    private static index(key: string, entry: PriceBookEntry) {
+        const add = (map: Map<string, Set<string>>, name: string) => {
+            if (!map.has(name)) map.set(name, new Set());
+            map.get(name)!.add(key);
+        };
+        add(this.byType, norm(entry.type));
+        add(this.byShortType, shortType(entry.type));
+    }
+
+    /**
+     * Load the price book from disk (once)
+     */
+    static load(force = false) {
+        if (this.loaded && !force) return;
+
+        this.entries.clear();
+        this.byType.clear();
+        this.byShortType.clear();
+        this.stats.clear();
+
+        if (fs.existsSync(this.storePath)) {
+            const store = JSON.parse(fs.readFileSync(this.storePath, 'utf-8'));
+            for (const entry of (store.entries || []) as PriceBookEntry[]) {
+                const key = this.makeKey(entry.type, entry.category, entry.unit);
+                this.entries.set(key, entry);
+                this.index(key, entry);
+            }
+        }
+        this.loaded = true;
+    }
+
+    static save() {
+        fs.mkdirSync(path.dirname(this.storePath), { recursive: true });
+        const tempPath = `${this.storePath}.tmp`;
+        fs.writeFileSync(tempPath, JSON.stringify({ version: 1, entries: [...this.entries.values()] }));
+        fs.renameSync(tempPath, this.storePath);
+    }
+
+    static addObservation(type: string, category: string, unit: string, materialCost: number, laborCost: number) {
+        this.load();
+        const key = this.makeKey(type, category, unit);
+        let entry = this.entries.get(key);
+        if (!entry) {
+            entry = { type, category, unit: normalizeUnit(unit), observations: [] };
+            this.entries.set(key, entry);
+            this.index(key, entry);
+        }
+        entry.observations.push([materialCost || 0, laborCost || 0]);
+        if (entry.observations.length > MAX_OBSERVATIONS) {
+            entry.observations.splice(0, entry.observations.length - MAX_OBSERVATIONS);
+        }
+        this.stats.delete(key);
+    }
+
+    /**
+     * Ingest a takeoff cost export (e.g. "Wall Quantity Takeoffs & Cost Estimates")
+     * Returns the number of priced rows added.
+     */
+    static importTakeoffCsv(csvContent: string): number {
+        const rows = Papa.parse<string[]>(csvContent.replace(/^\uFEFF/, ''), { skipEmptyLines: true }).data;
+
+        // Title line(s) come before the first row with several filled cells
+        const headerIndex = rows.findIndex(row => row.filter(cell => String(cell).trim()).length >= 2);
+        if (headerIndex < 0) return 0;
+
+        const scheduleName = headerIndex > 0 ? String(rows[0][0] || '') : '';
+        const headers = rows[headerIndex].map(h => String(h).trim().toLowerCase());
+        const column = (candidates: string[]) => {
+            const name = candidates.find(candidate => headers.includes(candidate));
+            return name === undefined ? -1 : headers.indexOf(name);
+        };
+        const typeCol = column(TYPE_HEADERS);
+        const qtyCol = column(QUANTITY_HEADERS);
+        const materialCol = column(MATERIAL_COST_HEADERS);
+        const laborCol = column(LABOR_COST_HEADERS);
+
+        if (typeCol < 0 || (materialCol < 0 && laborCol < 0)) return 0;
+
+        let count = 0;
+        for (const row of rows.slice(headerIndex + 1)) {
+            const type = String(row[typeCol] || '').trim();
+            // Group headers and totals leave the type column empty
+            if (!type) continue;
+
+            const { quantity, unit } = qtyCol >= 0 ? splitQuantity(row[qtyCol]) : { quantity: 1, unit: 'Each' };
+            const materialCost = materialCol >= 0 ? parseNumber(row[materialCol]) : null;
+            const laborCost = laborCol >= 0 ? parseNumber(row[laborCol]) : null;
+            if (quantity === null || (materialCost === null && laborCost === null)) continue;
+
+            const category = inferCategory(type, scheduleName) || 'Uncategorized';
+            this.addObservation(type, category, unit, materialCost || 0, laborCost || 0);
+            count++;
+        }
+        return count;
+    }
+
+    private static getStats(key: string): PriceBookStats {
+        let stats = this.stats.get(key);
+        if (!stats) {
+            const entry = this.entries.get(key)!;
+            const totals = entry.observations.map(([m, l]) => m + l).sort((a, b) => a - b);
+            stats = {
+                type: entry.type,
+                category: entry.category,
+                unit: entry.unit,
+                count: totals.length,
+                min: totals[0],
+                max: totals[totals.length - 1],
+                median: median(totals),
+            };
+            this.stats.set(key, stats);
+        }
+        return stats;
+    }
+
+    /**
+     * Find unit cost statistics for a type: exact type/category/unit first,
+     * then any category, then the short type name of "Family: Type".
+     */
+    static lookup(type?: string, category?: string, unit?: string): PriceBookStats | null {
+        this.load();
+        if (!type) return null;
+
+        if (category && unit) {
+            const key = this.makeKey(type, category, unit);
+            if (this.entries.has(key)) return this.getStats(key);
+        }
+
+        const unitKey = unit ? norm(normalizeUnit(unit)) : null;
+        const candidates = this.byType.get(norm(type)) || this.byShortType.get(shortType(type)) || new Set<string>();
+        const matches = [...candidates].filter(key => unitKey === null || key.split('|')[2] === unitKey);
+        if (matches.length === 0) return null;
+
+        // Prefer the entry with the most history
+        matches.sort((a, b) => this.entries.get(b)!.observations.length - this.entries.get(a)!.observations.length);
+        return this.getStats(matches[0]);
+    }
+
+    static lookupElement(element: Partial<Element>): PriceBookStats | null {
+        const properties = element.properties || {};
+        const category = element.category || inferCategory(element.name);
+        for (const type of [properties['Family and Type'], properties['Type'], element.name]) {
+            const stats = this.lookup(type, category, element.unit);
+            if (stats) return stats;
+        }
+        return null;
+    }
+
+    /**
+     * Suggest pricing from history; OpenAI is only called for types without history
+     */
+    static async suggestPricing(element: Partial<Element>): Promise<PricingSuggestion & { source: string }> {
+        const stats = this.lookupElement(element);
+        if (!stats) {
+            const suggestion = await OpenAIService.suggestPricing(element);
+            return { ...suggestion, source: 'openai' };
+        }
+
+        const quantity = Number(element.quantity) || 1;
+        const round = (value: number) => Math.round(value * quantity * 100) / 100;
+        return {
+            suggestedPrice: round(stats.median),
+            priceRange: { min: round(stats.min), max: round(stats.max) },
+            confidence: Math.min(0.95, 0.5 + 0.05 * stats.count),
+            reasoning: `Based on ${stats.count} historical takeoff rows for ${stats.type} (median ${stats.median.toFixed(2)} per ${stats.unit})`,
+            source: 'price_book',
+        };
+    }
+}
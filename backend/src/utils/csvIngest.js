@@ -0,0 +1,284 @@
+const { Readable, Transform } = require('stream');
+const Busboy = require('busboy');
+const Papa = require('papaparse');
+const logger = require('./logger');
+// Spellings of the same unit found in takeoff exports (shared with the price book service)
+const { unitAliases: UNIT_ALIASES } = require('../config/takeoff.json');
+
+/**
+ * Streaming CSV ingestion: rows are parsed one at a time from a multipart upload, a
+ * text/csv body or a JSON csvContent field, converted to records and bulk inserted in
+ * batches, each in its own transaction. Parsing waits while a batch is written, so
+ * memory stays flat however large the upload is.
+ */
+
+const BATCH_SIZE = parseInt(process.env.CSV_IMPORT_BATCH_SIZE || '1000', 10);
+const MAX_UPLOAD_BYTES = parseInt(process.env.CSV_UPLOAD_LIMIT || String(1024 * 1024 * 1024), 10);
+
+// Skipped rows listed in the import result
+const MAX_REPORTED_SKIPS = 20;
+
+const SQFT_PER_SQM = 10.7639;
+
+const QUANTITY_PATTERN = /^\s*([-+]?[0-9][0-9,]*(?:\.[0-9]+)?)\s*(.*?)\s*$/;
+
+class CsvImportError extends Error {
+  constructor(message, status = 400) {
+    super(message);
+    this.status = status;
+  }
+}
+
+const normalizeUnit = (unit) => {
+  const text = String(unit == null ? '' : unit).trim();
+  return UNIT_ALIASES[text.toLowerCase()] || text;
+};
+
+/**
+ * Split a quantity cell like "45 m²" or "1,935.84 SF" into { value: 45, unit: 'm²' }
+ */
+const splitQuantity = (cell) => {
+  const match = QUANTITY_PATTERN.exec(String(cell == null ? '' : cell));
+  if (!match) return { value: null, unit: '' };
+  return { value: parseFloat(match[1].replace(/,/g, '')), unit: normalizeUnit(match[2]) };
+};
+
+/**
+ * Parse an amount such as "$4.00" or "1,200"; null if not numeric
+ */
+const parseNumber = (cell) => {
+  const text = String(cell == null ? '' : cell).replace(/[$,]/g, '').trim();
+  if (!text) return null;
+  const value = Number(text);
+  return Number.isFinite(value) ? value : null;
+};
+
+/**
+ * Parse a rate per area, e.g. "$12.50 / ft²" or "4.2 per sqft", converted to per m²
+ */
+const parseRatePerSqm = (cell) => {
+  const [amount, per = ''] = String(cell == null ? '' : cell).split(/\/|\bper\b/i);
+  const value = parseNumber(amount);
+  if (value === null) return null;
+  return normalizeUnit(per) === 'ft²' ? value * SQFT_PER_SQM : value;
+};
+
+/**
+ * Parse an area such as "500 m²" or "5,000 SF", converted to m²
+ */
+const parseAreaSqm = (cell) => {
+  const { value, unit } = splitQuantity(cell);
+  if (value === null) return null;
+  return unit === 'ft²' ? value / SQFT_PER_SQM : value;
+};
+
+// Headers are matched case and punctuation insensitive: "Work Type", "work_type", "workType"
+const headerKey = (header) => String(header).toLowerCase().replace(/[^a-z0-9]/g, '');
+
+/**
+ * Get the first non-empty cell of a row among candidate headers (given as header keys)
+ */
+const pick = (row, candidates) => {
+  for (const key of candidates) {
+    const value = row[key];
+    if (value !== undefined && value !== null && String(value).trim() !== '') {
+      return String(value).trim();
+    }
+  }
+  return null;
+};
+
+/**
+ * Re-key a parsed row by headerKey, keeping the original headers for properties
+ */
+const keyRow = (row) => {
+  const keyed = {};
+  for (const [header, value] of Object.entries(row)) {
+    keyed[headerKey(header)] = value;
+  }
+  return keyed;
+};
+
+/**
+ * Key parsed rows (cell arrays) by the header row. Takeoff exports start with a schedule
+ * title line ("2. Wall Quantity Takeoffs & Cost Estimates,,,"), so like the pyRevit takeoff
+ * reader and the price book import, the header is the first row with two or more cells;
+ * rows before it are skipped.
+ */
+const keyByHeader = () => {
+  let headers = null;
+  return new Transform({
+    objectMode: true,
+    transform(cells, encoding, done) {
+      if (!headers) {
+        const names = cells.map(cell => String(cell).replace(/^\uFEFF/, '').trim());
+        if (names.filter(Boolean).length >= 2) headers = names;
+        return done();
+      }
+      const row = {};
+      headers.forEach((header, i) => {
+        if (header) row[header] = cells[i] === undefined ? '' : cells[i];
+      });
+      done(null, row);
+    }
+  });
+};
+
+/**
+ * Parse CSV text from a stream into row objects keyed by header
+ */
+const csvParser = (source) => {
+  const rows = keyByHeader();
+  const parser = Papa.parse(Papa.NODE_STREAM_INPUT, { skipEmptyLines: 'greedy' });
+  parser.on('error', error => rows.destroy(error));
+  source.pipe(parser).pipe(rows);
+  return rows;
+};
+
+/**
+ * End the row stream with an error when the client goes away mid-upload, so the import
+ * stops instead of waiting for rows that never come
+ */
+const failOnAbort = (req, rows) => {
+  const abort = () => {
+    if (!req.complete && !rows.destroyed) {
+      rows.destroy(new CsvImportError('Upload aborted'));
+    }
+  };
+  req.on('aborted', abort);
+  req.on('close', abort);
+};
+
+/**
+ * Get a stream of parsed CSV rows (objects keyed by header) from a request.
+ * Accepts multipart/form-data (first file field), a text/csv body or JSON { csvContent }.
+ * Resolves with { rows, filename }.
+ */
+const csvRows = (req) => new Promise((resolve, reject) => {
+  if (req.is('multipart/form-data')) {
+    let busboy;
+    try {
+      busboy = Busboy({ headers: req.headers, limits: { files: 1, fileSize: MAX_UPLOAD_BYTES } });
+    } catch (error) {
+      return reject(new CsvImportError(error.message));
+    }
+
+    let rows = null;
+    busboy.on('file', (field, file, info) => {
+      rows = csvParser(file);
+      file.on('limit', () => rows.destroy(new CsvImportError('CSV file too large', 413)));
+      failOnAbort(req, rows);
+      resolve({ rows, filename: info.filename });
+    });
+    // Once the rows are handed out, failures have to end the row stream
+    busboy.on('error', (error) => {
+      const failure = new CsvImportError(error.message);
+      if (rows) {
+        rows.destroy(failure);
+      } else {
+        reject(failure);
+      }
+    });
+    busboy.on('close', () => {
+      if (!rows) reject(new CsvImportError('CSV file required'));
+    });
+    req.pipe(busboy);
+  } else if (req.is('text/csv')) {
+    const rows = csvParser(req);
+    failOnAbort(req, rows);
+    resolve({ rows, filename: null });
+  } else if (req.body && req.body.csvContent) {
+    resolve({ rows: csvParser(Readable.from([req.body.csvContent])), filename: null });
+  } else {
+    reject(new CsvImportError('CSV content required'));
+  }
+});
+
+/**
+ * Convert and insert rows in batches.
+ * toRecord(row, rowNumber) returns a record, or a string with the reason to skip the row.
+ * insertBatch(records, transaction) writes one batch; onProgress(result) runs after each.
+ * Returns { rowsProcessed, rowsInserted, rowsSkipped, skipped: [{ row, reason }] }.
+ */
+const ingestRows = async (sequelize, rows, { toRecord, insertBatch, onProgress, batchSize = BATCH_SIZE }) => {
+  const result = { rowsProcessed: 0, rowsInserted: 0, rowsSkipped: 0, skipped: [] };
+  let batch = [];
+  let batchStart = 1;
+
+  const flush = async () => {
+    if (batch.length === 0) return;
+    const records = batch;
+    batch = [];
+    try {
+      await sequelize.transaction(transaction => insertBatch(records, transaction));
+    } catch (error) {
+      logger.error('CSV import batch error:', error);
+      // Earlier batches are committed; the message tells the client where to resume
+      throw new CsvImportError(
+        `Failed to import rows ${batchStart}-${result.rowsProcessed} (${result.rowsInserted} earlier rows were imported)`, 500);
+    }
+    batchStart = result.rowsProcessed + 1;
+    result.rowsInserted += records.length;
+    if (onProgress) onProgress(result);
+  };
+
+  for await (const row of rows) {
+    result.rowsProcessed += 1;
+    const record = toRecord(keyRow(row), result.rowsProcessed, row);
+    if (typeof record === 'string') {
+      result.rowsSkipped += 1;
+      if (result.skipped.length < MAX_REPORTED_SKIPS) {
+        result.skipped.push({ row: result.rowsProcessed, reason: record });
+      }
+      continue;
+    }
+    batch.push(record);
+    if (batch.length >= batchSize) {
+      await flush();
+    }
+  }
+  await flush();
+  return result;
+};
+
+/**
+ * Respond to an import request. With "Accept: application/x-ndjson" a progress line is
+ * streamed after every batch and the result (or error) is the last line; otherwise the
+ * result is sent as JSON once the import is done.
+ *
+ * run(onProgress) performs the import and resolves with the response body.
+ */
+const respondWithProgress = async (req, res, run) => {
+  const streaming = req.get('Accept') === 'application/x-ndjson';
+  if (!streaming) {
+    return res.json(await run(null));
+  }
+
+  res.status(200);
+  res.set('Content-Type', 'application/x-ndjson');
+  res.flushHeaders();
+
+  const write = body => res.write(`${JSON.stringify(body)}\n`);
+  try {
+    const body = await run(({ rowsProcessed, rowsInserted, rowsSkipped }) =>
+      write({ progress: { rowsProcessed, rowsInserted, rowsSkipped } }));
+    write({ done: true, ...body });
+  } catch (error) {
+    write({ error: { message: error.message, status: error.status || 500 } });
+  }
+  res.end();
+};
+
+module.exports = {
+  CsvImportError,
+  headerKey,
+  normalizeUnit,
+  splitQuantity,
+  parseNumber,
+  parseRatePerSqm,
+  parseAreaSqm,
+  pick,
+  csvRows,
+  ingestRows,
+  respondWithProgress
+};
@@ -0,0 +1,183 @@
+const logger = require('./logger');
+
+/**
+ * Monthly partitions of the elements table (range partitioned on createdAt, see
+ * migrations/002_partition_elements.js). Partitions are named elements_pYYYY_MM;
+ * rows outside every monthly partition land in elements_default.
+ *
+ * Old months are archived by detaching their partition and moving it to the
+ * elements_archive schema - a catalog change, no rows are copied or deleted.
+ */
+
+const PARENT = 'elements';
+const DEFAULT_PARTITION = 'elements_default';
+const ARCHIVE_SCHEMA = 'elements_archive';
+const MONTHS_AHEAD = 3;
+
+const PARTITION_PATTERN = /^elements_p(\d{4})_(\d{2})$/;
+
+const monthStart = (date) => new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), 1));
+
+const addMonths = (date, months) => new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth() + months, 1));
+
+const partitionName = (date) =>
+  `elements_p${date.getUTCFullYear()}_${String(date.getUTCMonth() + 1).padStart(2, '0')}`;
+
+const partitionMonth = (name) => {
+  const match = PARTITION_PATTERN.exec(name);
+  return match ? new Date(Date.UTC(Number(match[1]), Number(match[2]) - 1, 1)) : null;
+};
+
+/**
+ * Check if elements is a partitioned table (migration 002 applied)
+ */
+const isPartitioned = async (sequelize) => {
+  const [rows] = await sequelize.query(
+    `SELECT 1 FROM pg_partitioned_table p
+       JOIN pg_class c ON c.oid = p.partrelid
+       JOIN pg_namespace n ON n.oid = c.relnamespace
+      WHERE c.relname = :table AND n.nspname = current_schema()`,
+    { replacements: { table: PARENT } }
+  );
+  return rows.length > 0;
+};
+
+/**
+ * Names of the monthly partitions currently attached, oldest first
+ */
+const listPartitions = async (sequelize, options = {}) => {
+  const [rows] = await sequelize.query(
+    `SELECT c.relname AS name FROM pg_inherits i
+       JOIN pg_class c ON c.oid = i.inhrelid
+       JOIN pg_class p ON p.oid = i.inhparent
+      WHERE p.relname = :table`,
+    { replacements: { table: PARENT }, transaction: options.transaction }
+  );
+  return rows.map(row => row.name).filter(name => PARTITION_PATTERN.test(name)).sort();
+};
+
+/**
+ * Create the partition for one month. Rows that were already stored in the default
+ * partition for that month are moved into it, so attaching never fails.
+ */
+const createPartition = async (sequelize, month) => {
+  const name = partitionName(month);
+  const from = month.toISOString();
+  const to = addMonths(month, 1).toISOString();
+
+  await sequelize.transaction(async (transaction) => {
+    const query = (sql) => sequelize.query(sql, { transaction, replacements: { from, to } });
+
+    await query(`CREATE TABLE "${name}" (LIKE "${PARENT}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)`);
+    await query(
+      `WITH moved AS (
+         DELETE FROM "${DEFAULT_PARTITION}" WHERE "createdAt" >= :from AND "createdAt" < :to RETURNING *
+       )
+       INSERT INTO "${name}" SELECT * FROM moved`
+    );
+    // Attaching creates the partition's copies of the parent's indexes and foreign key
+    await query(`ALTER TABLE "${PARENT}" ATTACH PARTITION "${name}" FOR VALUES FROM (:from) TO (:to)`);
+  });
+
+  logger.info(`Created elements partition ${name}`);
+  return name;
+};
+
+/**
+ * Make sure partitions exist from the current month to monthsAhead months ahead
+ * Returns the names of the partitions created.
+ */
+const ensurePartitions = async (sequelize, { monthsAhead = MONTHS_AHEAD, now = new Date() } = {}) => {
+  const existing = new Set(await listPartitions(sequelize));
+  const created = [];
+  for (let offset = 0; offset <= monthsAhead; offset++) {
+    const month = addMonths(monthStart(now), offset);
+    if (!existing.has(partitionName(month))) {
+      created.push(await createPartition(sequelize, month));
+    }
+  }
+  return created;
+};
+
+/**
+ * Detach the monthly partitions that end on or before `before` and move them to the
+ * elements_archive schema. Archived months can be dumped and dropped, or restored.
+ * Returns the names of the archived partitions.
+ */
+const archivePartitions = async (sequelize, { before }) => {
+  const cutoff = monthStart(before);
+  const archived = [];
+
+  await sequelize.query(`CREATE SCHEMA IF NOT EXISTS "${ARCHIVE_SCHEMA}"`);
+  for (const name of await listPartitions(sequelize)) {
+    if (addMonths(partitionMonth(name), 1) > cutoff) continue;
+
+    await sequelize.transaction(async (transaction) => {
+      await sequelize.query(`ALTER TABLE "${PARENT}" DETACH PARTITION "${name}"`, { transaction });
+      await sequelize.query(`ALTER TABLE "${name}" SET SCHEMA "${ARCHIVE_SCHEMA}"`, { transaction });
+    });
+    logger.info(`Archived elements partition ${name}`);
+    archived.push(name);
+  }
+  return archived;
+};
+
+/**
+ * Attach an archived monthly partition again
+ */
+const restorePartition = async (sequelize, name) => {
+  const month = partitionMonth(name);
+  if (!month) {
+    throw new Error(`Not an elements partition name: ${name}`);
+  }
+
+  const [[{ schema }]] = await sequelize.query('SELECT current_schema() AS schema');
+  await sequelize.transaction(async (transaction) => {
+    await sequelize.query(`ALTER TABLE "${ARCHIVE_SCHEMA}"."${name}" SET SCHEMA "${schema}"`, { transaction });
+    await sequelize.query(
+      `ALTER TABLE "${PARENT}" ATTACH PARTITION "${name}" FOR VALUES FROM (:from) TO (:to)`,
+      { transaction, replacements: { from: month.toISOString(), to: addMonths(month, 1).toISOString() } }
+    );
+  });
+  logger.info(`Restored elements partition ${name}`);
+};
+
+module.exports = {
+  MONTHS_AHEAD,
+  ARCHIVE_SCHEMA,
+  partitionName,
+  isPartitioned,
+  listPartitions,
+  ensurePartitions,
+  archivePartitions,
+  restorePartition
+};
+
+// CLI: node src/utils/elementPartitions.js ensure | archive YYYY-MM | restore elements_pYYYY_MM
+if (require.main === module) {
+  const db = require('../models');
+  const [command, arg] = process.argv.slice(2);
+
+  const run = async () => {
+    if (command === 'ensure') {
+      const created = await ensurePartitions(db.sequelize);
+      console.log(created.length ? `Created ${created.join(', ')}` : 'All partitions exist');
+    } else if (command === 'archive' && /^\d{4}-\d{2}$/.test(arg || '')) {
+      const archived = await archivePartitions(db.sequelize, { before: new Date(`${arg}-01T00:00:00Z`) });
+      console.log(archived.length ? `Archived ${archived.join(', ')} to ${ARCHIVE_SCHEMA}` : 'Nothing to archive');
+    } else if (command === 'restore' && arg) {
+      await restorePartition(db.sequelize, arg);
+      console.log(`Restored ${arg}`);
+    } else {
+      console.log('Usage: elementPartitions.js ensure | archive YYYY-MM (months before) | restore elements_pYYYY_MM');
+      process.exitCode = 1;
+    }
+  };
+
+  run()
+    .catch(error => {
+      console.error(error.message);
+      process.exitCode = 1;
+    })
+    .finally(() => db.sequelize.close());
+}
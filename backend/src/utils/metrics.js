@@ -0,0 +1,145 @@
+const { AsyncLocalStorage } = require('async_hooks');
+const client = require('prom-client');
+
+/**
+ * Prometheus metrics, served in text format by GET /metrics (see middleware/metrics.js).
+ *
+ * Every request gets a context holding its DB query count and DB time; the Sequelize
+ * hooks added by instrumentSequelize update the context of the request that ran the
+ * query, so N+1 patterns show up as a high queries-per-request count for a route.
+ */
+
+const registry = client.register;
+client.collectDefaultMetrics({ prefix: 'baps_' });
+
+const SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216];
+
+const httpRequestDuration = new client.Histogram({
+  name: 'baps_http_request_duration_seconds',
+  help: 'HTTP request latency by route',
+  labelNames: ['method', 'route', 'status'],
+  buckets: [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+});
+
+const httpRequestSize = new client.Histogram({
+  name: 'baps_http_request_size_bytes',
+  help: 'HTTP request body size by route',
+  labelNames: ['method', 'route'],
+  buckets: SIZE_BUCKETS
+});
+
+const httpResponseSize = new client.Histogram({
+  name: 'baps_http_response_size_bytes',
+  help: 'HTTP response body size by route',
+  labelNames: ['method', 'route'],
+  buckets: SIZE_BUCKETS
+});
+
+const dbQueriesPerRequest = new client.Histogram({
+  name: 'baps_db_queries_per_request',
+  help: 'Database queries run while handling a request',
+  labelNames: ['method', 'route'],
+  buckets: [0, 1, 2, 5, 10, 20, 50, 100, 250, 1000]
+});
+
+const dbTimePerRequest = new client.Histogram({
+  name: 'baps_db_time_per_request_seconds',
+  help: 'Total database time while handling a request',
+  labelNames: ['method', 'route'],
+  buckets: [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+});
+
+const dbQueryDuration = new client.Histogram({
+  name: 'baps_db_query_duration_seconds',
+  help: 'Database query latency by query type',
+  labelNames: ['type'],
+  buckets: [0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5]
+});
+
+const llmRequestDuration = new client.Histogram({
+  name: 'baps_llm_request_duration_seconds',
+  help: 'LLM API call latency',
+  labelNames: ['operation', 'model', 'outcome'],
+  buckets: [0.25, 0.5, 1, 2, 5, 10, 20, 30, 60]
+});
+
+const llmTokens = new client.Counter({
+  name: 'baps_llm_tokens_total',
+  help: 'LLM tokens used',
+  labelNames: ['operation', 'model', 'kind']
+});
+
+const requestContext = new AsyncLocalStorage();
+
+const seconds = start => Number(process.hrtime.bigint() - start) / 1e9;
+
+/**
+ * Run next() with a fresh per-request context; returns the context
+ */
+const trackRequest = (next) => {
+  const context = { queries: 0, dbSeconds: 0 };
+  requestContext.run(context, next);
+  return context;
+};
+
+/**
+ * Time every query and count it against the request that ran it
+ */
+const instrumentSequelize = (sequelize) => {
+  const started = new WeakMap();
+
+  sequelize.addHook('beforeQuery', (options, query) => {
+    started.set(query, process.hrtime.bigint());
+  });
+
+  sequelize.addHook('afterQuery', (options, query) => {
+    const start = started.get(query);
+    if (start === undefined) return;
+    const elapsed = seconds(start);
+    dbQueryDuration.observe({ type: options.type || 'RAW' }, elapsed);
+
+    const context = requestContext.getStore();
+    if (context) {
+      context.queries += 1;
+      context.dbSeconds += elapsed;
+    }
+  });
+
+  return sequelize;
+};
+
+/**
+ * Time an LLM call. call() resolves with the API response; token counts are read
+ * from its usage field (OpenAI format).
+ */
+const observeLlmCall = async (operation, model, call) => {
+  const start = process.hrtime.bigint();
+  try {
+    const response = await call();
+    llmRequestDuration.observe({ operation, model, outcome: 'success' }, seconds(start));
+    const usage = response && response.usage;
+    if (usage) {
+      llmTokens.inc({ operation, model, kind: 'prompt' }, usage.prompt_tokens || 0);
+      llmTokens.inc({ operation, model, kind: 'completion' }, usage.completion_tokens || 0);
+    }
+    return response;
+  } catch (error) {
+    llmRequestDuration.observe({ operation, model, outcome: 'error' }, seconds(start));
+    throw error;
+  }
+};
+
+module.exports = {
+  registry,
+  httpRequestDuration,
+  httpRequestSize,
+  httpResponseSize,
+  dbQueriesPerRequest,
+  dbTimePerRequest,
+  llmRequestDuration,
+  llmTokens,
+  seconds,
+  trackRequest,
+  instrumentSequelize,
+  observeLlmCall
+};
@@ -0,0 +1,82 @@
+const { AsyncLocalStorage } = require('async_hooks');
+
+/**
+ * Read-your-writes routing for read replicas.
+ *
+ * With replication configured, Sequelize sends SELECTs outside a transaction to a
+ * replica. A replica lags the primary slightly, so a client that just synced elements
+ * could list them and miss its own rows. Reads are sent to the primary instead when:
+ * - the request itself writes (any method other than GET/HEAD/OPTIONS), or
+ * - the same user made a successful write in the last READ_AFTER_WRITE_MS.
+ *
+ * Recent writers are kept in memory, so with several server instances behind a load
+ * balancer the window only holds per instance; keep it above the replica lag.
+ */
+
+const READ_AFTER_WRITE_MS = parseInt(process.env.DB_READ_AFTER_WRITE_MS || '5000', 10);
+
+const READ_METHODS = ['GET', 'HEAD', 'OPTIONS'];
+
+const requestContext = new AsyncLocalStorage();
+
+// userId -> time of the user's last successful write
+const lastWrites = new Map();
+
+const pruneLastWrites = (now) => {
+  for (const [userId, at] of lastWrites) {
+    if (now - at > READ_AFTER_WRITE_MS) lastWrites.delete(userId);
+  }
+};
+
+/**
+ * Check if queries of the current request must read from the primary
+ */
+const readsFromPrimary = () => {
+  const context = requestContext.getStore();
+  if (!context) return false;
+  if (context.writes) return true;
+
+  // req.user is set by the auth middleware of the route, after this middleware ran
+  const userId = context.req.user && context.req.user.id;
+  const at = userId && lastWrites.get(userId);
+  return Boolean(at) && Date.now() - at <= READ_AFTER_WRITE_MS;
+};
+
+/**
+ * Express middleware tracking the request for readsFromPrimary
+ */
+const readConsistency = (req, res, next) => {
+  const writes = !READ_METHODS.includes(req.method);
+
+  if (writes) {
+    res.on('finish', () => {
+      if (req.user && req.user.id && res.statusCode < 400) {
+        const now = Date.now();
+        lastWrites.set(req.user.id, now);
+        if (lastWrites.size > 1000) pruneLastWrites(now);
+      }
+    });
+  }
+
+  requestContext.run({ req, writes }, next);
+};
+
+/**
+ * Send the reads that need it to the primary. Sequelize checks options.useMaster when
+ * it picks a connection for a SELECT; model finders and raw queries all go through
+ * sequelize.query.
+ */
+const routeReads = (sequelize) => {
+  const query = sequelize.query.bind(sequelize);
+  sequelize.query = (sql, options) => (
+    readsFromPrimary() ? query(sql, { ...options, useMaster: true }) : query(sql, options)
+  );
+  return sequelize;
+};
+
+module.exports = {
+  READ_AFTER_WRITE_MS,
+  readsFromPrimary,
+  readConsistency,
+  routeReads
+};
@@ -0,0 +1,78 @@
+const fs = require('fs');
+const path = require('path');
+const { PassThrough } = require('stream');
+const { csvRows, ingestRows, pick, splitQuantity } = require('../src/utils/csvIngest');
+
+// Revit wall takeoff export: title line, header, then group, data and total rows
+const WALL_TAKEOFF = path.join(__dirname, '..', '..', 'wall (2).csv');
+
+// Stand-in for a text/csv request; complete is set once the body was read, as on IncomingMessage
+const csvRequest = (file) => {
+  const req = fs.createReadStream(file);
+  req.is = type => type === 'text/csv';
+  req.on('end', () => { req.complete = true; });
+  return req;
+};
+
+const collect = async (rows) => {
+  const all = [];
+  for await (const row of rows) all.push(row);
+  return all;
+};
+
+describe('csvRows', () => {
+  test('skips the schedule title line and keys rows by the header row', async () => {
+    const { rows } = await csvRows(csvRequest(WALL_TAKEOFF));
+    const all = await collect(rows);
+
+    expect(Object.keys(all[0])).toEqual([
+      'Area', 'Family and Type', 'Material Costs', 'Labor Costs',
+      'Total Material Costs', 'Total Labor Costs', 'Total Construction Costs'
+    ]);
+    // Group header row of the first wall type
+    expect(all[0]).toMatchObject({ Area: 'Basic Wall: Concrete 200mm', 'Family and Type': '' });
+    expect(all[1]).toMatchObject({ Area: '45 m²', 'Family and Type': 'Basic Wall: Concrete 200mm' });
+  });
+
+  test('keeps the header on line 1 when there is no title line', async () => {
+    const req = { is: type => type === 'application/json', body: { csvContent: 'name,quantity\nSlab,12\n' } };
+    const { rows } = await csvRows(req);
+
+    expect(await collect(rows)).toEqual([{ name: 'Slab', quantity: '12' }]);
+  });
+
+  test('ends the rows with an error when the client aborts the upload', async () => {
+    const req = new PassThrough();
+    req.is = type => type === 'text/csv';
+    const { rows } = await csvRows(req);
+
+    req.write('name,quantity\nSlab,12\n');
+    req.emit('close');
+
+    await expect(collect(rows)).rejects.toThrow('Upload aborted');
+  });
+});
+
+describe('ingestRows', () => {
+  test('imports the takeoff rows with quantities and units', async () => {
+    const sequelize = { transaction: work => work(null) };
+    const inserted = [];
+    const { rows } = await csvRows(csvRequest(WALL_TAKEOFF));
+
+    const result = await ingestRows(sequelize, rows, {
+      toRecord: (row) => {
+        const name = pick(row, ['familyandtype']);
+        if (!name) return 'missing name';
+        const quantity = splitQuantity(pick(row, ['area']));
+        return { name, quantity: quantity.value, unit: quantity.unit };
+      },
+      insertBatch: async (records) => { inserted.push(...records); }
+    });
+
+    expect(result.rowsInserted).toBe(23);
+    expect(inserted[0]).toEqual({ name: 'Basic Wall: Concrete 200mm', quantity: 45, unit: 'm²' });
+    expect(inserted.every(record => record.unit === 'm²')).toBe(true);
+    // Group headers and totals have no type and are skipped
+    expect(result.rowsSkipped).toBe(result.rowsProcessed - 23);
+  });
+});
@@ -5,38 +5,10 @@ __author__ = 'BAPS Team'
 
 from pyrevit import forms, script
 import os
-import json
 import System.Windows
 import time
-from datetime import datetime, timedelta
 
-# Get config file path
-config_dir = os.path.join(os.getenv('APPDATA'), 'BAPS')
-config_file = os.path.join(config_dir, 'config.json')
-
-
-def load_auth_status():
-    """Load authentication status from config file"""
-    if not os.path.exists(config_file):
-        return None
-
-    try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-        return config
-    except Exception, e:
-        return None
-
-
-def clear_auth():
-    """Clear authentication token"""
-    if os.path.exists(config_file):
-        try:
-            os.remove(config_file)
-            return True
-        except:
-            return False
-    return True
+import baps_session
 
 
 class AuthStatusWindow(forms.WPFWindow):
@@ -50,14 +22,13 @@ class AuthStatusWindow(forms.WPFWindow):
 
     def load_status(self):
         """Load and display authentication status"""
-        auth_data = load_auth_status()
+        expiry = baps_session.get_token_expiry()
 
-        if auth_data and auth_data.get('token'):
+        if expiry is not None:
             self.is_authenticated = True
-            user_data = auth_data.get('user', {})
+            user_data = baps_session.get_user()
             email = user_data.get('email', 'Unknown')
             role = user_data.get('role', 'Unknown')
-            timestamp = auth_data.get('timestamp', 0)
 
             # Set status indicator (green)
             self.status_indicator.Fill = System.Windows.Media.SolidColorBrush(System.Windows.Media.Color.FromArgb(255, 40, 167, 69))
@@ -68,9 +39,8 @@ class AuthStatusWindow(forms.WPFWindow):
             self.email_text.Text = email
             self.role_text.Text = role
 
-            # Calculate token expiration (24 hours from login)
-            expiration_time = datetime.fromtimestamp(timestamp) + timedelta(hours=24)
-            hours_remaining = (expiration_time - datetime.now()).total_seconds() / 3600
+            # Tokens expire 24 hours after login
+            hours_remaining = (expiry - time.time()) / 3600
 
             if hours_remaining > 0:
                 self.token_status.Text = "Valid token. Expires in {:.1f} hours.".format(hours_remaining)
@@ -101,7 +71,7 @@ class AuthStatusWindow(forms.WPFWindow):
         )
 
         if result:
-            if clear_auth():
+            if baps_session.clear_auth():
                 forms.alert(
                     'Logout successful.\n\nYou have been logged out.\n\nPlease login again to continue.',
                     title='Logout'
@@ -5,26 +5,8 @@ __author__ = 'BAPS Team'
 
 from pyrevit import forms, script
 import os
-import json
-import time
 
-# Get config directory
-config_dir = os.path.join(os.getenv('APPDATA'), 'BAPS')
-if not os.path.exists(config_dir):
-    os.makedirs(config_dir)
-
-config_file = os.path.join(config_dir, 'config.json')
-
-
-def save_token(token, user_data):
-    """Save authentication token and user data to local config file"""
-    config = {
-        'token': token,
-        'user': user_data,
-        'timestamp': time.time()  # Save login timestamp
-    }
-    with open(config_file, 'w') as f:
-        json.dump(config, f)
+import baps_session
 
 
 class LoginWindow(forms.WPFWindow):
@@ -78,17 +60,9 @@ def main():
     email = login_window.email
     password = login_window.password
     
-    # Import API client
     try:
-        import sys
-        lib_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'lib')
-        if lib_path not in sys.path:
-            sys.path.insert(0, lib_path)
-        
-        from api_client import BAPSClient
-        
         # Initialize client
-        client = BAPSClient()
+        client = baps_session.get_anonymous_client()
         
         # Handle registration
         if login_window.action == 'register':
@@ -97,7 +71,7 @@ def main():
             
             if token:
                 user_data = result.get('user', {})
-                save_token(token, user_data)
+                baps_session.save_auth(token, user_data)
                 forms.alert(
                     'Registration successful!\n\nWelcome to BAPS, {}\n\nYou are now logged in as a General Contractor.'.format(email),
                     title='Registration Success'
@@ -123,7 +97,7 @@ def main():
                 
                 # Allow all GC-related roles
                 if user_role in ['GENERAL_CONTRACTOR', 'GC_USER', 'GC_ADMIN']:
-                    save_token(token, user_data)
+                    baps_session.save_auth(token, user_data)
                     user_email = user_data.get('email', 'User')
                     forms.alert(
                         'Login successful! Welcome {}\\n\\nYou are now authenticated as a General Contractor.'.format(user_email),
@@ -4,38 +4,16 @@ __title__ = 'Get\nPricing'
 __author__ = 'BAPS Team'
 
 from pyrevit import forms
-import os
-import json
-import sys
-
-# Add lib path for imports
-lib_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'lib')
-if lib_path not in sys.path:
-    sys.path.insert(0, lib_path)
-
-from api_client import BAPSClient
-
-
-def get_auth_token():
-    """Get stored authentication token from config file"""
-    config_file = os.path.join(os.getenv('APPDATA'), 'BAPS', 'config.json')
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-            return config.get('token')
-    return None
+import baps_session
 
 
 def main():
     """Main pricing function - Request and display AI pricing suggestions"""
     # Check authentication
-    token = get_auth_token()
-    if not token:
+    client = baps_session.get_client()
+    if not client:
         forms.alert('Please login first using the Login button', exitscript=True)
     
-    # Initialize API client
-    client = BAPSClient(token=token)
-    
     try:
         # Get synced elements from backend
         elements = client.get_elements()
@@ -64,26 +42,33 @@ def main():
         selected_element = elements[selected_idx]
         element_id = selected_element.get('id')
         
-        # Request AI pricing from backend
-        with forms.ProgressBar(title='Requesting AI Pricing from OpenAI...', indeterminate=True) as pb:
-            pricing = client.get_pricing_suggestion(element_id)
+        # Known types are priced instantly from takeoff history,
+        # AI pricing is only requested for types with no history
+        pricing = baps_session.get_price_book().suggest_pricing(selected_element)
+        if not pricing:
+            with forms.ProgressBar(title='Requesting AI Pricing from OpenAI...', indeterminate=True) as pb:
+                pricing = client.get_pricing_suggestion(element_id)
         
         if pricing:
             # Display pricing results in formatted dialog
+            source = 'Price Book' if pricing.get('source') == 'price_book' else 'AI'
             message = [
-                'AI Pricing Suggestion:',
+                '{} Pricing Suggestion:'.format(source),
                 '',
                 'Element: {}'.format(selected_element.get('name')),
                 'Category: {}'.format(selected_element.get('category')),
                 '',
                 'Suggested Price: ${:,.2f}'.format(pricing.get('suggestedPrice', 0)),
+                'Range: ${:,.2f} - ${:,.2f}'.format(
+                    pricing.get('priceRange', {}).get('min', 0),
+                    pricing.get('priceRange', {}).get('max', 0)),
                 'Confidence: {}%'.format(pricing.get('confidence', 0)),
                 '',
                 'Reasoning:',
                 pricing.get('reasoning', 'No reasoning provided')
             ]
             
-            forms.alert('\n'.join(message), title='AI Pricing Suggestion')
+            forms.alert('\n'.join(message), title='{} Pricing Suggestion'.format(source))
         else:
             forms.alert(
                 'Could not get pricing suggestion. Please try again.',
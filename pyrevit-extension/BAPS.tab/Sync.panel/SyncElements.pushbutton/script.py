@@ -2,94 +2,119 @@
 """Sync Building Elements to Backend - Extract and upload BIM data"""
 __title__ = 'Sync\nElements'
 __author__ = 'BAPS Team'
+# Keep the engine alive so the modeless progress window outlives the script
+__persistentengine__ = True
 
 from pyrevit import forms, revit, DB
 import os
-import json
-import sys
-import time
 
-# Add lib path for imports
-lib_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'lib')
-if lib_path not in sys.path:
-    sys.path.insert(0, lib_path)
+import baps_session
+from sync_metrics import SyncMetrics
 
-from element_extractor import ElementExtractor
-from schedule_extractor import ScheduleExtractor
-from api_client import BAPSClient
+import System.Windows
 
 
-def get_auth_token():
-    """Get stored authentication token from config file"""
-    config_file = os.path.join(os.getenv('APPDATA'), 'BAPS', 'config.json')
-    if os.path.exists(config_file):
-        try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-                token = config.get('token')
-                timestamp = config.get('timestamp', 0)
-
-                # Check if token is older than 24 hours (86400 seconds)
-                age_seconds = time.time() - timestamp
-                if age_seconds > 86400:
-                    # Token is older than 24 hours, clear it
-                    clear_auth_token()
-                    return None
-
-                return token
-        except:
-            return None
-    return None
-
-
-def clear_auth_token():
-    """Clear stored authentication token"""
-    config_file = os.path.join(os.getenv('APPDATA'), 'BAPS', 'config.json')
-    if os.path.exists(config_file):
-        try:
-            os.remove(config_file)
-        except:
-            pass
+def write_metrics_log(metrics):
+    """Append sync metrics to the rotating log (never fails the sync)"""
+    try:
+        metrics.write_log()
+    except Exception:
+        pass
 
 
-def convert_schedule_to_elements(schedule_data):
-    """Convert schedule data to element format for API"""
-    elements = []
+class SyncProgressWindow(forms.WPFWindow):
+    """Modeless upload progress window with Cancel"""
 
-    schedule_name = schedule_data.get('schedule_name', 'Unknown Schedule')
-    rows = schedule_data.get('data', [])
-    headers = schedule_data.get('headers', [])
+    def __init__(self, worker, metrics):
+        xaml_file = os.path.join(os.path.dirname(__file__), 'SyncProgress.xaml')
+        forms.WPFWindow.__init__(self, xaml_file)
 
-    for idx, row in enumerate(rows):
-        # Create element from each row in schedule
-        element = {
-            'revitId': '{}_{}'.format(schedule_name, idx),
-            'name': '{} - Row {}'.format(schedule_name, idx + 1),
-            'category': 'Schedule',
-            'quantity': 1.0,
-            'unit': 'Item',
-            'properties': {},
-            'bimMetadata': {
-                'schedule_name': schedule_name,
-                'row_index': idx + 1
-            }
-        }
+        self.worker = worker
+        self.metrics = metrics
+        self.action_btn.Click += self.action_click
 
-        # Map row data to properties using headers as keys
-        for col_idx, header in enumerate(headers):
-            if col_idx < len(row):
-                element['properties'][header] = row[col_idx]
+        # Worker callbacks arrive on the upload thread
+        worker.on_progress = lambda sent, total: self._dispatch(lambda: self.show_progress(sent, total))
+        worker.on_complete = lambda sent, total, cancelled: self._dispatch(
+            lambda: self.show_complete(sent, total, cancelled))
+        worker.on_error = lambda e: self._dispatch(lambda: self.show_error(e))
 
-        elements.append(element)
+    def _dispatch(self, func):
+        """Run func on the UI thread"""
+        self.Dispatcher.BeginInvoke(System.Action(func))
 
-    return elements
+    def _finish(self, title, status, color):
+        self.metrics.finish()
+        write_metrics_log(self.metrics)
+        self.title_tb.Text = title
+        self.status_tb.Text = status
+        self.status_tb.Foreground = self._brush(color)
+        self.action_btn.Content = 'Close'
+        self.action_btn.Background = self._brush('#0066CC')
+        self.action_btn.IsEnabled = True
+        try:
+            forms.toaster.send_toast(status.split('\n')[0], title='BAPS Sync')
+        except Exception:
+            pass
+
+    def _brush(self, color):
+        return System.Windows.Media.BrushConverter().ConvertFromString(color)
+
+    def show_progress(self, sent, total):
+        self.progress_bar.Maximum = max(1, total)
+        self.progress_bar.Value = sent
+        self.status_tb.Text = 'Uploading {:,} of {:,} elements...'.format(sent, total)
+
+    def show_complete(self, sent, total, cancelled):
+        if cancelled:
+            self._finish('Sync Cancelled',
+                         'Cancelled after {:,} of {:,} elements.\n'
+                         'The rest stays in the outbox and is sent with the next sync.'.format(sent, total),
+                         '#DC3545')
+        else:
+            self._finish('Sync Complete',
+                         'Successfully synced {:,} elements to BAPS!\n\n{}'.format(
+                             sent, '\n'.join(self.metrics.summary_lines())),
+                         '#28A745')
+
+    def show_error(self, error):
+        error_msg = str(error)
+        from api_client import is_auth_error
+        from outbox import OutboxBusy, is_rejected
+
+        if is_auth_error(error):
+            # Clear the invalid token
+            baps_session.clear_auth()
+            status = ('Your authentication session has expired.\nPlease login again using the Login button. '
+                      'Extracted elements are kept in the outbox and sent with the next sync.')
+        elif isinstance(error, OutboxBusy):
+            status = ('The outbox is already being uploaded (by another Revit session or a background retry).\n'
+                      'The extracted elements are queued and sent by that upload.')
+        elif is_rejected(error):
+            # Retrying unchanged will not help; the record is set aside after repeated rejects
+            status = ('BAPS rejected the upload: {}\nExtracted elements are kept in the outbox; '
+                      'check the elements and sync again.'.format(error_msg))
+        else:
+            status = ('Could not reach BAPS: {}\nExtracted elements are saved in the outbox '
+                      'and will be sent automatically.'.format(error_msg))
+            # Keep retrying in the background while Revit is open
+            baps_session.start_outbox_flusher(self.worker.outbox)
+        self._finish('Sync Pending', status, '#DC3545')
+
+    def action_click(self, sender, args):
+        if self.worker.is_alive():
+            # Stop after the batch in flight
+            self.worker.cancel()
+            self.action_btn.IsEnabled = False
+            self.status_tb.Text = 'Cancelling...'
+        else:
+            self.Close()
 
 
 def main():
     """Main sync function - Extract and upload elements to backend"""
     # Check authentication
-    token = get_auth_token()
-    if not token:
+    if not baps_session.get_auth_token():
         forms.alert('Please login first using the Login button', exitscript=True)
     
     # Get active Revit document
@@ -97,11 +122,8 @@ def main():
     if not doc:
         forms.alert('No active Revit document found', exitscript=True)
     
-    # Initialize element extractor
-    extractor = ElementExtractor(doc)
-    
     # Ask user what element types to sync
-    options = ['Walls', 'Doors', 'Windows', 'Structural Framing', 'Schedules', 'All Elements']
+    options = ['Walls', 'Doors', 'Windows', 'Structural Framing', 'Schedules', 'Linked Models', 'All Elements']
     selected = forms.SelectFromList.show(
         options,
         title='Select Elements to Sync',
@@ -114,71 +136,99 @@ def main():
     
     # Extract selected elements
     all_elements = []
+    metrics = SyncMetrics('sync')
+
+    def selected_type(name):
+        return 'All Elements' in selected or name in selected
+
+    element_types = [t for t in ['Walls', 'Doors', 'Windows', 'Structural Framing'] if selected_type(t)]
+    # Linked models alone means all element types from the links
+    link_types = element_types or ['Walls', 'Doors', 'Windows', 'Structural Framing']
+
+    # Revit extractors are only imported once there is something to extract
+    ElementExtractor, ScheduleExtractor = baps_session.load_extractors()
+    from schedule_extractor import convert_schedule_to_elements
 
     with forms.ProgressBar(title='Extracting Elements from Revit...') as pb:
-        if 'All Elements' in selected or 'Walls' in selected:
-            pb.update_progress(0, 100)
-            walls = extractor.extract_walls()
-            all_elements.extend(walls)
-
-        if 'All Elements' in selected or 'Doors' in selected:
-            pb.update_progress(20, 100)
-            doors = extractor.extract_doors()
-            all_elements.extend(doors)
-
-        if 'All Elements' in selected or 'Windows' in selected:
-            pb.update_progress(40, 100)
-            windows = extractor.extract_windows()
-            all_elements.extend(windows)
-
-        if 'All Elements' in selected or 'Structural Framing' in selected:
-            pb.update_progress(60, 100)
-            framing = extractor.extract_structural()
-            all_elements.extend(framing)
-
-        if 'All Elements' in selected or 'Schedules' in selected:
-            pb.update_progress(80, 100)
-            schedule_extractor = ScheduleExtractor(doc)
+        # Progress is reported in elements (plus one step per schedule)
+        extractor = ElementExtractor(doc, metrics=metrics)
+        element_total = extractor.count_elements(element_types)
+        link_extractor = None
+        link_total = 0
+        if selected_type('Linked Models'):
+            from link_extractor import LinkExtractor
+            link_extractor = LinkExtractor(doc, metrics=metrics)
+            # Only links changed since their last extraction are counted (and read)
+            link_total = link_extractor.count_elements(link_types)
+        schedule_extractor = ScheduleExtractor(doc, metrics=metrics)
+        schedule_total = len(schedule_extractor.get_all_schedules()) if selected_type('Schedules') else 0
+        total = max(1, element_total + link_total + schedule_total)
+
+        extractor.progress = lambda count: pb.update_progress(min(count, element_total), total)
+        if link_extractor:
+            link_extractor.progress = lambda count: pb.update_progress(
+                element_total + min(count, link_total), total)
+        schedule_extractor.progress = lambda count: pb.update_progress(
+            element_total + link_total + count, total)
+
+        if selected_type('Walls'):
+            all_elements.extend(extractor.extract_walls())
+
+        if selected_type('Doors'):
+            all_elements.extend(extractor.extract_doors())
+
+        if selected_type('Windows'):
+            all_elements.extend(extractor.extract_windows())
+
+        if selected_type('Structural Framing'):
+            all_elements.extend(extractor.extract_structural())
+
+        if link_extractor:
+            all_elements.extend(link_extractor.extract(link_types))
+
+        if selected_type('Schedules'):
             all_schedules = schedule_extractor.extract_all_schedules_data()
 
+            # Cost takeoff schedules also feed the local price book
+            price_book = baps_session.get_price_book()
+            priced_rows = 0
             for schedule_data in all_schedules:
                 schedule_elements = convert_schedule_to_elements(schedule_data)
                 all_elements.extend(schedule_elements)
+                # Keyed by document and schedule, so a re-sync replaces the schedule's rows
+                source = '{}|{}'.format(doc.PathName or doc.Title, schedule_data.get('schedule_name'))
+                priced_rows += price_book.ingest_schedule(schedule_data, source)
+            if priced_rows:
+                price_book.save()
+
+    metrics.sample_memory()
     
     if not all_elements:
+        if link_extractor and link_extractor.summary:
+            forms.alert('No new elements: the linked models have not changed since their last sync',
+                        exitscript=True)
         forms.alert('No elements found in the model', exitscript=True)
     
-    # Send elements to backend API
-    client = BAPSClient(token=token)
-
-    with forms.ProgressBar(title='Syncing {} Elements to Backend...'.format(len(all_elements))) as pb:
-        try:
-            pb.update_progress(0, 100)
-            # Send all elements in a single batch request for better performance
-            response = client.create_elements_batch(all_elements)
-
-            forms.alert(
-                'Successfully synced {} elements to BAPS!'.format(len(all_elements)),
-                title='Sync Complete'
-            )
-        except Exception as e:
-            error_msg = str(e)
-            # Check if it's an authentication error
-            if 'Unauthorized' in error_msg or '401' in error_msg or 'Invalid token' in error_msg or 'expired' in error_msg.lower():
-                # Clear the invalid token
-                clear_auth_token()
-                forms.alert(
-                    'Your authentication session has expired.\n\nPlease login again using the Login button.',
-                    title='Session Expired',
-                    warn_icon=True
-                )
-            else:
-                forms.alert(
-                    'Error syncing elements: {}'.format(error_msg),
-                    title='Sync Error',
-                    warn_icon=True
-                )
-
+    # Queue durably first: extraction is never lost if the backend is slow or unreachable
+    from outbox import Outbox
+    from upload_worker import UploadWorker
+
+    outbox = Outbox()
+    with metrics.span('serialize'):
+        # revitIds are only unique per document, re-syncs of this document supersede each other
+        outbox.append(all_elements, source=doc.PathName or doc.Title)
+
+    dropped = outbox.pop_dropped()
+    if dropped:
+        forms.alert('The outbox size limit was reached; {:,} unsent elements from earlier '
+                    'syncs were dropped.'.format(dropped), title='BAPS Outbox', warn_icon=True)
+
+    # Upload in the background (including anything left from earlier syncs) so Revit stays usable
+    client = baps_session.get_client(metrics=metrics)
+    worker = UploadWorker(client, outbox)
+
+    SyncProgressWindow(worker, metrics).show()
+    worker.start()
 
 if __name__ == '__main__':
     main()
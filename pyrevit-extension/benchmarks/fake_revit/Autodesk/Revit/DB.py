@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal stand-ins for Autodesk.Revit.DB used by the benchmark suite
+Only the members touched by ElementExtractor, ScheduleExtractor and LinkExtractor are provided.
+"""
+
+__all__ = [
+    'StorageType', 'BuiltInParameter', 'BuiltInCategory', 'SectionType',
+    'ElementId', 'Parameter', 'Element', 'Wall', 'FamilyInstance', 'ViewSchedule',
+    'FilteredElementCollector', 'Document', 'DocumentVersion', 'XYZ', 'Transform', 'RevitLinkInstance'
+]
+
+
+class StorageType:
+    String = 'String'
+    Double = 'Double'
+    Integer = 'Integer'
+    ElementId = 'ElementId'
+
+
+class BuiltInParameter:
+    ELEM_TYPE_PARAM = 'ELEM_TYPE_PARAM'
+
+
+class BuiltInCategory:
+    OST_Walls = 'OST_Walls'
+    OST_Doors = 'OST_Doors'
+    OST_Windows = 'OST_Windows'
+    OST_StructuralFraming = 'OST_StructuralFraming'
+    OST_Schedules = 'OST_Schedules'
+
+
+class SectionType:
+    Header = 'Header'
+    Body = 'Body'
+
+
+class ElementId:
+    __slots__ = ('IntegerValue',)
+
+    def __init__(self, value):
+        self.IntegerValue = value
+
+    def __str__(self):
+        return str(self.IntegerValue)
+
+    def __hash__(self):
+        return self.IntegerValue
+
+    def __eq__(self, other):
+        return isinstance(other, ElementId) and other.IntegerValue == self.IntegerValue
+
+
+class Parameter:
+    __slots__ = ('StorageType', '_value')
+
+    def __init__(self, value):
+        self._value = value
+        if isinstance(value, ElementId):
+            self.StorageType = StorageType.ElementId
+        elif isinstance(value, float):
+            self.StorageType = StorageType.Double
+        elif isinstance(value, int):
+            self.StorageType = StorageType.Integer
+        else:
+            self.StorageType = StorageType.String
+
+    @property
+    def HasValue(self):
+        return self._value is not None
+
+    def AsString(self):
+        return self._value
+
+    def AsDouble(self):
+        return self._value
+
+    def AsInteger(self):
+        return self._value
+
+    def AsElementId(self):
+        return self._value
+
+    def AsValueString(self):
+        return str(self._value)
+
+
+class Element:
+    """Element with a parameter table and a built-in category"""
+
+    def __init__(self, element_id, name, category, parameters=None, type_name=None, is_type=False):
+        self.Id = ElementId(element_id)
+        self.Name = name
+        self.BuiltInCategory = category
+        self.IsElementType = is_type
+        self._parameters = parameters or {}
+        self._type_param = Parameter(type_name) if type_name else None
+
+    def LookupParameter(self, name):
+        value = self._parameters.get(name)
+        return Parameter(value) if value is not None else None
+
+    def GetParameter(self, built_in_parameter):
+        if built_in_parameter == BuiltInParameter.ELEM_TYPE_PARAM:
+            return self._type_param
+        return None
+
+
+class Wall(Element):
+    pass
+
+
+class FamilyInstance(Element):
+    pass
+
+
+class _Cell:
+    __slots__ = ('Text',)
+
+    def __init__(self, text):
+        self.Text = text
+
+
+class _Cells:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def get_Item(self, row, col):
+        return _Cell(self._rows[row][col])
+
+
+class _SectionData:
+    def __init__(self, rows):
+        self.NumberOfRows = len(rows)
+        self.NumberOfColumns = len(rows[0]) if rows else 0
+        self.Cells = _Cells(rows)
+
+
+class _TableData:
+    def __init__(self, rows):
+        self._body = _SectionData(rows)
+
+    def GetSectionData(self, section_type):
+        return self._body if section_type == SectionType.Body else None
+
+
+class ViewSchedule(Element):
+    """Schedule view; rows[0] holds the column headers"""
+
+    def __init__(self, element_id, name, rows, is_template=False):
+        Element.__init__(self, element_id, name, BuiltInCategory.OST_Schedules)
+        self.IsTemplate = is_template
+        self._table = _TableData(rows)
+
+    def GetTableData(self):
+        return self._table
+
+
+class XYZ:
+    __slots__ = ('X', 'Y', 'Z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.X, self.Y, self.Z = x, y, z
+
+
+class Transform:
+    def __init__(self, origin=None):
+        self.Origin = origin or XYZ()
+        self.BasisX = XYZ(1.0, 0.0, 0.0)
+        self.BasisY = XYZ(0.0, 1.0, 0.0)
+        self.BasisZ = XYZ(0.0, 0.0, 1.0)
+
+
+class DocumentVersion:
+    def __init__(self, version_guid, number_of_saves):
+        self.VersionGUID = version_guid
+        self.NumberOfSaves = number_of_saves
+
+
+class RevitLinkInstance(Element):
+    """Placed instance of a linked model; link_doc None means the link is unloaded"""
+
+    def __init__(self, element_id, name, link_doc, origin=None):
+        Element.__init__(self, element_id, name, 'OST_RvtLinks')
+        self._link_doc = link_doc
+        self._transform = Transform(origin)
+
+    def GetLinkDocument(self):
+        return self._link_doc
+
+    def GetTotalTransform(self):
+        return self._transform
+
+
+class Document:
+    def __init__(self, title='Synthetic Model', path_name=''):
+        self.Title = title
+        self.PathName = path_name
+        self.Version = DocumentVersion('00000000-0000-0000-0000-000000000000', 1)
+        self._elements = {}
+
+    @staticmethod
+    def GetDocumentVersion(doc):
+        return doc.Version
+
+    def add(self, element):
+        self._elements[element.Id] = element
+        return element
+
+    def GetElement(self, element_id):
+        return self._elements.get(element_id)
+
+    def all_elements(self):
+        return self._elements.values()
+
+
+class FilteredElementCollector:
+    """Lazy filter chain over the fake document's elements"""
+
+    def __init__(self, doc):
+        self._doc = doc
+        self._filters = []
+
+    def OfClass(self, cls):
+        self._filters.append(lambda e: isinstance(e, cls))
+        return self
+
+    def OfCategory(self, category):
+        self._filters.append(lambda e: e.BuiltInCategory == category)
+        return self
+
+    def WhereElementIsNotElementType(self):
+        self._filters.append(lambda e: not e.IsElementType)
+        return self
+
+    def WhereElementIsElementType(self):
+        self._filters.append(lambda e: e.IsElementType)
+        return self
+
+    def __iter__(self):
+        filters = self._filters
+        return (e for e in self._doc.all_elements() if all(f(e) for f in filters))
+
+    def ToElements(self):
+        return list(self)
+
+    def GetElementCount(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the Autodesk.Revit namespace (benchmarks only)"""
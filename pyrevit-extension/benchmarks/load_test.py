@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""
+Load test for the BAPS backend API (CPython 3.7+, runs against a local backend and Postgres)
+
+Seeds General Contractor users with projects and Subcontractors with availability, then runs
+concurrent virtual users, each with its own AsyncBAPSClient (the BAPSClient request shapes),
+through a weighted mix of operations. Reports throughput, p50/p95/p99 latency and error
+rates per endpoint as JSON, so runs against different versions can be compared.
+
+Runs against the Express backend (npm start, port 5000); pass --url for another address.
+
+Usage:
+    python benchmarks/load_test.py --users 20 --duration 60 --mix sync-heavy
+    python benchmarks/load_test.py --mix match-heavy --json results.json
+    python benchmarks/load_test.py --compare results.json        # compare with an earlier run
+
+Seeded data is not removed; run it against a throwaway database.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'lib'))
+
+from api_client import APIError
+from async_api_client import AsyncBAPSClient, NO_RETRY
+
+# The Express server (npm start, src/server.js) serves the matching, project and Subcontractor routes
+DEFAULT_URL = 'http://localhost:5000/api'
+REPORT_FORMAT = 1
+
+# Password of all seeded users
+SEED_PASSWORD = 'loadtest-password'
+
+LOCATIONS = ['Atlanta, GA', 'Charlotte, NC', 'Nashville, TN', 'Orlando, FL', 'Raleigh, NC']
+WORK_TYPES = ['Drywall', 'Concrete', 'Electrical', 'Plumbing', 'Roofing', 'Painting']
+
+# (category, unit, name pattern, quantity range) of generated elements
+ELEMENT_KINDS = [
+    ('Walls', 'SF', 'Basic Wall - Interior {}mm', (40.0, 900.0)),
+    ('Walls', 'SF', 'Basic Wall - Exterior {}mm', (80.0, 1500.0)),
+    ('Floors', 'SF', 'Floor - Concrete {}mm', (200.0, 5000.0)),
+    ('Doors', 'EA', 'Single-Flush {}x2134mm', (1.0, 1.0)),
+    ('Windows', 'EA', 'Fixed {}x1220mm', (1.0, 1.0)),
+    ('Structural Framing', 'LF', 'W-Wide Flange W{}', (4.0, 40.0)),
+    ('Ceilings', 'SF', 'Compound Ceiling {}mm', (100.0, 2500.0))
+]
+
+# Operation -> endpoint label
+ENDPOINTS = {
+    'sync_batch': 'POST /api/elements/batch',
+    'find_matches': 'GET /api/matches/projects/:id/find',
+    'pricing': 'POST /api/elements/:id/pricing/suggest',
+    'list_elements': 'GET /api/elements',
+    'list_projects': 'GET /api/projects'
+}
+
+# Operation weights per mix
+MIXES = {
+    'sync-heavy': {'sync_batch': 60, 'list_elements': 15, 'find_matches': 10, 'pricing': 5, 'list_projects': 10},
+    'match-heavy': {'find_matches': 55, 'pricing': 15, 'list_projects': 15, 'sync_batch': 10, 'list_elements': 5},
+    'balanced': {'sync_batch': 30, 'find_matches': 30, 'pricing': 15, 'list_projects': 15, 'list_elements': 10}
+}
+
+
+def make_elements(count, rng, project_id=None):
+    """Generate element dicts shaped like a Revit sync batch"""
+    elements = []
+    for _ in range(count):
+        category, unit, pattern, (low, high) = rng.choice(ELEMENT_KINDS)
+        size = rng.choice([100, 150, 200, 300, 915, 1220])
+        element = {
+            'name': pattern.format(size),
+            'category': category,
+            'quantity': round(rng.uniform(low, high), 2),
+            'unit': unit,
+            'revitId': str(rng.randint(100000, 9999999)),
+            'properties': {
+                'Level': 'Level {}'.format(rng.randint(1, 12)),
+                'Phase Created': 'New Construction',
+                'Mark': '{}-{}'.format(category[0], rng.randint(1, 999))
+            },
+            'bimMetadata': {'sourceModel': 'loadtest.rvt', 'category': category}
+        }
+        if project_id:
+            element['projectId'] = project_id
+        elements.append(element)
+    return elements
+
+
+def make_project(code, rng):
+    """Generate a project create request"""
+    start = datetime.utcnow() + timedelta(days=rng.randint(7, 60))
+    return {
+        'projectCode': code,
+        'location': rng.choice(LOCATIONS),
+        'workType': rng.choice(WORK_TYPES),
+        'description': 'Load test project {}'.format(code),
+        'scheduleFrom': start.isoformat() + 'Z',
+        'scheduleTo': (start + timedelta(days=rng.randint(30, 180))).isoformat() + 'Z',
+        'materialUnitCost': round(rng.uniform(2.0, 25.0), 2),
+        'laborUnitCost': round(rng.uniform(3.0, 40.0), 2),
+        'totalQuantity': rng.randint(500, 50000)
+    }
+
+
+def make_availability(rng, location, work_type):
+    """Generate a subcontractor availability request"""
+    start = datetime.utcnow() + timedelta(days=rng.randint(0, 30))
+    return {
+        'availabilityFrom': start.isoformat() + 'Z',
+        'availabilityTo': (start + timedelta(days=rng.randint(60, 365))).isoformat() + 'Z',
+        'location': location,
+        'workType': work_type,
+        'materialCostPerSqm': round(rng.uniform(2.0, 25.0), 2),
+        'laborCostPerSqm': round(rng.uniform(3.0, 40.0), 2),
+        'maximumCapacity': rng.randint(1000, 100000)
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(math.ceil(pct / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+class VirtualUser:
+    """One General Contractor user with its own client, projects and elements"""
+
+    def __init__(self, client, projects, element_ids, rng, batch_size):
+        self.client = client
+        self.projects = projects
+        self.element_ids = list(element_ids)
+        self.rng = rng
+        self.batch_size = batch_size
+
+    async def sync_batch(self):
+        project_id = self.rng.choice(self.projects) if self.projects else None
+        result = await self.client.create_elements_batch(make_elements(self.batch_size, self.rng, project_id))
+        # Keep a bounded sample of ids for pricing requests
+        for element in (result.get('elements') or [])[:5]:
+            if element.get('id'):
+                self.element_ids.append(element['id'])
+        del self.element_ids[:-50]
+
+    async def find_matches(self):
+        await self.client.find_matches(self.rng.choice(self.projects))
+
+    async def pricing(self):
+        await self.client.get_pricing_suggestion(self.rng.choice(self.element_ids))
+
+    async def list_elements(self):
+        await self.client.get_elements()
+
+    async def list_projects(self):
+        await self.client.get_projects(limit=20, offset=self.rng.randint(0, 5) * 20)
+
+
+class Recorder:
+    """Latencies and outcomes per operation"""
+
+    def __init__(self):
+        self.samples = dict((op, []) for op in ENDPOINTS)
+        self.statuses = dict((op, {}) for op in ENDPOINTS)
+        self.recording = False
+
+    def add(self, op, seconds, status):
+        if not self.recording:
+            return
+        self.samples[op].append((seconds, status))
+        self.statuses[op][status] = self.statuses[op].get(status, 0) + 1
+
+    def report(self, duration):
+        endpoints = {}
+        total = {'requests': 0, 'errors': 0}
+        for op, samples in self.samples.items():
+            if not samples:
+                continue
+            latencies = sorted(s for s, _ in samples)
+            errors = sum(1 for _, status in samples if not status.startswith('2'))
+            endpoints[op] = {
+                'endpoint': ENDPOINTS[op],
+                'requests': len(samples),
+                'errors': errors,
+                'error_rate': round(errors / float(len(samples)), 4),
+                'throughput_rps': round(len(samples) / duration, 2),
+                'latency_ms': {
+                    'p50': round(percentile(latencies, 50) * 1000, 1),
+                    'p95': round(percentile(latencies, 95) * 1000, 1),
+                    'p99': round(percentile(latencies, 99) * 1000, 1),
+                    'mean': round(sum(latencies) / len(latencies) * 1000, 1),
+                    'max': round(latencies[-1] * 1000, 1)
+                },
+                'statuses': self.statuses[op]
+            }
+            total['requests'] += len(samples)
+            total['errors'] += errors
+        total['error_rate'] = round(total['errors'] / float(total['requests']), 4) if total['requests'] else 0.0
+        total['throughput_rps'] = round(total['requests'] / duration, 2)
+        return endpoints, total
+
+
+def _status(error):
+    if isinstance(error, APIError) and error.status:
+        return str(error.status)
+    return type(error).__name__
+
+
+async def seed(url, run_id, users, subcontractors, projects_per_user, rng):
+    """
+    Register users and create projects, elements and availability
+    Returns: ([(token, project ids, element ids)] per GC user, seed summary)
+    """
+    started = time.time()
+
+    async def register(role, index):
+        async with AsyncBAPSClient(base_url=url, retry=NO_RETRY) as client:
+            result = await client.register(
+                'loadtest+{}-{}{}@example.com'.format(run_id, role.lower()[:2], index), SEED_PASSWORD,
+                role=role, firstName='Load', lastName='Test{}'.format(index))
+            return result['user']['id'], result.get('token') or result.get('accessToken')
+
+    # Subcontractors cover every location / work type pair, so matching has real work to do
+    sc_accounts = await asyncio.gather(*[register('SUBCONTRACTOR', i) for i in range(subcontractors)])
+    sc_users = dict(sc_accounts)
+
+    async with AsyncBAPSClient(base_url=url, token=sc_accounts[0][1], concurrency=8) as client:
+        sc_ids = {}
+        offset = 0
+        while len(sc_ids) < len(sc_users):
+            page = await client.get_subcontractors(limit=100, offset=offset)
+            for sc in page.get('data', []):
+                if sc['userId'] in sc_users:
+                    sc_ids[sc['userId']] = sc['id']
+            offset += 100
+            if offset >= page.get('total', 0):
+                break
+
+    pairs = [(location, work_type) for location in LOCATIONS for work_type in WORK_TYPES]
+
+    async def add_availability(index, user_id, token):
+        async with AsyncBAPSClient(base_url=url, token=token, retry=NO_RETRY) as client:
+            location, work_type = pairs[index % len(pairs)]
+            await client.add_availability(sc_ids[user_id], make_availability(rng, location, work_type))
+
+    await asyncio.gather(*[add_availability(i, user_id, token)
+                           for i, (user_id, token) in enumerate(sc_accounts) if user_id in sc_ids])
+
+    async def gc_user(index):
+        _, token = await register('GENERAL_CONTRACTOR', index)
+        async with AsyncBAPSClient(base_url=url, token=token, retry=NO_RETRY) as client:
+            project_ids = []
+            for p in range(projects_per_user):
+                code = 'LT-{}-{}-{}'.format(run_id, index, p)
+                result = await client.create_project(make_project(code, rng))
+                project_ids.append(result['data']['id'])
+            # A few elements per user to request pricing for
+            result = await client.create_elements_batch(make_elements(10, rng, project_ids[0]))
+            return token, project_ids, [e['id'] for e in result['elements']]
+
+    accounts = await asyncio.gather(*[gc_user(i) for i in range(users)])
+    summary = {
+        'gc_users': users,
+        'subcontractors': len(sc_ids),
+        'projects': users * projects_per_user,
+        'seconds': round(time.time() - started, 2)
+    }
+    return accounts, summary
+
+
+async def probe_pricing(url, token, element_id):
+    """Check the pricing endpoint is served (it is not part of every backend)"""
+    async with AsyncBAPSClient(base_url=url, token=token, retry=NO_RETRY) as client:
+        try:
+            await client.get_pricing_suggestion(element_id)
+        except APIError as e:
+            return e.status != 404
+    return True
+
+
+async def run_user(user, weights, recorder, deadline, think_time):
+    ops = sorted(weights)
+    op_weights = [weights[op] for op in ops]
+    while time.time() < deadline:
+        op = user.rng.choices(ops, weights=op_weights)[0]
+        started = time.perf_counter()
+        try:
+            await getattr(user, op)()
+            status = '200'
+        except Exception as e:
+            status = _status(e)
+        recorder.add(op, time.perf_counter() - started, status)
+        if think_time:
+            await asyncio.sleep(user.rng.uniform(0, 2 * think_time))
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    run_id = '{}{}'.format(int(time.time()), rng.randint(100, 999))
+
+    print('Seeding {} users, {} subcontractors, {} projects per user...'.format(
+        args.users, args.subcontractors, args.projects))
+    accounts, seeded = await seed(args.url, run_id, args.users, args.subcontractors, args.projects, rng)
+
+    weights = dict(MIXES[args.mix])
+    if weights.get('pricing') and not await probe_pricing(args.url, accounts[0][0], accounts[0][2][0]):
+        print('Pricing endpoint not served by this backend, removed from the mix')
+        del weights['pricing']
+
+    recorder = Recorder()
+    clients = [AsyncBAPSClient(base_url=args.url, token=token, concurrency=1, retry=NO_RETRY)
+               for token, _, _ in accounts]
+    users = [VirtualUser(client, project_ids, element_ids, random.Random(rng.random()), args.batch_size)
+             for client, (_, project_ids, element_ids) in zip(clients, accounts)]
+
+    print('Running {} users for {}s ({}s warmup), mix {}...'.format(
+        args.users, args.duration, args.warmup, args.mix))
+    started = time.time()
+    deadline = started + args.warmup + args.duration
+    tasks = [asyncio.ensure_future(run_user(user, weights, recorder, deadline, args.think_time))
+             for user in users]
+    await asyncio.sleep(args.warmup)
+    recorder.recording = True
+    measured = time.time()
+    await asyncio.gather(*tasks)
+    duration = time.time() - measured
+
+    for client in clients:
+        await client.close()
+
+    endpoints, total = recorder.report(duration)
+    return {
+        'format': REPORT_FORMAT,
+        'run': {
+            'started': datetime.utcfromtimestamp(started).isoformat() + 'Z',
+            'url': args.url,
+            'mix': args.mix,
+            'weights': weights,
+            'users': args.users,
+            'duration': round(duration, 2),
+            'warmup': args.warmup,
+            'batch_size': args.batch_size,
+            'think_time': args.think_time,
+            'seed': args.seed,
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'machine': platform.machine()
+        },
+        'seeded': seeded,
+        'endpoints': endpoints,
+        'total': total
+    }
+
+
+def print_report(report):
+    print('{:<38} {:>8} {:>8} {:>8} {:>9} {:>9} {:>9}'.format(
+        'endpoint', 'requests', 'req/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for op, stats in sorted(report['endpoints'].items()):
+        latency = stats['latency_ms']
+        print('{:<38} {:>8} {:>8.2f} {:>7.1%} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            stats['endpoint'], stats['requests'], stats['throughput_rps'], stats['error_rate'],
+            latency['p50'], latency['p95'], latency['p99']))
+    total = report['total']
+    print('{:<38} {:>8} {:>8.2f} {:>7.1%}'.format(
+        'total', total['requests'], total['throughput_rps'], total['error_rate']))
+
+
+def compare(report, baseline, threshold):
+    """Print p95 and throughput against an earlier report, returns list of regressions"""
+    regressions = []
+    for op, stats in sorted(report['endpoints'].items()):
+        base = baseline.get('endpoints', {}).get(op)
+        if not base:
+            print('{:<38} no baseline'.format(stats['endpoint']))
+            continue
+        p95, base_p95 = stats['latency_ms']['p95'], base['latency_ms']['p95']
+        ratio = p95 / base_p95 if base_p95 else 1.0
+        flag = ''
+        if ratio > threshold or stats['error_rate'] > base['error_rate'] + 0.01:
+            flag = '  REGRESSION'
+            regressions.append((op, ratio))
+        print('{:<38} p95 {:>8.1f}ms vs {:>8.1f}ms  x{:.2f}  {:>7.2f} vs {:>7.2f} req/s  errors {:.1%} vs {:.1%}{}'.format(
+            stats['endpoint'], p95, base_p95, ratio, stats['throughput_rps'], base['throughput_rps'],
+            stats['error_rate'], base['error_rate'], flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the BAPS backend API')
+    parser.add_argument('--url', default=DEFAULT_URL, help='backend API URL (default: %(default)s)')
+    parser.add_argument('--users', type=int, default=10, help='concurrent GC users (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=60, help='measured seconds (default: %(default)s)')
+    parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds first (default: %(default)s)')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='balanced', help='operation mix (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=500, help='elements per sync batch (default: %(default)s)')
+    parser.add_argument('--subcontractors', type=int, default=60, help='seeded subcontractors (default: %(default)s)')
+    parser.add_argument('--projects', type=int, default=3, help='seeded projects per user (default: %(default)s)')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='mean pause between a user\'s requests in seconds (default: none)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for generated data (default: %(default)s)')
+    parser.add_argument('--json', metavar='FILE', help='write the report as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare with an earlier JSON report')
+    parser.add_argument('--threshold', type=float, default=1.25, help='p95 regression ratio (default 1.25)')
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print('')
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print('{} endpoint(s) regressed against {}'.format(len(regressions), args.compare))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the extraction and sync pipeline (runs outside Revit)
+
+Times ElementExtractor, ScheduleExtractor, convert_schedule_to_elements,
+LinkExtractor (cold and cached), JSON serialization and BAPSClient upload on synthetic models, using fake
+Autodesk.Revit.DB stand-ins and a local stub of the batch endpoint.
+
+Usage:
+    python benchmarks/run_benchmarks.py                    # quick preset
+    python benchmarks/run_benchmarks.py --preset full      # 1k .. 500k elements
+    python benchmarks/run_benchmarks.py --save-baseline    # store results as baseline
+    python benchmarks/run_benchmarks.py --compare          # compare against baseline
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'fake_revit'))
+sys.path.insert(0, os.path.join(HERE, '..', 'lib'))
+sys.path.insert(0, HERE)
+
+from element_extractor import ElementExtractor, CATEGORY_FILTERS
+from link_extractor import LinkExtractor, LinkCache
+from schedule_extractor import ScheduleExtractor, convert_schedule_to_elements
+from api_client import BAPSClient
+
+from synthetic_model import build_model, build_linked_model
+from stub_server import StubServer
+
+BASELINE_FILE = os.path.join(HERE, 'baselines.json')
+
+# Linked models per host in the link stages (each with a quarter of the case's elements)
+LINK_COUNT = 2
+
+# (model elements, schedule rows) per case
+PRESETS = {
+    'quick': [(1000, 10), (10000, 1000)],
+    'full': [(1000, 10), (10000, 1000), (100000, 5000), (500000, 20000)]
+}
+
+
+def extract_elements(doc):
+    extractor = ElementExtractor(doc)
+    elements = []
+    elements.extend(extractor.extract_walls())
+    elements.extend(extractor.extract_doors())
+    elements.extend(extractor.extract_windows())
+    elements.extend(extractor.extract_structural())
+    return elements
+
+
+def extract_schedules(doc):
+    return ScheduleExtractor(doc).extract_all_schedules_data()
+
+
+def convert_schedules(schedules):
+    elements = []
+    for schedule_data in schedules:
+        elements.extend(convert_schedule_to_elements(schedule_data))
+    return elements
+
+
+def extract_links(doc, cache_dir):
+    return LinkExtractor(doc, cache=LinkCache(cache_dir)).extract(sorted(CATEGORY_FILTERS))
+
+
+def extract_links_cold(doc):
+    cache_dir = tempfile.mkdtemp()
+    try:
+        return extract_links(doc, cache_dir)
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def serialize(elements):
+    return json.dumps({'elements': elements}).encode('utf-8')
+
+
+def measure(func, *args, **kwargs):
+    """Run func once for time, once more under tracemalloc for peak memory"""
+    track_memory = kwargs.pop('track_memory', True)
+
+    gc.collect()
+    started = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - started
+
+    peak_kb = None
+    if track_memory:
+        gc.collect()
+        tracemalloc.start()
+        func(*args)
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024.0
+        tracemalloc.stop()
+
+    return result, {'seconds': round(seconds, 4), 'peak_kb': round(peak_kb, 1) if peak_kb is not None else None}
+
+
+def run_case(element_count, schedule_rows, track_memory=True):
+    """Run every stage on one synthetic model, returns {stage: metrics}"""
+    doc = build_model(element_count, schedule_rows)
+    stages = {}
+
+    elements, stages['extract_elements'] = measure(extract_elements, doc, track_memory=track_memory)
+    schedules, stages['extract_schedules'] = measure(extract_schedules, doc, track_memory=track_memory)
+    schedule_elements, stages['convert_schedules'] = measure(convert_schedules, schedules, track_memory=track_memory)
+
+    linked = build_linked_model(element_count // (2 * LINK_COUNT), LINK_COUNT)
+    _, stages['extract_links'] = measure(extract_links_cold, linked, track_memory=track_memory)
+    cache_dir = tempfile.mkdtemp()
+    try:
+        extract_links(linked, cache_dir)
+        # Unchanged links are skipped entirely: only the version check and cache read remain
+        _, stages['extract_links_warm'] = measure(extract_links, linked, cache_dir, track_memory=track_memory)
+    finally:
+        shutil.rmtree(cache_dir)
+
+    all_elements = elements + schedule_elements
+    payload, stages['serialize'] = measure(serialize, all_elements, track_memory=track_memory)
+    stages['serialize']['bytes'] = len(payload)
+
+    with StubServer() as server:
+        client = BAPSClient(base_url=server.base_url, token='benchmark')
+        _, stages['upload'] = measure(client.create_elements_batch, all_elements, track_memory=track_memory)
+        stages['upload']['bytes'] = server.bytes_received // server.requests_received
+
+    return stages
+
+
+def case_key(element_count, schedule_rows):
+    return '{}el_{}rows'.format(element_count, schedule_rows)
+
+
+def compare(results, baselines, threshold, min_seconds):
+    """Print ratios against baseline, returns list of regressions"""
+    regressions = []
+    for key, stages in results.items():
+        base_stages = baselines.get(key)
+        if not base_stages:
+            print('{:<22} no baseline'.format(key))
+            continue
+        for stage, metrics in stages.items():
+            base = base_stages.get(stage)
+            if not base or not base.get('seconds'):
+                continue
+            ratio = metrics['seconds'] / base['seconds']
+            flag = ''
+            # Stages faster than min_seconds are too noisy to flag
+            if ratio > threshold and base['seconds'] >= min_seconds:
+                flag = '  REGRESSION'
+                regressions.append((key, stage, ratio))
+            print('{:<22} {:<18} {:>9.4f}s vs {:>9.4f}s  x{:.2f}{}'.format(
+                key, stage, metrics['seconds'], base['seconds'], ratio, flag))
+    return regressions
+
+
+def print_results(results):
+    print('{:<22} {:<18} {:>10} {:>12} {:>12}'.format('case', 'stage', 'seconds', 'peak KB', 'bytes'))
+    for key, stages in results.items():
+        for stage, metrics in stages.items():
+            print('{:<22} {:<18} {:>10.4f} {:>12} {:>12}'.format(
+                key, stage, metrics['seconds'],
+                metrics['peak_kb'] if metrics['peak_kb'] is not None else '-',
+                metrics.get('bytes', '')))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the BAPS extraction and sync pipeline')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick')
+    parser.add_argument('--case', action='append', metavar='ELEMENTS:ROWS',
+                        help='custom case, e.g. 50000:2000 (repeatable)')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc peak memory pass')
+    parser.add_argument('--save-baseline', action='store_true', help='store results in baselines.json')
+    parser.add_argument('--compare', action='store_true', help='compare results with baselines.json')
+    parser.add_argument('--threshold', type=float, default=1.25, help='regression ratio (default 1.25)')
+    parser.add_argument('--min-seconds', type=float, default=0.01,
+                        help='ignore stages faster than this in the baseline (default 0.01)')
+    parser.add_argument('--json', metavar='FILE', help='write results as JSON')
+    args = parser.parse_args(argv)
+
+    cases = [tuple(int(v) for v in c.split(':')) for c in args.case] if args.case else PRESETS[args.preset]
+
+    results = {}
+    for element_count, schedule_rows in cases:
+        results[case_key(element_count, schedule_rows)] = run_case(
+            element_count, schedule_rows, track_memory=not args.no_memory)
+
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines.setdefault('cases', {}).update(results)
+        baselines['environment'] = {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'system': platform.system()
+        }
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print('Baseline saved to {}'.format(BASELINE_FILE))
+
+    if args.compare:
+        print('')
+        regressions = compare(results, baselines.get('cases', {}), args.threshold, args.min_seconds)
+        if regressions:
+            print('{} stage(s) slower than x{:.2f} baseline'.format(len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Local stub of the BAPS batch endpoint for upload benchmarks"""
+
+import gzip
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        started = time.time()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.bytes_received += len(body)
+        self.server.requests_received += 1
+
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        elements = json.loads(body.decode('utf-8')).get('elements', [])
+
+        self._send_json(201, {
+            'message': 'Successfully created {} elements'.format(len(elements)),
+            'count': len(elements)
+        }, {'Server-Timing': 'total;dur={:.1f}'.format((time.time() - started) * 1000)})
+
+    def do_GET(self):
+        self._send_json(200, [])
+
+
+class StubServer:
+    """Run the stub on a free local port in a background thread"""
+
+    def __init__(self):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self._httpd.bytes_received = 0
+        self._httpd.requests_received = 0
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{}/api'.format(self._httpd.server_address[1])
+
+    @property
+    def bytes_received(self):
+        return self._httpd.bytes_received
+
+    @property
+    def requests_received(self):
+        return self._httpd.requests_received
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Synthetic Revit models for benchmarking extraction and sync"""
+
+import random
+
+from Autodesk.Revit.DB import (
+    BuiltInCategory, Document, FamilyInstance, RevitLinkInstance, ViewSchedule, Wall, XYZ
+)
+
+# Share of each category in a synthetic model
+CATEGORY_MIX = [
+    (BuiltInCategory.OST_Walls, 0.4),
+    (BuiltInCategory.OST_Doors, 0.2),
+    (BuiltInCategory.OST_Windows, 0.2),
+    (BuiltInCategory.OST_StructuralFraming, 0.2)
+]
+
+WALL_TYPES = ['Basic Wall: Concrete 200mm', 'Basic Wall: Generic - 150mm',
+              'Basic Wall: Interior - 125mm Partition (1-hr)', 'Curtain Wall: _Not Defined']
+SCHEDULE_HEADERS = ['Area', 'Family and Type', 'Material Costs', 'Labor Costs',
+                    'Total Material Costs', 'Total Labor Costs', 'Total Construction Costs']
+
+
+def _common_parameters(rng, index):
+    return {
+        'Mark': 'M-{}'.format(index),
+        'Comments': 'Synthetic element {}'.format(index) if index % 3 == 0 else None,
+        'Level': 'Level {}'.format(index % 12 + 1),
+        'Phase Created': 'New Construction'
+    }
+
+
+def _make_element(rng, element_id, category):
+    params = _common_parameters(rng, element_id)
+
+    if category == BuiltInCategory.OST_Walls:
+        length = rng.uniform(1.0, 20.0)
+        height = rng.uniform(2.5, 4.0)
+        params.update({
+            'Unconnected Height': height,
+            'Length': length,
+            'Area': length * height,
+            'Volume': length * height * 0.2
+        })
+        type_name = rng.choice(WALL_TYPES)
+        return Wall(element_id, type_name.split(': ')[-1], category, params, type_name)
+
+    if category in (BuiltInCategory.OST_Doors, BuiltInCategory.OST_Windows):
+        params.update({'Width': rng.uniform(0.6, 2.0), 'Height': rng.uniform(1.0, 2.4)})
+        name = 'Single-Flush 0915 x 2134mm' if category == BuiltInCategory.OST_Doors else 'Fixed 0915 x 1220mm'
+        return FamilyInstance(element_id, name, category, params, name)
+
+    params.update({'Length': rng.uniform(2.0, 12.0), 'Structural Material': 'Steel ASTM A992'})
+    return FamilyInstance(element_id, 'W310X38.7', category, params, 'W-Wide Flange: W310X38.7')
+
+
+def _schedule_rows(rng, row_count):
+    rows = [list(SCHEDULE_HEADERS)]
+    for _ in range(row_count):
+        area = rng.uniform(0.5, 60.0)
+        material, labor = rng.choice([(4.0, 11.0), (3.0, 11.0), (2.0, 11.0), (5.0, 15.0)])
+        rows.append([
+            '{:.0f} m²'.format(area),
+            rng.choice(WALL_TYPES),
+            '{:.2f}'.format(material),
+            '{:.2f}'.format(labor),
+            '{:.2f}'.format(area * material),
+            '{:.2f}'.format(area * labor),
+            '{:.2f}'.format(area * (material + labor))
+        ])
+    return rows
+
+
+def build_model(element_count, schedule_rows=0, seed=42, links=None):
+    """
+    Build a fake Revit document
+    element_count: number of model elements, split over walls/doors/windows/framing
+    schedule_rows: number of body rows of a cost takeoff schedule (0 for none)
+    links: optional list of linked models (documents), each placed as one link instance
+    """
+    rng = random.Random(seed)
+    doc = Document('Synthetic {} elements'.format(element_count))
+
+    element_id = 1000
+    for category, share in CATEGORY_MIX:
+        for _ in range(int(element_count * share)):
+            element_id += 1
+            doc.add(_make_element(rng, element_id, category))
+
+    if schedule_rows:
+        element_id += 1
+        doc.add(ViewSchedule(element_id, 'Wall Quantity Takeoffs & Cost Estimates',
+                             _schedule_rows(rng, schedule_rows)))
+
+    for index, link_doc in enumerate(links or []):
+        element_id += 1
+        doc.add(RevitLinkInstance(element_id, '{} : 1'.format(link_doc.Title), link_doc,
+                                  XYZ(100.0 * index, 0.0, 0.0)))
+
+    return doc
+
+
+def build_linked_model(element_count, link_count, seed=42):
+    """Build a host model with link_count linked models of element_count elements each"""
+    links = []
+    for index in range(link_count):
+        link_doc = build_model(element_count, seed=seed + index + 1)
+        link_doc.Title = 'Link {}'.format(index + 1)
+        link_doc.PathName = 'C:\\Projects\\Synthetic\\Link {}.rvt'.format(index + 1)
+        links.append(link_doc)
+    return build_model(0, seed=seed, links=links)
@@ -19,82 +19,155 @@ except ImportError:
     from io import BytesIO as StringIO
     PY2 = False
 
+from sync_metrics import NullMetrics
+
+# Request bodies larger than this are sent gzip compressed
+COMPRESS_MIN_BYTES = 64 * 1024
+
+
+def _gzip_bytes(data):
+    """Gzip compress a byte string"""
+    buf = StringIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=6) as f:
+        f.write(data)
+    return buf.getvalue()
+
+
+def _parse_server_timing(header):
+    """Total server duration in seconds from a Server-Timing header, None if absent"""
+    if not header:
+        return None
+    durations = {}
+    for metric in header.split(','):
+        parts = [p.strip() for p in metric.split(';')]
+        for part in parts[1:]:
+            if part.startswith('dur='):
+                try:
+                    durations[parts[0]] = float(part[4:]) / 1000.0
+                except ValueError:
+                    pass
+    if not durations:
+        return None
+    return durations.get('total', sum(durations.values()))
+
+
+class APIError(Exception):
+    """Error response from the backend, status is the HTTP status code"""
+
+    def __init__(self, message, status=None):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+def is_auth_error(error):
+    """Check if an error means the session is no longer valid"""
+    if getattr(error, 'status', None) == 401:
+        return True
+    error_msg = str(error)
+    return ('Unauthorized' in error_msg or '401' in error_msg or
+            'Invalid token' in error_msg or 'expired' in error_msg.lower())
 
-class BAPSClient:
-    """Client for BAPS Backend API"""
-    
-    def __init__(self, base_url='http://localhost:3001/api', token=None):
-        self.base_url = base_url
-        self.token = token
-    
-    def _decompress_if_needed(self, data):
-        """Decompress data if it's gzip or deflate compressed"""
-        try:
-            # Check for gzip magic number (0x1f 0x8b)
-            if data[:2] == b'\x1f\x8b':
-                return gzip.GzipFile(fileobj=StringIO(data)).read()
-        except:
-            pass
 
+def _decompress_if_needed(data):
+    """Decompress data if it's gzip or deflate compressed"""
+    try:
+        # Check for gzip magic number (0x1f 0x8b)
+        if data[:2] == b'\x1f\x8b':
+            return gzip.GzipFile(fileobj=StringIO(data)).read()
+    except:
+        pass
+
+    try:
+        # Try deflate decompression
+        return zlib.decompress(data)
+    except:
+        pass
+
+    # Return as-is if not compressed
+    return data
+
+
+def decode_response(data):
+    """Decode response data with encoding fallback"""
+    # First try to decompress if needed
+    data = _decompress_if_needed(data)
+
+    # Try different encodings
+    for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'iso-8859-1', 'cp1252']:
         try:
-            # Try deflate decompression
-            return zlib.decompress(data)
-        except:
-            pass
-
-        # Return as-is if not compressed
-        return data
-
-    def _decode_response(self, data):
-        """Decode response data with encoding fallback"""
-        # First try to decompress if needed
-        data = self._decompress_if_needed(data)
-
-        # Try different encodings
-        for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'iso-8859-1', 'cp1252']:
-            try:
-                return data.decode(encoding)
-            except (UnicodeDecodeError, AttributeError):
-                continue
-
-        # If all else fails, return with errors ignored
-        return data.decode('utf-8', errors='ignore')
-
-    def _make_request(self, endpoint, method='GET', data=None):
-        """Make HTTP request to API"""
-        url = '{}/{}'.format(self.base_url, endpoint)
+            return data.decode(encoding)
+        except (UnicodeDecodeError, AttributeError):
+            continue
+
+    # If all else fails, return with errors ignored
+    return data.decode('utf-8', errors='ignore')
 
-        headers = {
-            'Content-Type': 'application/json',
-            'Accept-Encoding': 'identity'  # Disable automatic compression to avoid encoding issues
-        }
 
-        if self.token:
-            headers['Authorization'] = 'Bearer {}'.format(self.token)
+def parse_response(text):
+    """Parse a decoded success response body"""
+    return json.loads(text) if text else {}
 
-        if data:
+
+def error_from_response(status, text):
+    """Build the APIError for an error response body"""
+    try:
+        error_json = json.loads(text)
+        # Handle nested error object structure from backend
+        if isinstance(error_json.get('error'), dict):
+            error_message = error_json['error'].get('message', 'Request failed')
+        else:
+            error_message = error_json.get('error', error_json.get('message', 'Request failed'))
+    except (ValueError, KeyError, AttributeError):
+        return APIError('HTTP Error {}: {}'.format(status, text), status)
+    return APIError(error_message, status)
+
+
+def request_headers(token=None):
+    """Headers sent with every request"""
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept-Encoding': 'identity'  # Disable automatic compression to avoid encoding issues
+    }
+    if token:
+        headers['Authorization'] = 'Bearer {}'.format(token)
+    return headers
+
+
+def encode_body(data=None, body=None, compress_min_bytes=COMPRESS_MIN_BYTES, metrics=None):
+    """
+    Serialize and optionally compress a request body
+    data: JSON-serializable request data
+    body: already serialized JSON request body (bytes), used instead of data
+    Returns: (body bytes or None, extra headers)
+    """
+    metrics = metrics or NullMetrics()
+    headers = {}
+
+    if body is not None:
+        data = body
+    elif data:
+        with metrics.span('serialize'):
             data = json.dumps(data).encode('utf-8')
 
-        req = Request(url, data=data, headers=headers)
-        req.get_method = lambda: method
+    if not data:
+        return None, headers
+
+    if compress_min_bytes is not None and len(data) >= compress_min_bytes:
+        with metrics.span('compress'):
+            data = _gzip_bytes(data)
+        headers['Content-Encoding'] = 'gzip'
+
+    metrics.incr('bytes_sent', len(data))
+    return data, headers
+
+
+class BAPSEndpoints:
+    """
+    Backend endpoints, shared by BAPSClient and AsyncBAPSClient
+    Subclasses implement _make_request(endpoint, method, data=None, body=None); with an
+    async _make_request every method here returns an awaitable instead of the result.
+    """
 
-        try:
-            response = urlopen(req)
-            response_data = self._decode_response(response.read())
-            return json.loads(response_data) if response_data else {}
-        except HTTPError as e:
-            error_data = self._decode_response(e.read())
-            try:
-                error_json = json.loads(error_data)
-                # Handle nested error object structure from backend
-                if isinstance(error_json.get('error'), dict):
-                    error_message = error_json['error'].get('message', 'Request failed')
-                else:
-                    error_message = error_json.get('error', error_json.get('message', 'Request failed'))
-                raise Exception(error_message)
-            except (ValueError, KeyError):
-                raise Exception('HTTP Error {}: {}'.format(e.code, error_data))
-    
     def login(self, email, password):
         """Login to backend"""
         data = {
@@ -103,13 +176,14 @@ class BAPSClient:
         }
         return self._make_request('auth/login', method='POST', data=data)
     
-    def register(self, email, password, role='GC_USER'):
-        """Register new user"""
+    def register(self, email, password, role='GC_USER', **profile):
+        """Register new user, profile: optional firstName, lastName, phone"""
         data = {
             'email': email,
             'password': password,
             'role': role
         }
+        data.update(profile)
         return self._make_request('auth/register', method='POST', data=data)
     
     def get_elements(self):
@@ -125,7 +199,93 @@ class BAPSClient:
         data = {'elements': elements}
         return self._make_request('elements/batch', method='POST', data=data)
 
+    def post_batch_payload(self, payload):
+        """Send a pre-serialized batch body ({"elements": [...]} as JSON bytes)"""
+        return self._make_request('elements/batch', method='POST', body=payload)
+
     def get_pricing_suggestion(self, element_id):
         """Get AI pricing suggestion for element"""
         endpoint = 'elements/{}/pricing/suggest'.format(element_id)
         return self._make_request(endpoint, method='POST')
+
+    def get_projects(self, limit=10, offset=0):
+        """List projects"""
+        return self._make_request('projects?limit={}&offset={}'.format(limit, offset), method='GET')
+
+    def create_project(self, project_data):
+        """Create new project (General Contractor)"""
+        return self._make_request('projects', method='POST', data=project_data)
+
+    def find_matches(self, project_id):
+        """Find and score matching subcontractors for a project"""
+        return self._make_request('matches/projects/{}/find'.format(project_id), method='GET')
+
+    def get_subcontractors(self, limit=10, offset=0):
+        """List subcontractors"""
+        return self._make_request('sc?limit={}&offset={}'.format(limit, offset), method='GET')
+
+    def add_availability(self, subcontractor_id, availability_data):
+        """Add availability and rates for a subcontractor"""
+        endpoint = 'sc/{}/availability'.format(subcontractor_id)
+        return self._make_request(endpoint, method='POST', data=availability_data)
+
+
+class BAPSClient(BAPSEndpoints):
+    """Client for BAPS Backend API"""
+    
+    def __init__(self, base_url='http://localhost:3001/api', token=None, metrics=None,
+                 compress_min_bytes=COMPRESS_MIN_BYTES, response_cache=None):
+        """
+        metrics: optional SyncMetrics collecting serialize/compress/network/server spans
+        compress_min_bytes: gzip request bodies above this size (None disables compression)
+        response_cache: optional ResponseCache; GETs are then sent conditionally and
+                        a 304 Not Modified is answered from the cached body
+        """
+        self.base_url = base_url
+        self.token = token
+        self.metrics = metrics or NullMetrics()
+        self.compress_min_bytes = compress_min_bytes
+        self.response_cache = response_cache
+
+    def _make_request(self, endpoint, method='GET', data=None, body=None):
+        """
+        Make HTTP request to API
+        data: JSON-serializable request data
+        body: already serialized JSON request body (bytes), used instead of data
+        """
+        url = '{}/{}'.format(self.base_url, endpoint)
+
+        headers = request_headers(self.token)
+        data, body_headers = encode_body(data, body, self.compress_min_bytes, self.metrics)
+        headers.update(body_headers)
+
+        cache = self.response_cache if method == 'GET' else None
+        if cache:
+            headers.update(cache.validators(url, self.token))
+
+        req = Request(url, data=data, headers=headers)
+        req.get_method = lambda: method
+
+        try:
+            with self.metrics.span('network'):
+                response = urlopen(req)
+                raw = response.read()
+            self.metrics.incr('bytes_received', len(raw))
+
+            server_time = _parse_server_timing(response.info().get('Server-Timing'))
+            if server_time is not None:
+                self.metrics.add_time('server', server_time)
+
+            response_data = decode_response(raw)
+            if cache:
+                info = response.info()
+                cache.put(url, self.token, info.get('ETag'), info.get('Last-Modified'), response_data)
+            return parse_response(response_data)
+        except HTTPError as e:
+            if e.code == 304 and cache:
+                # urllib raises on 304; the cached body is still current
+                entry = cache.get(url, self.token)
+                if entry is not None:
+                    self.metrics.incr('responses_not_modified')
+                    return parse_response(entry['body'])
+            raise error_from_response(e.code, decode_response(e.read()))
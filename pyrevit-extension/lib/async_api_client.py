@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+Async API Client for BAPS Backend (CPython 3.7+, for tools and services - not the Revit buttons)
+
+Same endpoints, request encoding, response decoding and errors as BAPSClient, on asyncio:
+keep-alive connections are reused per host, a semaphore bounds the requests in flight,
+request bodies can be streamed and failed requests are retried according to a RetryPolicy.
+
+Usage:
+    async with AsyncBAPSClient(token=token, concurrency=8) as client:
+        suggestions = await asyncio.gather(*[client.get_pricing_suggestion(i) for i in ids])
+"""
+
+import asyncio
+import json
+import random
+import ssl
+import zlib
+from urllib.parse import urlsplit
+
+from api_client import (BAPSEndpoints, COMPRESS_MIN_BYTES, _parse_server_timing, decode_response,
+                        encode_body, error_from_response, parse_response, request_headers)
+from sync_metrics import NullMetrics
+
+# Streamed request bodies are written in chunks of about this size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Errors raised when a connection fails, times out or is closed mid-response
+CONNECTION_ERRORS = (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError)
+
+
+class RetryPolicy:
+    """
+    When and how often to retry a failed request
+    Connection errors before the request was sent and 429/503 (not processed) are always
+    retried; other retryable statuses and mid-request failures only for idempotent methods.
+    """
+
+    def __init__(self, attempts=3, backoff=0.5, max_backoff=10.0,
+                 statuses=(429, 502, 503, 504), methods=('GET', 'HEAD', 'PUT', 'DELETE')):
+        """
+        attempts: total attempts per request (1 disables retries)
+        backoff: delay before the first retry in seconds, doubled for each further retry
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.methods = methods
+
+    def should_retry(self, attempt, method, status=None, sent=True):
+        """Check if attempt (1-based) may be followed by another one"""
+        if attempt >= self.attempts:
+            return False
+        if status is None:
+            return not sent or method in self.methods
+        if status not in self.statuses:
+            return False
+        return status in (429, 503) or method in self.methods
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait after the given failed attempt"""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.backoff * (2 ** (attempt - 1)), self.max_backoff)
+        # Jitter so concurrent requests do not retry in lockstep
+        return delay * random.uniform(0.5, 1.0)
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def _retry_after(headers):
+    """Retry-After in seconds (delta form only), None if absent"""
+    try:
+        return max(0.0, float(headers.get('retry-after')))
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_batch_body(elements, chunk_bytes=STREAM_CHUNK_BYTES):
+    """
+    Serialize {"elements": [...]} incrementally as JSON byte chunks
+    The complete body is never held in memory, only about chunk_bytes at a time.
+    """
+    parts = [b'{"elements":[']
+    size = len(parts[0])
+    for index, element in enumerate(elements):
+        part = (b',' if index else b'') + json.dumps(element).encode('utf-8')
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_bytes:
+            yield b''.join(parts)
+            parts = []
+            size = 0
+    parts.append(b']}')
+    yield b''.join(parts)
+
+
+class _Connection:
+    """One HTTP/1.1 connection"""
+
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    @property
+    def usable(self):
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)"""
+
+    def __init__(self, max_idle=8, connect_timeout=10.0, ssl_context=None):
+        self.max_idle = max_idle
+        self.connect_timeout = connect_timeout
+        self.ssl_context = ssl_context
+        self._idle = {}
+
+    async def acquire(self, scheme, host, port):
+        """Get an idle connection to the host, or open a new one"""
+        key = (scheme, host, port)
+        idle = self._idle.get(key, [])
+        while idle:
+            conn = idle.pop()
+            if conn.usable:
+                conn.reused = True
+                return conn
+            conn.close()
+
+        ssl_context = None
+        if scheme == 'https':
+            ssl_context = self.ssl_context or ssl.create_default_context()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ssl_context), self.connect_timeout)
+        return _Connection(key, reader, writer)
+
+    def release(self, conn, reusable):
+        """Return a connection after a complete response, closing it if it cannot be reused"""
+        idle = self._idle.setdefault(conn.key, [])
+        if reusable and conn.usable and len(idle) < self.max_idle:
+            idle.append(conn)
+        else:
+            conn.close()
+
+    async def close(self):
+        """Close all idle connections"""
+        connections = [conn for idle in self._idle.values() for conn in idle]
+        self._idle = {}
+        for conn in connections:
+            conn.close()
+        for conn in connections:
+            try:
+                await conn.writer.wait_closed()
+            except Exception:
+                pass
+
+
+class AsyncBAPSClient(BAPSEndpoints):
+    """
+    Async client for BAPS Backend API
+    All BAPSClient endpoint methods are coroutines here, with identical results and APIErrors.
+    """
+
+    def __init__(self, base_url='http://localhost:3001/api', token=None, metrics=None,
+                 compress_min_bytes=COMPRESS_MIN_BYTES, response_cache=None,
+                 concurrency=8, retry=None, timeout=60.0, connect_timeout=10.0, ssl_context=None):
+        """
+        metrics: optional SyncMetrics; spans overlap between concurrent requests
+        compress_min_bytes: gzip request bodies above this size (None disables compression)
+        response_cache: optional ResponseCache for conditional GETs, as in BAPSClient
+        concurrency: maximum requests in flight (and idle connections kept open)
+        retry: RetryPolicy, defaults to 3 attempts; NO_RETRY disables retries
+        timeout: seconds for one attempt (connect, send and receive)
+        """
+        self.base_url = base_url
+        self.token = token
+        self.metrics = metrics or NullMetrics()
+        self.compress_min_bytes = compress_min_bytes
+        self.response_cache = response_cache
+        self.concurrency = concurrency
+        self.retry = retry or RetryPolicy()
+        self.timeout = timeout
+        self.pool = ConnectionPool(max_idle=concurrency, connect_timeout=connect_timeout,
+                                   ssl_context=ssl_context)
+        # Created on first use, inside the running event loop
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+    async def close(self):
+        """Close pooled connections"""
+        await self.pool.close()
+
+    def stream_elements_batch(self, elements):
+        """
+        Create multiple elements in a single batch request, serializing the body while it is sent
+        elements: list (or other re-iterable sequence) of element dicts
+        """
+        return self._make_request('elements/batch', method='POST',
+                                  stream=lambda: iter_batch_body(elements))
+
+    async def _make_request(self, endpoint, method='GET', data=None, body=None, stream=None):
+        """
+        Make HTTP request to API
+        data: JSON-serializable request data
+        body: already serialized JSON request body (bytes), used instead of data
+        stream: callable returning an iterable or async iterable of body chunks (bytes),
+                called again for each retry; sent with chunked transfer encoding
+        """
+        url = '{}/{}'.format(self.base_url, endpoint)
+
+        headers = request_headers(self.token)
+        if stream is None:
+            body, body_headers = encode_body(data, body, self.compress_min_bytes, self.metrics)
+            headers.update(body_headers)
+        elif self.compress_min_bytes is not None:
+            # Size is unknown upfront, so streamed bodies are always compressed
+            headers['Content-Encoding'] = 'gzip'
+
+        cache = self.response_cache if method == 'GET' else None
+        if cache:
+            headers.update(cache.validators(url, self.token))
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            progress = {'sent': False}
+            try:
+                async with self._semaphore:
+                    with self.metrics.span('network'):
+                        status, response_headers, raw = await asyncio.wait_for(
+                            self._exchange(method, url, headers, body, stream, progress), self.timeout)
+            except CONNECTION_ERRORS:
+                if not self.retry.should_retry(attempt, method, sent=progress['sent']):
+                    raise
+                self.metrics.incr('retries')
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+
+            self.metrics.incr('bytes_received', len(raw))
+            server_time = _parse_server_timing(response_headers.get('server-timing'))
+            if server_time is not None:
+                self.metrics.add_time('server', server_time)
+
+            if 200 <= status < 300:
+                response_data = decode_response(raw)
+                if cache:
+                    cache.put(url, self.token, response_headers.get('etag'),
+                              response_headers.get('last-modified'), response_data)
+                return parse_response(response_data)
+
+            if status == 304 and cache:
+                entry = cache.get(url, self.token)
+                if entry is not None:
+                    self.metrics.incr('responses_not_modified')
+                    return parse_response(entry['body'])
+
+            error = error_from_response(status, decode_response(raw))
+            if not self.retry.should_retry(attempt, method, status=status):
+                raise error
+            self.metrics.incr('retries')
+            await asyncio.sleep(self.retry.delay(attempt, _retry_after(response_headers)))
+
+    async def _exchange(self, method, url, headers, body, stream, progress):
+        """Send one request and read its response, returns (status, headers, body bytes)"""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        while True:
+            conn = await self.pool.acquire(parts.scheme, parts.hostname, port)
+            received = {'status': False}
+            try:
+                await self._send(conn, method, parts.netloc, target, headers, body, stream, progress)
+                status, response_headers, raw, keep_alive = await self._receive(conn, method, received)
+            except CONNECTION_ERRORS:
+                conn.close()
+                if conn.reused and not received['status']:
+                    # The server closed the idle keep-alive connection; nothing was processed
+                    progress['sent'] = False
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            self.pool.release(conn, keep_alive)
+            return status, response_headers, raw
+
+    async def _send(self, conn, method, host, target, headers, body, stream, progress):
+        lines = ['{} {} HTTP/1.1'.format(method, target), 'Host: {}'.format(host),
+                 'Connection: keep-alive']
+        lines.extend('{}: {}'.format(name, value) for name, value in headers.items())
+        if stream is not None:
+            lines.append('Transfer-Encoding: chunked')
+        elif body is not None:
+            lines.append('Content-Length: {}'.format(len(body)))
+        elif method in ('POST', 'PUT', 'PATCH'):
+            lines.append('Content-Length: 0')
+
+        writer = conn.writer
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        progress['sent'] = True
+
+        if stream is None:
+            if body is not None:
+                writer.write(body)
+            await writer.drain()
+            return
+
+        compressor = None
+        if headers.get('Content-Encoding') == 'gzip':
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+        async def write_chunk(chunk):
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                self.metrics.incr('bytes_sent', len(chunk))
+                writer.write(b'%x\r\n' % len(chunk) + chunk + b'\r\n')
+                await writer.drain()
+
+        chunks = stream()
+        if hasattr(chunks, '__aiter__'):
+            async for chunk in chunks:
+                await write_chunk(chunk)
+        else:
+            for chunk in chunks:
+                await write_chunk(chunk)
+
+        if compressor:
+            tail = compressor.flush()
+            self.metrics.incr('bytes_sent', len(tail))
+            writer.write(b'%x\r\n' % len(tail) + tail + b'\r\n')
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def _receive(self, conn, method, received):
+        """Read one response, returns (status, headers, body bytes, keep_alive)"""
+        reader = conn.reader
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError('Connection closed by server')
+            received['status'] = True
+            version, status = status_line.decode('latin-1').split(None, 2)[:2]
+            status = int(status)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if status >= 200:
+                break
+            # 1xx interim response (100 Continue), the real one follows
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+
+        if method == 'HEAD' or status in (204, 304):
+            body = b''
+        elif 'chunked' in headers.get('transfer-encoding', '').lower():
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0].strip(), 16)
+                if size == 0:
+                    # Skip trailers
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b''.join(parts)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            # Delimited by connection close
+            body = await reader.read()
+            keep_alive = False
+
+        return status, headers, body, keep_alive
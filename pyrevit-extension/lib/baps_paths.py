@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""Local storage locations for BAPS data (%APPDATA%\\BAPS)"""
+
+import os
+
+
+def get_baps_dir(*parts):
+    """Get (and create) a directory under %APPDATA%\\BAPS"""
+    root = os.getenv('APPDATA') or os.path.expanduser('~')
+    path = os.path.join(root, 'BAPS', *parts)
+    if not os.path.exists(path):
+        os.makedirs(path)
+    return path
+
+
+def get_config_file():
+    """Get path of the authentication config file"""
+    return os.path.join(get_baps_dir(), 'config.json')
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+BAPS Session - Auth state, API client and lazy imports shared by all buttons
+
+pyRevit keeps lib modules loaded between button clicks, so the state cached here
+is reused across invocations and only re-read when config.json changes on disk.
+"""
+
+import os
+import json
+import time
+
+from baps_paths import get_config_file
+
+# Tokens are treated as expired this long after login
+TOKEN_MAX_AGE = 24 * 60 * 60
+
+_state = {
+    'mtime': None,       # config.json mtime the cache was loaded from
+    'config': None,      # parsed config.json, None if missing or unreadable
+    'client': None,      # BAPSClient for the cached token
+    'price_book': None,  # (mtime, PriceBook)
+    'response_cache': None,
+    'flushers': {},      # outbox directory -> OutboxFlusher
+}
+
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _reset(mtime=None, config=None):
+    _state['mtime'] = mtime
+    _state['config'] = config
+    _state['client'] = None
+
+
+def get_config():
+    """Get the parsed auth config, re-read only when the file changed"""
+    config_file = get_config_file()
+    mtime = _file_mtime(config_file)
+    if mtime is None:
+        if _state['config'] is not None:
+            _reset()
+        return None
+
+    if mtime != _state['mtime']:
+        try:
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+        except (IOError, ValueError):
+            config = None
+        _reset(mtime, config)
+    return _state['config']
+
+
+def get_user():
+    """Get the logged in user dict (email, role), or empty dict"""
+    config = get_config() or {}
+    return config.get('user') or {}
+
+
+def get_token_expiry():
+    """Get the token expiry as a Unix timestamp, None if not logged in"""
+    config = get_config()
+    if not config or not config.get('token'):
+        return None
+    return config.get('timestamp', 0) + TOKEN_MAX_AGE
+
+
+def get_auth_token():
+    """Get the stored token, clearing it once it is older than 24 hours"""
+    expiry = get_token_expiry()
+    if expiry is None:
+        return None
+    if time.time() > expiry:
+        clear_auth()
+        return None
+    return _state['config'].get('token')
+
+
+def save_auth(token, user_data):
+    """Save authentication token and user data to the config file"""
+    config = {
+        'token': token,
+        'user': user_data,
+        'timestamp': time.time()  # Login time, used for expiry
+    }
+    config_file = get_config_file()
+    with open(config_file, 'w') as f:
+        json.dump(config, f)
+    _reset(_file_mtime(config_file), config)
+
+
+def clear_auth():
+    """Clear stored authentication, returns False if the file could not be removed"""
+    config_file = get_config_file()
+    _reset()
+    try:
+        # Cached responses belong to the logged out user
+        get_response_cache().clear()
+    except (IOError, OSError):
+        pass
+    if os.path.exists(config_file):
+        try:
+            os.remove(config_file)
+        except OSError:
+            return False
+    return True
+
+
+def get_response_cache():
+    """Get the on-disk GET response cache shared by all clients"""
+    from response_cache import ResponseCache
+
+    if _state['response_cache'] is None:
+        _state['response_cache'] = ResponseCache()
+    return _state['response_cache']
+
+
+def get_client(metrics=None):
+    """
+    Get a BAPSClient for the current token (None if not logged in)
+    The client is cached; passing metrics returns a separate instrumented client.
+    GET responses are revalidated against the on-disk response cache.
+    """
+    from api_client import BAPSClient
+
+    token = get_auth_token()
+    if not token:
+        return None
+    if metrics is not None:
+        return BAPSClient(token=token, metrics=metrics, response_cache=get_response_cache())
+
+    client = _state['client']
+    if client is None or client.token != token:
+        client = _state['client'] = BAPSClient(token=token, response_cache=get_response_cache())
+    return client
+
+
+def get_anonymous_client():
+    """Get a BAPSClient without a token (login and registration)"""
+    from api_client import BAPSClient
+    return BAPSClient()
+
+
+def start_outbox_flusher(outbox):
+    """
+    Retry sending the outbox in the background until it is empty
+    One flusher runs per outbox directory; a running one is reused. Returns the flusher.
+    """
+    from outbox import OutboxFlusher
+
+    flusher = _state['flushers'].get(outbox.path)
+    if flusher is None or not flusher.is_alive():
+        flusher = _state['flushers'][outbox.path] = OutboxFlusher(outbox, get_client)
+        flusher.start()
+    return flusher
+
+
+def get_price_book():
+    """Get the local price book, reloaded only when the file changed"""
+    from price_book import PriceBook, default_price_book_path
+
+    mtime = _file_mtime(default_price_book_path())
+    cached = _state['price_book']
+    if cached is None or cached[0] != mtime:
+        cached = _state['price_book'] = (mtime, PriceBook().load())
+    return cached[1]
+
+
+def load_extractors():
+    """Import the Revit extractors on first use, returns (ElementExtractor, ScheduleExtractor)"""
+    from element_extractor import ElementExtractor
+    from schedule_extractor import ScheduleExtractor
+    return ElementExtractor, ScheduleExtractor
+
+
+def load_openai_parser():
+    """Import the OpenAI schedule parser on first use"""
+    from openai_parser import OpenAIScheduleParser
+    return OpenAIScheduleParser
@@ -1,17 +1,93 @@
 # -*- coding: utf-8 -*-
 """Element Extractor for Revit BIM Data"""
 
+import time
+
 from Autodesk.Revit.DB import *
 
+from sync_metrics import NullMetrics
+
+# Report progress every N elements (UI updates are expensive)
+PROGRESS_STEP = 250
+
+# Built-in categories per element type option
+CATEGORY_FILTERS = {
+    'Walls': BuiltInCategory.OST_Walls,
+    'Doors': BuiltInCategory.OST_Doors,
+    'Windows': BuiltInCategory.OST_Windows,
+    'Structural Framing': BuiltInCategory.OST_StructuralFraming
+}
+
 
 class ElementExtractor:
     """Extract element data from Revit document"""
     
-    def __init__(self, doc):
+    def __init__(self, doc, metrics=None, progress=None):
+        """
+        doc: Revit document
+        metrics: optional SyncMetrics collecting spans and counters
+        progress: optional callable(count) called with the number of elements processed
+        """
         self.doc = doc
-    
+        self.metrics = metrics or NullMetrics()
+        self.progress = progress
+        self._processed = 0
+        self._reported = 0
+        self._lookups = 0
+
+    def count_elements(self, categories):
+        """Count element instances for the given category names (for progress totals)"""
+        total = 0
+        for name in categories:
+            category = CATEGORY_FILTERS.get(name)
+            if category is not None:
+                total += FilteredElementCollector(self.doc)\
+                    .OfCategory(category)\
+                    .WhereElementIsNotElementType()\
+                    .GetElementCount()
+        return total
+
+    def extract(self, categories):
+        """Extract elements for the given category names (keys of CATEGORY_FILTERS)"""
+        methods = {
+            'Walls': self.extract_walls,
+            'Doors': self.extract_doors,
+            'Windows': self.extract_windows,
+            'Structural Framing': self.extract_structural
+        }
+        result = []
+        for name in categories:
+            if name in methods:
+                result.extend(methods[name]())
+        return result
+
+    def _collect(self, collector):
+        """Run a collector query, timed as the 'collect' phase"""
+        with self.metrics.span('collect'):
+            elements = collector.ToElements()
+        self.metrics.incr('elements', len(elements))
+        return elements
+
+    def _advance(self):
+        """Count one processed element and report progress every PROGRESS_STEP elements"""
+        self._processed += 1
+        if self.progress and self._processed - self._reported >= PROGRESS_STEP:
+            self._reported = self._processed
+            self.progress(self._processed)
+
+    def _finish_category(self, started):
+        """Record the parameter read phase of a category and flush counters and progress"""
+        # Timed per category rather than per lookup to keep instrumentation overhead low
+        self.metrics.add_time('parameter_reads', time.time() - started)
+        self.metrics.incr('parameter_lookups', self._lookups)
+        self._lookups = 0
+        if self.progress and self._processed != self._reported:
+            self._reported = self._processed
+            self.progress(self._processed)
+
     def _get_parameter_value(self, element, param_name):
         """Safely get parameter value"""
+        self._lookups += 1
         try:
             param = element.LookupParameter(param_name)
             if param and param.HasValue:
@@ -58,12 +134,12 @@ class ElementExtractor:
     
     def extract_walls(self):
         """Extract wall elements"""
-        walls = FilteredElementCollector(self.doc)\
-            .OfClass(Wall)\
-            .WhereElementIsNotElementType()\
-            .ToElements()
+        walls = self._collect(FilteredElementCollector(self.doc)
+                              .OfClass(Wall)
+                              .WhereElementIsNotElementType())
 
         result = []
+        started = time.time()
         for wall in walls:
             data = self._extract_element_data(wall, 'Walls')
 
@@ -83,17 +159,19 @@ class ElementExtractor:
                 pass
 
             result.append(data)
+            self._advance()
 
+        self._finish_category(started)
         return result
     
     def extract_doors(self):
         """Extract door elements"""
-        doors = FilteredElementCollector(self.doc)\
-            .OfCategory(BuiltInCategory.OST_Doors)\
-            .WhereElementIsNotElementType()\
-            .ToElements()
+        doors = self._collect(FilteredElementCollector(self.doc)
+                              .OfCategory(BuiltInCategory.OST_Doors)
+                              .WhereElementIsNotElementType())
         
         result = []
+        started = time.time()
         for door in doors:
             data = self._extract_element_data(door, 'Doors')
             
@@ -105,17 +183,19 @@ class ElementExtractor:
                 pass
             
             result.append(data)
+            self._advance()
         
+        self._finish_category(started)
         return result
     
     def extract_windows(self):
         """Extract window elements"""
-        windows = FilteredElementCollector(self.doc)\
-            .OfCategory(BuiltInCategory.OST_Windows)\
-            .WhereElementIsNotElementType()\
-            .ToElements()
+        windows = self._collect(FilteredElementCollector(self.doc)
+                                .OfCategory(BuiltInCategory.OST_Windows)
+                                .WhereElementIsNotElementType())
         
         result = []
+        started = time.time()
         for window in windows:
             data = self._extract_element_data(window, 'Windows')
             
@@ -127,17 +207,19 @@ class ElementExtractor:
                 pass
             
             result.append(data)
+            self._advance()
         
+        self._finish_category(started)
         return result
     
     def extract_structural(self):
         """Extract structural framing elements"""
-        framing = FilteredElementCollector(self.doc)\
-            .OfCategory(BuiltInCategory.OST_StructuralFraming)\
-            .WhereElementIsNotElementType()\
-            .ToElements()
+        framing = self._collect(FilteredElementCollector(self.doc)
+                                .OfCategory(BuiltInCategory.OST_StructuralFraming)
+                                .WhereElementIsNotElementType())
         
         result = []
+        started = time.time()
         for frame in framing:
             data = self._extract_element_data(frame, 'Structural Framing')
             
@@ -149,5 +231,7 @@ class ElementExtractor:
                 pass
             
             result.append(data)
+            self._advance()
         
+        self._finish_category(started)
         return result
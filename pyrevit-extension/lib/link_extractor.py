@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""Link Extractor - Extract elements from linked Revit models, cached per link version"""
+
+import os
+import json
+import gzip
+import hashlib
+
+from Autodesk.Revit.DB import *
+
+from baps_paths import get_baps_dir
+from element_extractor import ElementExtractor
+from sync_metrics import NullMetrics
+
+# Bump when the cached element format changes
+CACHE_FORMAT = 1
+
+
+def default_cache_dir():
+    """Get default link cache location (%APPDATA%\\BAPS\\link_cache)"""
+    return get_baps_dir('link_cache')
+
+
+def get_link_version(link_doc):
+    """
+    Identify the saved version of a linked model, None if it cannot be determined
+    Uses the document version GUID (Revit 2021+), else the file size and timestamp.
+    """
+    try:
+        version = Document.GetDocumentVersion(link_doc)
+        if version is not None:
+            return 'guid:{}:{}'.format(version.VersionGUID, version.NumberOfSaves)
+    except:
+        pass
+
+    path = link_doc.PathName
+    if path and os.path.exists(path):
+        return 'file:{}:{}'.format(os.path.getsize(path), int(os.path.getmtime(path)))
+    return None
+
+
+def _xyz(point):
+    return [round(point.X, 6), round(point.Y, 6), round(point.Z, 6)]
+
+
+def transform_to_dict(transform):
+    """Serialize a link instance transform (origin and basis vectors, in feet)"""
+    return {
+        'origin': _xyz(transform.Origin),
+        'basisX': _xyz(transform.BasisX),
+        'basisY': _xyz(transform.BasisY),
+        'basisZ': _xyz(transform.BasisZ)
+    }
+
+
+def instances_signature(instances):
+    """Identify the placement of a link: instance ids and transforms, order independent"""
+    placements = []
+    for instance in instances:
+        try:
+            transform = transform_to_dict(instance.GetTotalTransform())
+        except:
+            transform = None
+        placements.append([str(instance.Id), transform])
+    placements.sort(key=lambda p: p[0])
+    return hashlib.sha1(json.dumps(placements, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class LinkCache:
+    """
+    Extracted elements per linked model and category, valid for one link version
+    index.json maps link paths to their cached version, categories and the signature of
+    the link instances last synced, so unchanged links are recognized without reading
+    their elements.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self._index_file = os.path.join(self.cache_dir, 'index.json')
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self._index_file):
+                try:
+                    with open(self._index_file, 'r') as f:
+                        index = json.load(f)
+                    if index.get('format') == CACHE_FORMAT:
+                        self._index = index.get('links', {})
+                except (IOError, ValueError):
+                    pass
+        return self._index
+
+    def _save_index(self):
+        temp_file = self._index_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump({'format': CACHE_FORMAT, 'links': self.index}, f)
+        if os.path.exists(self._index_file):
+            os.remove(self._index_file)
+        os.rename(temp_file, self._index_file)
+
+    def _file(self, link_path, category):
+        key = hashlib.sha1(u'{}|{}'.format(link_path.lower(), category).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, '{}.json.gz'.format(key))
+
+    def categories(self, link_path, version):
+        """Get the categories cached for this link version"""
+        entry = self.index.get(link_path)
+        if not version or not entry or entry.get('version') != version:
+            return set()
+        return set(c for c in entry.get('categories', []) if os.path.exists(self._file(link_path, c)))
+
+    def instances(self, link_path, version):
+        """Get the instances signature last synced for this link version (None if unknown)"""
+        entry = self.index.get(link_path)
+        if not version or not entry or entry.get('version') != version:
+            return None
+        return entry.get('instances')
+
+    def save_instances(self, link_path, version, signature):
+        """Record the instances signature synced for this link version"""
+        entry = self.index.get(link_path)
+        if not version or not entry or entry.get('version') != version or entry.get('instances') == signature:
+            return
+        entry['instances'] = signature
+        self._save_index()
+
+    def load(self, link_path, category):
+        """Get the cached elements of one category (None if missing or unreadable)"""
+        try:
+            with gzip.open(self._file(link_path, category), 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        except (IOError, ValueError, EOFError):
+            return None
+
+    def save(self, link_path, version, category, elements):
+        """Store the elements of one category for this link version"""
+        if not version:
+            return
+
+        entry = self.index.get(link_path)
+        if not entry or entry.get('version') != version:
+            # New link version: drop what was cached for the old one
+            for old_category in (entry or {}).get('categories', []):
+                old_file = self._file(link_path, old_category)
+                if os.path.exists(old_file):
+                    os.remove(old_file)
+            entry = self.index[link_path] = {'version': version, 'categories': []}
+
+        cache_file = self._file(link_path, category)
+        temp_file = cache_file + '.tmp'
+        with gzip.open(temp_file, 'wb') as f:
+            f.write(json.dumps(elements).encode('utf-8'))
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        os.rename(temp_file, cache_file)
+
+        if category not in entry['categories']:
+            entry['categories'].append(category)
+        self._save_index()
+
+
+class LinkExtractor:
+    """Extract elements of all loaded RevitLinkInstance documents of a host model"""
+
+    def __init__(self, doc, metrics=None, progress=None, cache=None):
+        """
+        doc: host Revit document
+        metrics: optional SyncMetrics collecting spans and counters
+        progress: optional callable(count) called with the number of link elements processed
+        cache: LinkCache, defaults to %APPDATA%\\BAPS\\link_cache
+        """
+        self.doc = doc
+        self.metrics = metrics or NullMetrics()
+        self.progress = progress
+        self.cache = cache or LinkCache()
+        self.summary = []
+        self._links = None
+
+    def get_links(self):
+        """
+        Loaded links as dicts (doc, path, title, version, cached categories, instances and
+        whether the instances changed since the last sync), one per linked file
+        """
+        if self._links is not None:
+            return self._links
+
+        links = {}
+        instances = FilteredElementCollector(self.doc).OfClass(RevitLinkInstance).ToElements()
+        for instance in instances:
+            link_doc = instance.GetLinkDocument()
+            if link_doc is None:
+                # Unloaded link
+                continue
+            path = link_doc.PathName or link_doc.Title
+            link = links.get(path)
+            if link is None:
+                version = get_link_version(link_doc)
+                link = links[path] = {
+                    'doc': link_doc,
+                    'path': path,
+                    'title': link_doc.Title,
+                    'version': version,
+                    'cached': self.cache.categories(path, version),
+                    'instances': []
+                }
+            link['instances'].append(instance)
+
+        for link in links.values():
+            link['signature'] = instances_signature(link['instances'])
+            link['moved'] = link['signature'] != self.cache.instances(link['path'], link['version'])
+
+        self._links = sorted(links.values(), key=lambda l: l['path'])
+        return self._links
+
+    def count_elements(self, categories):
+        """Count elements that need extraction (categories not cached for the current link version)"""
+        total = 0
+        for link in self.get_links():
+            missing = [c for c in categories if c not in link['cached']]
+            if missing:
+                total += ElementExtractor(link['doc']).count_elements(missing)
+        return total
+
+    def extract(self, categories, include_unchanged=False):
+        """
+        Extract categories from every linked model
+        Links whose version and categories are already cached are not read again. Their cached
+        elements are returned when instances were added, moved or rotated since the last sync
+        (or include_unchanged is set); otherwise the link is skipped entirely.
+        Elements get a link-scoped revitId and the current instance provenance in bimMetadata.
+        """
+        result = []
+        processed = [0]
+        self.summary = []
+
+        for link in self.get_links():
+            missing = [c for c in categories if c not in link['cached']]
+            extracted = {}
+
+            if missing:
+                base = processed[0]
+
+                def report(count, base=base):
+                    processed[0] = base + count
+                    if self.progress:
+                        self.progress(processed[0])
+
+                extractor = ElementExtractor(link['doc'], metrics=self.metrics, progress=report)
+                for category in missing:
+                    extracted[category] = extractor.extract([category])
+                    self.cache.save(link['path'], link['version'], category, extracted[category])
+                    link['cached'].add(category)
+                self.metrics.incr('links_extracted')
+                status = 'extracted'
+            elif link['moved']:
+                self.metrics.incr('links_moved')
+                status = 'instances changed'
+            else:
+                self.metrics.incr('links_unchanged')
+                status = 'unchanged'
+
+            if include_unchanged or link['moved']:
+                for category in categories:
+                    if category not in extracted:
+                        extracted[category] = self.cache.load(link['path'], category) or []
+
+            count = 0
+            for instance in link['instances']:
+                provenance = self._provenance(link, instance)
+                for category in categories:
+                    for element in extracted.get(category, []):
+                        result.append(self._with_provenance(element, instance, provenance))
+                        count += 1
+
+            self.cache.save_instances(link['path'], link['version'], link['signature'])
+
+            self.summary.append({
+                'title': link['title'],
+                'path': link['path'],
+                'instances': len(link['instances']),
+                'status': status,
+                'elements': count
+            })
+
+        return result
+
+    def _provenance(self, link, instance):
+        try:
+            transform = transform_to_dict(instance.GetTotalTransform())
+        except:
+            transform = None
+        return {
+            'sourceModel': link['title'],
+            'linkPath': link['path'],
+            'linkVersion': link['version'],
+            'linkInstanceId': str(instance.Id),
+            'linkInstanceName': instance.Name,
+            'linkTransform': transform
+        }
+
+    def _with_provenance(self, element, instance, provenance):
+        data = dict(element)
+        # Element ids are only unique within one document (and one link instance)
+        data['revitId'] = '{}:{}'.format(instance.Id, element['revitId'])
+        metadata = dict(element.get('bimMetadata') or {})
+        metadata.update(provenance)
+        data['bimMetadata'] = metadata
+        return data
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""Outbox - Durable local queue of element batches waiting to be synced"""
+
+import os
+import json
+import gzip
+import time
+import uuid
+import threading
+
+from baps_paths import get_baps_dir
+
+# Elements per outbox record (one record is sent as one batch request)
+RECORD_SIZE = 500
+
+# Start a new segment file once the current one reaches this size
+SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+
+# Total outbox size cap, the oldest segments are dropped beyond it
+MAX_OUTBOX_BYTES = 256 * 1024 * 1024
+
+# Records rejected by the server this many times are set aside
+MAX_REJECTS = 5
+
+# A lock not refreshed for this long is considered left over by a crashed process
+# (a flush refreshes it after every acknowledged record)
+LOCK_STALE_SECONDS = 600
+
+_SEGMENT_PREFIX = 'segment-'
+_SEGMENT_SUFFIX = '.jsonl.gz'
+
+
+def default_outbox_dir():
+    """Get default outbox location (%APPDATA%\\BAPS\\outbox)"""
+    return get_baps_dir('outbox')
+
+
+def is_rejected(error):
+    """Check if the server refused the request itself (retrying it unchanged will not help)"""
+    status = getattr(error, 'status', None)
+    return status is not None and 400 <= status < 500 and status not in (401, 403, 408, 429)
+
+
+def _write_json(path, data):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temp_path, path)
+
+
+class OutboxBusy(Exception):
+    """Another flush (thread or Revit session) is already draining the outbox"""
+    pass
+
+
+class Outbox:
+    """
+    Append-only, gzip compressed segment files of element records
+    Each record is one gzip member holding a JSON line {"seq": n, "source": ..., "elements": [...]}.
+    State (last sent seq, reject counts) is kept in state.json next to the segments;
+    appends and flushes update it under the same lock.
+    """
+
+    def __init__(self, path=None, max_bytes=MAX_OUTBOX_BYTES, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.path = path or default_outbox_dir()
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        self.max_bytes = max_bytes
+        self.segment_max_bytes = segment_max_bytes
+        # Guards state.json and the segment files (append, acks, removal of sent segments)
+        self._state_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    # -- state ------------------------------------------------------------
+
+    @property
+    def _state_file(self):
+        return os.path.join(self.path, 'state.json')
+
+    def _load_state(self):
+        state = {'nextSeq': 1, 'ackedSeq': 0, 'rejects': {}, 'dropped': 0}
+        if os.path.exists(self._state_file):
+            try:
+                with open(self._state_file, 'r') as f:
+                    state.update(json.load(f))
+            except (IOError, ValueError):
+                pass
+
+        # Never hand out a seq that is already on disk (e.g. state lost in a crash)
+        segments = self._segments()
+        if segments:
+            state['nextSeq'] = max(state['nextSeq'], self._last_seq(segments[-1][1]) + 1)
+        return state
+
+    def _save_state(self, state):
+        _write_json(self._state_file, state)
+
+    def _update_state(self, update):
+        """Load, change and save the state under the state lock; returns update(state)"""
+        with self._state_lock:
+            state = self._load_state()
+            result = update(state)
+            self._save_state(state)
+            return result
+
+    # -- segments ---------------------------------------------------------
+
+    def _segments(self):
+        """List (first_seq, path) of segment files, oldest first"""
+        segments = []
+        for name in os.listdir(self.path):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                try:
+                    first_seq = int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+                except ValueError:
+                    continue
+                segments.append((first_seq, os.path.join(self.path, name)))
+        segments.sort()
+        return segments
+
+    def _segment_path(self, first_seq):
+        return os.path.join(self.path, '{}{:012d}{}'.format(_SEGMENT_PREFIX, first_seq, _SEGMENT_SUFFIX))
+
+    def _read_segment(self, path):
+        """Yield records of a segment, stopping at a truncated tail (crash during append)"""
+        try:
+            with gzip.open(path, 'rb') as f:
+                while True:
+                    line = f.readline()
+                    if not line:
+                        break
+                    yield json.loads(line.decode('utf-8'))
+        except (IOError, EOFError, ValueError, OSError):
+            return
+
+    def _last_seq(self, path):
+        last = 0
+        for record in self._read_segment(path):
+            last = record['seq']
+        return last
+
+    def _iter_records(self, after_seq=0):
+        segments = self._segments()
+        for index, (first_seq, path) in enumerate(segments):
+            # Skip segments that were fully sent
+            if index + 1 < len(segments) and segments[index + 1][0] <= after_seq + 1:
+                continue
+            for record in self._read_segment(path):
+                if record['seq'] > after_seq:
+                    yield record
+
+    def size(self):
+        """Total bytes of all segment files"""
+        return sum(os.path.getsize(path) for _, path in self._segments())
+
+    def _enforce_cap(self, state):
+        """Drop the oldest segments while the outbox is over its size cap"""
+        segments = self._segments()
+        total = sum(os.path.getsize(path) for _, path in segments)
+        while len(segments) > 1 and total > self.max_bytes:
+            first_seq, path = segments.pop(0)
+            total -= os.path.getsize(path)
+            last_seq = segments[0][0] - 1
+            if last_seq > state['ackedSeq']:
+                state['dropped'] += sum(len(r['elements']) for r in self._read_segment(path)
+                                        if r['seq'] > state['ackedSeq'])
+                state['ackedSeq'] = last_seq
+            os.remove(path)
+
+    # -- public API -------------------------------------------------------
+
+    def append(self, elements, record_size=RECORD_SIZE, source=None):
+        """
+        Durably queue elements, returns number of records written
+        Elements are split into records of record_size, each written as its own gzip member.
+        source: the document the elements were extracted from; a later copy of an element
+        only replaces an earlier one with the same source and revitId.
+        """
+        if not elements:
+            return 0
+
+        with self._state_lock:
+            state = self._load_state()
+
+            # Every append starts its own segment, so a tail left truncated by a crash
+            # never has newer records written after it
+            records = 0
+            f = open(self._segment_path(state['nextSeq']), 'ab')
+            try:
+                for start in range(0, len(elements), record_size):
+                    if records and f.tell() >= self.segment_max_bytes:
+                        # Roll over to a new segment for the remaining records
+                        self._sync_close(f)
+                        f = open(self._segment_path(state['nextSeq']), 'ab')
+
+                    record = {'seq': state['nextSeq'], 'source': source,
+                              'elements': elements[start:start + record_size]}
+                    with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6) as member:
+                        member.write((json.dumps(record) + '\n').encode('utf-8'))
+                    state['nextSeq'] += 1
+                    records += 1
+            finally:
+                self._sync_close(f)
+
+            self._enforce_cap(state)
+            self._save_state(state)
+            return records
+
+    @staticmethod
+    def _sync_close(f):
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+
+    def pending(self):
+        """Number of records waiting to be sent"""
+        state = self._load_state()
+        return max(0, state['nextSeq'] - 1 - state['ackedSeq'])
+
+    def pop_dropped(self):
+        """Number of elements dropped by the size cap since the last call"""
+        with self._state_lock:
+            state = self._load_state()
+            dropped = state['dropped']
+            if dropped:
+                state['dropped'] = 0
+                self._save_state(state)
+            return dropped
+
+    @property
+    def _lock_file(self):
+        return os.path.join(self.path, 'flush.lock')
+
+    def _acquire_file_lock(self):
+        """Create flush.lock holding an owner token (pid and random id), returns the token"""
+        lock_path = self._lock_file
+        if os.path.exists(lock_path) and time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            raise OutboxBusy('Outbox is being flushed by another process')
+        token = '{}:{}'.format(os.getpid(), uuid.uuid4().hex)
+        try:
+            os.write(fd, token.encode('utf-8'))
+        finally:
+            os.close(fd)
+        return token
+
+    def _touch_file_lock(self):
+        """Refresh the lock, so a long flush is not mistaken for a crashed one"""
+        try:
+            os.utime(self._lock_file, None)
+        except OSError:
+            pass
+
+    def _release_file_lock(self, token):
+        """Remove the lock, unless another flush took it over (after it went stale)"""
+        try:
+            with open(self._lock_file, 'rb') as f:
+                owner = f.read().decode('utf-8')
+            if owner == token:
+                os.remove(self._lock_file)
+        except (IOError, OSError):
+            pass
+
+    def flush(self, client, on_progress=None, should_stop=None):
+        """
+        Send pending records in order with client.post_batch_payload
+        Elements re-queued later (same source document and revitId) are only sent in their
+        latest version.
+        on_progress(sent, total): called after each record, counts in elements
+        should_stop(): checked between records
+        Returns: (sent, total) element counts. Raises the error of the failing request;
+        records not yet acknowledged stay queued.
+        """
+        if not self._flush_lock.acquire(False):
+            raise OutboxBusy('Outbox is already being flushed')
+        try:
+            token = self._acquire_file_lock()
+            try:
+                return self._flush(client, on_progress, should_stop)
+            finally:
+                self._release_file_lock(token)
+        finally:
+            self._flush_lock.release()
+
+    @staticmethod
+    def _dedupe_key(record, element):
+        """Key of an element for superseding, None if it is always sent"""
+        revit_id = element.get('revitId')
+        # revitIds are only unique within a document; records queued before sources
+        # were recorded are never collapsed
+        if revit_id is None or record.get('source') is None:
+            return None
+        return (record['source'], revit_id)
+
+    def _flush(self, client, on_progress, should_stop):
+        with self._state_lock:
+            state = self._load_state()
+        acked_seq = state['ackedSeq']
+
+        # First pass: latest seq per (source, revitId), so superseded copies are skipped
+        latest = {}
+        total = 0
+        last_seq = acked_seq
+        for record in self._iter_records(acked_seq):
+            last_seq = record['seq']
+            for element in record['elements']:
+                key = self._dedupe_key(record, element)
+                if key is not None:
+                    if key in latest:
+                        total -= 1
+                    latest[key] = record['seq']
+                total += 1
+
+        sent = 0
+        self._touch_file_lock()
+        if on_progress:
+            on_progress(sent, total)
+
+        def ack(seq):
+            def update(state):
+                state['ackedSeq'] = max(state['ackedSeq'], seq)
+                state['rejects'].pop(str(seq), None)
+            self._update_state(update)
+
+        def count_reject(seq):
+            def update(state):
+                state['rejects'][str(seq)] = state['rejects'].get(str(seq), 0) + 1
+                return state['rejects'][str(seq)]
+            return self._update_state(update)
+
+        try:
+            for record in self._iter_records(acked_seq):
+                # Records appended after the dedupe pass wait for the next flush
+                if record['seq'] > last_seq or (should_stop and should_stop()):
+                    break
+
+                seq = record['seq']
+                elements = [e for e in record['elements']
+                            if latest.get(self._dedupe_key(record, e), seq) == seq]
+
+                if elements:
+                    payload = json.dumps({'elements': elements}).encode('utf-8')
+                    try:
+                        client.post_batch_payload(payload)
+                    except Exception as e:
+                        if not is_rejected(e):
+                            # Offline, logged out or server trouble: keep the record and retry later
+                            raise
+                        # The server refused this record; set it aside after repeated rejects
+                        if count_reject(seq) < MAX_REJECTS:
+                            raise
+                        self._set_aside(record, str(e))
+                    else:
+                        sent += len(elements)
+
+                ack(seq)
+                acked_seq = seq
+                self._touch_file_lock()
+
+                if on_progress:
+                    on_progress(sent, total)
+        finally:
+            with self._state_lock:
+                self._remove_sent_segments(self._load_state()['ackedSeq'])
+
+        return sent, total
+
+    def _set_aside(self, record, reason):
+        """Keep a repeatedly rejected record in rejected.jsonl.gz for inspection"""
+        record = dict(record, reason=reason, rejectedAt=time.time())
+        with open(os.path.join(self.path, 'rejected.jsonl.gz'), 'ab') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb') as member:
+                member.write((json.dumps(record) + '\n').encode('utf-8'))
+
+    def _remove_sent_segments(self, acked_seq):
+        segments = self._segments()
+        for index, (first_seq, path) in enumerate(segments):
+            if index + 1 < len(segments) and segments[index + 1][0] <= acked_seq + 1:
+                os.remove(path)
+            elif index + 1 == len(segments) and self._last_seq(path) <= acked_seq:
+                os.remove(path)
+            else:
+                break
+
+
+class OutboxFlusher(threading.Thread):
+    """
+    Retry flushing the outbox in the background until it is empty
+    client_factory(): returns a BAPSClient, or None when not logged in
+    """
+
+    def __init__(self, outbox, client_factory, interval=30, max_interval=600, on_flushed=None):
+        threading.Thread.__init__(self, name='BAPS outbox flush')
+        self.daemon = True
+        self.outbox = outbox
+        self.client_factory = client_factory
+        self.interval = interval
+        self.max_interval = max_interval
+        self.on_flushed = on_flushed
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        delay = self.interval
+        while not self._stopped.wait(delay):
+            if not self.outbox.pending():
+                return
+
+            client = self.client_factory()
+            if client is None:
+                # Logged out, nothing can be sent until the next sync
+                return
+
+            try:
+                sent, total = self.outbox.flush(client, should_stop=self._stopped.is_set)
+            except OutboxBusy:
+                delay = self.interval
+                continue
+            except Exception:
+                # Back off while the backend is unreachable
+                delay = min(delay * 2, self.max_interval)
+                continue
+
+            if self.on_flushed:
+                self.on_flushed(sent, total)
+            return
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""Price Book - Local unit cost history built from takeoff cost exports"""
+
+import os
+import io
+import json
+
+from baps_paths import get_baps_dir
+from takeoff_reader import read_takeoff_csv, iter_takeoff_items, normalize_unit, infer_category
+
+# Keep the store bounded: only the most recent observations per entry are kept
+MAX_OBSERVATIONS = 500
+
+
+def default_price_book_path():
+    """Get default price book location (%APPDATA%\\BAPS\\price_book.json)"""
+    return os.path.join(get_baps_dir(), 'price_book.json')
+
+
+def _norm(text):
+    """Normalize a key component (case and whitespace insensitive)"""
+    return u' '.join(u'{}'.format(text or u'').lower().split())
+
+
+def _short_type(type_name):
+    """Get the type part of a 'Family: Type' name"""
+    return _norm(type_name).split(u': ')[-1]
+
+
+def _median(sorted_values):
+    """Median of an already sorted list"""
+    count = len(sorted_values)
+    middle = count // 2
+    if count % 2:
+        return sorted_values[middle]
+    return (sorted_values[middle - 1] + sorted_values[middle]) / 2.0
+
+
+class PriceBook:
+    """Unit cost history indexed by type, category and unit"""
+
+    def __init__(self, path=None):
+        self.path = path or default_price_book_path()
+        self._entries = {}    # (type, category, unit) -> entry
+        self._by_type = {}    # normalized type name -> set of keys
+        self._by_short = {}   # normalized short type name -> set of keys
+        self._by_source = {}  # source -> set of keys with observations from it
+        self._stats = {}      # key -> cached statistics
+
+    @staticmethod
+    def make_key(type_name, category, unit):
+        """Build the index key for a type, category and unit"""
+        return (_norm(type_name), _norm(category), _norm(normalize_unit(unit)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _index(self, key):
+        self._by_type.setdefault(key[0], set()).add(key)
+        self._by_short.setdefault(_short_type(key[0]), set()).add(key)
+
+    def _unindex(self, key):
+        for index, name in ((self._by_type, key[0]), (self._by_short, _short_type(key[0]))):
+            keys = index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[name]
+
+    def add_observation(self, type_name, category, unit, material_cost, labor_cost, source=None):
+        """Record one unit cost observation, source is the schedule it was read from"""
+        key = self.make_key(type_name, category, unit)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {
+                'type': type_name,
+                'category': category,
+                'unit': normalize_unit(unit),
+                'observations': []
+            }
+            self._entries[key] = entry
+            self._index(key)
+
+        # Observations are [material, labor] or [material, labor, source]
+        observation = [float(material_cost or 0), float(labor_cost or 0)]
+        if source:
+            observation.append(source)
+            self._by_source.setdefault(source, set()).add(key)
+        entry['observations'].append(observation)
+        if len(entry['observations']) > MAX_OBSERVATIONS:
+            del entry['observations'][:-MAX_OBSERVATIONS]
+        self._stats.pop(key, None)
+
+    def remove_source(self, source):
+        """Drop all observations read from a source, returns number of rows removed"""
+        removed = 0
+        for key in self._by_source.pop(source, ()):
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            kept = [o for o in entry['observations'] if len(o) < 3 or o[2] != source]
+            removed += len(entry['observations']) - len(kept)
+            self._stats.pop(key, None)
+            if kept:
+                entry['observations'] = kept
+            else:
+                del self._entries[key]
+                self._unindex(key)
+        return removed
+
+    def ingest_schedule(self, schedule_data, source=None):
+        """
+        Add all priced rows of a takeoff schedule, returns number of rows added
+        source: identifies the schedule (e.g. document and schedule name); rows ingested
+                earlier from the same source are replaced, so re-syncing does not count them twice
+        """
+        if source:
+            self.remove_source(source)
+
+        count = 0
+        for item in iter_takeoff_items(schedule_data):
+            self.add_observation(item['type_name'], item['category'], item['unit'],
+                                 item['material_cost'], item['labor_cost'], source)
+            count += 1
+        return count
+
+    def ingest_csv(self, csv_path):
+        """Add all priced rows of a takeoff CSV export (replacing an earlier import of it)"""
+        return self.ingest_schedule(read_takeoff_csv(csv_path), os.path.abspath(csv_path))
+
+    def _get_stats(self, key):
+        """Get min/max/median statistics for an entry (cached)"""
+        stats = self._stats.get(key)
+        if stats is None:
+            entry = self._entries[key]
+            observations = entry['observations']
+            totals = sorted(o[0] + o[1] for o in observations)
+            stats = {
+                'type': entry['type'],
+                'category': entry['category'],
+                'unit': entry['unit'],
+                'count': len(totals),
+                'min': totals[0],
+                'max': totals[-1],
+                'median': _median(totals),
+                'materialMedian': _median(sorted(o[0] for o in observations)),
+                'laborMedian': _median(sorted(o[1] for o in observations))
+            }
+            self._stats[key] = stats
+        return stats
+
+    def lookup(self, type_name, category=None, unit=None):
+        """
+        Find unit cost statistics for a type
+        Tries exact type/category/unit first, then any category, then the short type name.
+        Returns: dict with count, min, max, median (per unit) or None if no history
+        """
+        if not type_name:
+            return None
+
+        if category and unit:
+            key = self.make_key(type_name, category, unit)
+            if key in self._entries:
+                return self._get_stats(key)
+
+        unit_key = _norm(normalize_unit(unit)) if unit else None
+        candidates = self._by_type.get(_norm(type_name)) or self._by_short.get(_short_type(type_name)) or set()
+        matches = [k for k in candidates if unit_key is None or k[2] == unit_key]
+        if not matches:
+            return None
+
+        # Prefer the entry with the most history
+        best = max(matches, key=lambda k: len(self._entries[k]['observations']))
+        return self._get_stats(best)
+
+    def lookup_element(self, element):
+        """Find unit cost statistics for an element dict (as synced to the backend)"""
+        properties = element.get('properties') or {}
+        category = element.get('category') or infer_category(element.get('name'))
+        unit = element.get('unit')
+
+        for type_name in (properties.get('Family and Type'), properties.get('Type'), element.get('name')):
+            stats = self.lookup(type_name, category, unit)
+            if stats:
+                return stats
+        return None
+
+    def suggest_pricing(self, element, fallback=None):
+        """
+        Suggest pricing from history, same shape as the backend pricing suggestion
+        fallback: callable(element) used only when the type has no history (e.g. AI pricing)
+        """
+        stats = self.lookup_element(element)
+        if stats is None:
+            return fallback(element) if fallback else None
+
+        quantity = float(element.get('quantity') or 1)
+        return {
+            'suggestedPrice': round(stats['median'] * quantity, 2),
+            'priceRange': {
+                'min': round(stats['min'] * quantity, 2),
+                'max': round(stats['max'] * quantity, 2)
+            },
+            'confidence': min(0.95, 0.5 + 0.05 * stats['count']),
+            'reasoning': 'Based on {} historical takeoff rows for {} (median {:.2f} per {})'.format(
+                stats['count'], stats['type'], stats['median'], stats['unit']),
+            'unitCost': stats,
+            'source': 'price_book'
+        }
+
+    def load(self):
+        """Load the price book from disk, returns self"""
+        self._entries, self._by_type, self._by_short, self._by_source, self._stats = {}, {}, {}, {}, {}
+        if not os.path.exists(self.path):
+            return self
+
+        with io.open(self.path, 'r', encoding='utf-8') as f:
+            store = json.load(f)
+
+        for entry in store.get('entries', []):
+            key = self.make_key(entry['type'], entry['category'], entry['unit'])
+            self._entries[key] = entry
+            self._index(key)
+            for observation in entry['observations']:
+                if len(observation) > 2:
+                    self._by_source.setdefault(observation[2], set()).add(key)
+        return self
+
+    def save(self):
+        """Write the price book to disk"""
+        store = {'version': 1, 'entries': list(self._entries.values())}
+        temp_path = self.path + '.tmp'
+        with io.open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(u'{}'.format(json.dumps(store)))
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temp_path, self.path)
+
+
+if __name__ == '__main__':
+    # Offline import: python price_book.py export1.csv [export2.csv ...]
+    import sys
+
+    book = PriceBook().load()
+    for csv_path in sys.argv[1:]:
+        print('{}: {} rows'.format(csv_path, book.ingest_csv(csv_path)))
+    book.save()
+    print('Price book: {} entries in {}'.format(len(book), book.path))
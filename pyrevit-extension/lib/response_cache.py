@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Response Cache - On-disk cache of GET responses revalidated with ETag / Last-Modified"""
+
+import os
+import json
+import hashlib
+
+from baps_paths import get_baps_dir
+
+
+def default_cache_dir():
+    """Get default response cache location (%APPDATA%\\BAPS\\http_cache)"""
+    return get_baps_dir('http_cache')
+
+
+class ResponseCache:
+    """
+    Last response body and validators per URL and token
+    Bodies are only served after the server confirmed them with 304 Not Modified.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def _file(self, url, token):
+        # Responses can differ per user, so the token is part of the key
+        key = hashlib.sha1(u'{}|{}'.format(url, token or u'').encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, '{}.json'.format(key))
+
+    def get(self, url, token=None):
+        """Get the cached entry {'etag', 'lastModified', 'body'} or None"""
+        cache_file = self._file(url, token)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def validators(self, url, token=None):
+        """Conditional request headers for a cached URL"""
+        entry = self.get(url, token)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('lastModified'):
+                headers['If-Modified-Since'] = entry['lastModified']
+        return headers
+
+    def put(self, url, token, etag, last_modified, body):
+        """Store a response body (decoded text) with its validators"""
+        if not etag and not last_modified:
+            return
+        cache_file = self._file(url, token)
+        temp_file = cache_file + '.tmp'
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump({'url': url, 'etag': etag, 'lastModified': last_modified, 'body': body}, f)
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+            os.rename(temp_file, cache_file)
+        except (IOError, OSError):
+            # The response itself is fine; it is just not cached
+            pass
+
+    def clear(self):
+        """Remove all cached responses"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.cache_dir, name))
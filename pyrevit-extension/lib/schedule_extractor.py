@@ -3,12 +3,23 @@
 
 from Autodesk.Revit.DB import *
 
+from sync_metrics import NullMetrics
+# Re-exported: the conversion itself does not need the Revit API
+from takeoff_reader import convert_schedule_to_elements
+
 
 class ScheduleExtractor:
     """Extract schedule data from Revit"""
 
-    def __init__(self, doc):
+    def __init__(self, doc, metrics=None, progress=None):
+        """
+        doc: Revit document
+        metrics: optional SyncMetrics collecting spans and counters
+        progress: optional callable(count) called with the number of schedules processed
+        """
         self.doc = doc
+        self.metrics = metrics or NullMetrics()
+        self.progress = progress
 
     def get_all_schedules(self):
         """Get all schedules in the document"""
@@ -47,28 +58,30 @@ class ScheduleExtractor:
                 'data': []
             }
 
-            # Extract headers (column names)
-            for col_index in range(cols):
-                try:
-                    cell = section_data.Cells.get_Item(0, col_index)
-                    header = cell.Text if cell else 'Column_{}'.format(col_index)
-                    schedule_data['headers'].append(header)
-                except:
-                    schedule_data['headers'].append('Column_{}'.format(col_index))
-
-            # Extract data rows (skip header row, start from 1)
-            for row_index in range(1, rows):
-                row_data = []
+            with self.metrics.span('schedule_cells'):
+                # Extract headers (column names)
                 for col_index in range(cols):
                     try:
-                        cell = section_data.Cells.get_Item(row_index, col_index)
-                        cell_value = cell.Text if cell else ''
-                        row_data.append(cell_value)
+                        cell = section_data.Cells.get_Item(0, col_index)
+                        header = cell.Text if cell else 'Column_{}'.format(col_index)
+                        schedule_data['headers'].append(header)
                     except:
-                        row_data.append('')
-
-                schedule_data['data'].append(row_data)
-
+                        schedule_data['headers'].append('Column_{}'.format(col_index))
+
+                # Extract data rows (skip header row, start from 1)
+                for row_index in range(1, rows):
+                    row_data = []
+                    for col_index in range(cols):
+                        try:
+                            cell = section_data.Cells.get_Item(row_index, col_index)
+                            cell_value = cell.Text if cell else ''
+                            row_data.append(cell_value)
+                        except:
+                            row_data.append('')
+
+                    schedule_data['data'].append(row_data)
+
+            self.metrics.incr('schedule_cells', rows * cols)
             return schedule_data
 
         except Exception as e:
@@ -79,7 +92,7 @@ class ScheduleExtractor:
         schedules = self.get_all_schedules()
         all_data = []
 
-        for schedule_info in schedules:
+        for index, schedule_info in enumerate(schedules):
             try:
                 schedule_view = self.doc.GetElement(schedule_info['element_id'])
                 if schedule_view:
@@ -88,6 +101,8 @@ class ScheduleExtractor:
                         all_data.append(data)
             except:
                 pass
+            if self.progress:
+                self.progress(index + 1)
 
         return all_data
 
@@ -108,3 +123,4 @@ class ScheduleExtractor:
             result.append(row_dict)
 
         return result
+
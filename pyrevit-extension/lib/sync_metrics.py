@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Sync Metrics - Timed spans, counters and peak memory for the sync pipeline"""
+
+import os
+import json
+import time
+
+from baps_paths import get_baps_dir
+
+# Rotate the metrics log at 1 MB, keeping this many old files
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# Display order and labels of the sync phases
+PHASES = [
+    ('collect', 'Collect elements'),
+    ('parameter_reads', 'Parameter reads'),
+    ('schedule_cells', 'Schedule cells'),
+    ('serialize', 'Serialize'),
+    ('compress', 'Compress'),
+    ('network', 'Network'),
+    ('server', 'Server time')
+]
+
+
+def _peak_memory_bytes():
+    """Peak memory of the current process, None if unavailable"""
+    try:
+        # IronPython / .NET
+        from System.Diagnostics import Process
+        return Process.GetCurrentProcess().PeakWorkingSet64
+    except Exception:
+        pass
+
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes on Linux
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return None
+
+
+def _format_bytes(count):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if count < 1024 or unit == 'GB':
+            return '{:.1f} {}'.format(count, unit) if unit != 'B' else '{} B'.format(int(count))
+        count /= 1024.0
+
+
+class _Span(object):
+    """Context manager adding its duration to a named span"""
+
+    __slots__ = ('_metrics', '_name', '_started')
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.add_time(self._name, time.time() - self._started)
+        return False
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullMetrics(object):
+    """No-op metrics, used when instrumentation is not requested"""
+
+    def span(self, name):
+        return _NULL_SPAN
+
+    def add_time(self, name, seconds):
+        pass
+
+    def incr(self, name, amount=1):
+        pass
+
+    def sample_memory(self):
+        pass
+
+
+class SyncMetrics(NullMetrics):
+    """Collect timed spans, counters and peak memory for one sync run"""
+
+    def __init__(self, name='sync'):
+        self.name = name
+        self.started = time.time()
+        self.finished = None
+        self.spans = {}       # name -> {'seconds': total, 'count': n}
+        self.counters = {}    # name -> value
+        self.peak_memory = None
+
+    def span(self, name):
+        """Time a block: with metrics.span('collect'): ..."""
+        return _Span(self, name)
+
+    def add_time(self, name, seconds):
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = {'seconds': 0.0, 'count': 0}
+        span['seconds'] += seconds
+        span['count'] += 1
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def sample_memory(self):
+        """Record process peak memory (peak working set on Windows)"""
+        peak = _peak_memory_bytes()
+        if peak is not None:
+            self.peak_memory = max(peak, self.peak_memory or 0)
+
+    def finish(self):
+        self.finished = time.time()
+        self.sample_memory()
+        return self
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started': self.started,
+            'duration': round((self.finished or time.time()) - self.started, 3),
+            'spans': dict((k, {'seconds': round(v['seconds'], 4), 'count': v['count']})
+                          for k, v in self.spans.items()),
+            'counters': self.counters,
+            'peakMemory': self.peak_memory
+        }
+
+    def summary_lines(self):
+        """Human readable summary for the completion dialog"""
+        lines = ['Total time: {:.1f}s'.format((self.finished or time.time()) - self.started)]
+        for key, label in PHASES:
+            span = self.spans.get(key)
+            if span:
+                lines.append('{}: {:.2f}s'.format(label, span['seconds']))
+
+        counters = self.counters
+        if 'elements' in counters:
+            lines.append('Elements: {:,}'.format(counters['elements']))
+        if 'parameter_lookups' in counters:
+            lines.append('Parameter lookups: {:,}'.format(counters['parameter_lookups']))
+        if any(k in counters for k in ('links_extracted', 'links_moved', 'links_unchanged')):
+            lines.append('Linked models: {} extracted, {} moved (from cache), {} unchanged (skipped)'.format(
+                counters.get('links_extracted', 0), counters.get('links_moved', 0),
+                counters.get('links_unchanged', 0)))
+        if 'bytes_sent' in counters:
+            lines.append('Sent: {}'.format(_format_bytes(counters['bytes_sent'])))
+        if self.peak_memory:
+            lines.append('Peak memory: {}'.format(_format_bytes(self.peak_memory)))
+        return lines
+
+    def write_log(self, log_path=None):
+        """Append this run to the rotating JSON lines log under %APPDATA%\\BAPS\\logs"""
+        log_path = log_path or os.path.join(get_baps_dir('logs'), 'sync_metrics.jsonl')
+
+        if os.path.exists(log_path) and os.path.getsize(log_path) > LOG_MAX_BYTES:
+            for index in range(LOG_BACKUPS - 1, 0, -1):
+                older = '{}.{}'.format(log_path, index)
+                if os.path.exists(older):
+                    newer = '{}.{}'.format(log_path, index + 1)
+                    if os.path.exists(newer):
+                        os.remove(newer)
+                    os.rename(older, newer)
+            first_backup = log_path + '.1'
+            if os.path.exists(first_backup):
+                os.remove(first_backup)
+            os.rename(log_path, first_backup)
+
+        with open(log_path, 'a') as f:
+            f.write(json.dumps(self.to_dict()) + '\n')
+        return log_path
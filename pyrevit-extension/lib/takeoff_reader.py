@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""Takeoff Reader - Parse quantity takeoff / cost estimate schedule exports"""
+
+import io
+import csv
+import re
+
+try:
+    # Python 2 (IronPython in Revit)
+    unicode_type = unicode
+    PY2 = True
+except NameError:
+    # Python 3
+    unicode_type = str
+    PY2 = False
+
+
+# The tables below mirror backend/src/config/takeoff.json, which the backend imports read;
+# keep them in sync (tests/test_takeoff_reader.py compares them).
+
+# Header names (lower case) used to locate columns in takeoff schedules
+TYPE_HEADERS = ['family and type', 'type', 'type name', 'family']
+QUANTITY_HEADERS = ['area', 'volume', 'length', 'count', 'quantity']
+MATERIAL_COST_HEADERS = ['material costs', 'material cost', 'material unit cost']
+LABOR_COST_HEADERS = ['labor costs', 'labor cost', 'labour costs', 'labour cost', 'labor unit cost']
+
+# Spellings of the same unit found in Revit exports
+UNIT_ALIASES = {
+    u'm2': u'm²', u'sqm': u'm²', u'sq m': u'm²', u'm^2': u'm²',
+    u'm3': u'm³', u'cum': u'm³', u'cu m': u'm³', u'm^3': u'm³',
+    u'sf': u'ft²', u'sq ft': u'ft²', u'sqft': u'ft²', u'ft2': u'ft²',
+    u'cf': u'ft³', u'cu ft': u'ft³', u'ft3': u'ft³',
+    u'ea': u'Each', u'each': u'Each', u'item': u'Each', u'': u'Each'
+}
+
+# Keywords used to infer a building category from schedule or family names
+CATEGORY_KEYWORDS = [
+    ('curtain wall', 'Walls'),
+    ('wall', 'Walls'),
+    ('door', 'Doors'),
+    ('window', 'Windows'),
+    ('framing', 'Structural Framing'),
+    ('beam', 'Structural Framing'),
+    ('column', 'Structural Columns'),
+    ('floor', 'Floors'),
+    ('roof', 'Roofs'),
+    ('ceiling', 'Ceilings')
+]
+
+_QUANTITY_RE = re.compile(u'^\\s*([-+]?[0-9][0-9,]*(?:\\.[0-9]+)?)\\s*(.*?)\\s*$')
+
+
+def _text(value):
+    """Coerce a cell value to a stripped unicode string"""
+    if value is None:
+        return u''
+    if PY2 and isinstance(value, str):
+        value = value.decode('utf-8')
+    return unicode_type(value).strip()
+
+
+def normalize_unit(unit):
+    """Normalize unit spellings (e.g. 'm2', 'sqm') to a canonical form"""
+    text = _text(unit)
+    return UNIT_ALIASES.get(text.lower(), text)
+
+
+def parse_number(value):
+    """Parse a number such as '1,935.84' or '$4.00', returns None if not numeric"""
+    text = _text(value).replace(u'$', u'').replace(u',', u'')
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def split_quantity(value):
+    """Split a quantity cell like '45 m²' into (45.0, 'm²'), returns (None, '') if not numeric"""
+    match = _QUANTITY_RE.match(_text(value))
+    if not match:
+        return None, u''
+    return float(match.group(1).replace(u',', u'')), normalize_unit(match.group(2))
+
+
+def infer_category(*names):
+    """Infer a building category from schedule, family or type names"""
+    for name in names:
+        text = _text(name).lower()
+        for keyword, category in CATEGORY_KEYWORDS:
+            if keyword in text:
+                return category
+    return None
+
+
+def _find_column(headers, candidates):
+    """Find the index of the first header matching one of the candidate names"""
+    lowered = [_text(h).lower() for h in headers]
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered.index(candidate)
+    return None
+
+
+def _read_csv_rows(path):
+    """Read all rows of a CSV file as lists of unicode strings"""
+    if PY2:
+        with open(path, 'rb') as f:
+            content = f.read().decode('utf-8-sig')
+        lines = content.encode('utf-8').splitlines()
+        return [[cell.decode('utf-8') for cell in row] for row in csv.reader(lines)]
+
+    with io.open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return [row for row in csv.reader(f)]
+
+
+def read_takeoff_csv(path):
+    """
+    Read a schedule CSV export into the same structure as ScheduleExtractor
+    Returns: dict with 'schedule_name', 'headers' and 'data' lists
+    """
+    rows = _read_csv_rows(path)
+
+    schedule_name = u''
+    header_index = None
+    for index, row in enumerate(rows):
+        cells = [_text(c) for c in row if _text(c)]
+        if len(cells) >= 2:
+            header_index = index
+            break
+        if cells and not schedule_name:
+            # Title line above the header row
+            schedule_name = cells[0]
+
+    if header_index is None:
+        return {'schedule_name': schedule_name, 'headers': [], 'data': []}
+
+    headers = [_text(c) for c in rows[header_index]]
+    data = [[_text(c) for c in row] for row in rows[header_index + 1:] if any(_text(c) for c in row)]
+
+    return {
+        'schedule_name': schedule_name,
+        'headers': headers,
+        'data': data
+    }
+
+
+def iter_takeoff_items(schedule_data, priced_only=True):
+    """
+    Yield line items from takeoff schedule data
+    Group header and total rows are skipped; with priced_only, so are rows without costs.
+    Yields: dicts with type_name, category, quantity, unit, material_cost, labor_cost
+            and row_index (index in schedule_data['data'])
+    """
+    headers = schedule_data.get('headers', [])
+    type_col = _find_column(headers, TYPE_HEADERS)
+    qty_col = _find_column(headers, QUANTITY_HEADERS)
+    material_col = _find_column(headers, MATERIAL_COST_HEADERS)
+    labor_col = _find_column(headers, LABOR_COST_HEADERS)
+
+    if type_col is None or (priced_only and material_col is None and labor_col is None):
+        return
+
+    schedule_name = schedule_data.get('schedule_name', '')
+
+    for row_index, row in enumerate(schedule_data.get('data', [])):
+        def cell(col):
+            return row[col] if col is not None and col < len(row) else u''
+
+        type_name = _text(cell(type_col))
+        if not type_name:
+            # Group headers and totals leave the type column empty
+            continue
+
+        quantity, unit = split_quantity(cell(qty_col)) if qty_col is not None else (1.0, u'Each')
+        if quantity is None:
+            continue
+
+        material_cost = parse_number(cell(material_col))
+        labor_cost = parse_number(cell(labor_col))
+        if priced_only and material_cost is None and labor_cost is None:
+            continue
+
+        yield {
+            'type_name': type_name,
+            'category': infer_category(type_name, schedule_name) or 'Uncategorized',
+            'quantity': quantity,
+            'unit': unit,
+            'material_cost': material_cost or 0.0,
+            'labor_cost': labor_cost or 0.0,
+            'row_index': row_index
+        }
+
+
+def convert_schedule_to_elements(schedule_data):
+    """Convert schedule data to element format for API"""
+    elements = []
+
+    schedule_name = schedule_data.get('schedule_name', 'Unknown Schedule')
+    rows = schedule_data.get('data', [])
+    headers = schedule_data.get('headers', [])
+
+    for idx, row in enumerate(rows):
+        # Create element from each row in schedule
+        element = {
+            'revitId': '{}_{}'.format(schedule_name, idx),
+            'name': '{} - Row {}'.format(schedule_name, idx + 1),
+            'category': 'Schedule',
+            'quantity': 1.0,
+            'unit': 'Item',
+            'properties': {},
+            'bimMetadata': {
+                'schedule_name': schedule_name,
+                'row_index': idx + 1
+            }
+        }
+
+        # Map row data to properties using headers as keys
+        for col_idx, header in enumerate(headers):
+            if col_idx < len(row):
+                element['properties'][header] = row[col_idx]
+
+        elements.append(element)
+
+    return elements
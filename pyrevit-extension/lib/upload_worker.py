@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Upload Worker - Drain the outbox to the backend on a background thread"""
+
+import threading
+
+
+class UploadWorker(threading.Thread):
+    """
+    Flush the outbox with BAPSClient off the Revit API thread
+    Callbacks run on the worker thread; marshal to the UI thread before touching WPF.
+    Elements that could not be sent stay in the outbox for a later flush.
+    """
+
+    def __init__(self, client, outbox, on_progress=None, on_complete=None, on_error=None):
+        threading.Thread.__init__(self, name='BAPS upload')
+        self.daemon = True
+        self.client = client
+        self.outbox = outbox
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Stop after the batch in flight"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            sent, total = self.outbox.flush(self.client, on_progress=self.on_progress,
+                                            should_stop=self._cancel.is_set)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            return
+
+        if self.on_complete:
+            self.on_complete(sent, total, self.cancelled)
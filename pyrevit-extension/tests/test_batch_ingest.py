@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Tests for tools/batch_ingest.py on a real takeoff export"""
+
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'tools'))
+
+from batch_ingest import parse_file, unsent_ranges
+
+# Revit wall takeoff: title line, header, group header rows, line items and totals
+WALL_TAKEOFF = os.path.join(HERE, '..', '..', 'wall (2).csv')
+
+
+def _elements(result):
+    elements = []
+    for start, end, payload in result['batches']:
+        elements.extend(json.loads(payload.decode('utf-8'))['elements'])
+    return elements
+
+
+def test_takeoff_rows_become_elements_with_quantities_and_units():
+    result = parse_file(WALL_TAKEOFF)
+    elements = _elements(result)
+
+    # 23 line items; group header and total rows are not elements
+    assert result['elements'] == 23
+    assert len(elements) == 23
+    assert all(e['unit'] == u'm²' for e in elements)
+
+    first = elements[0]
+    assert first['name'] == 'Basic Wall: Concrete 200mm'
+    assert first['quantity'] == 45.0
+    assert first['properties']['Material Costs'] == '4.00'
+    assert first['bimMetadata']['schedule_name'] == '2. Wall Quantity Takeoffs & Cost Estimates'
+
+
+def test_quantities_match_the_export():
+    elements = _elements(parse_file(WALL_TAKEOFF))
+
+    curtain = [e['quantity'] for e in elements if e['name'] == 'Curtain Wall: _Not Defined']
+    assert curtain == [10.0, 11.0, 10.0, 11.0]
+
+
+def test_resume_with_another_batch_size_skips_exactly_the_sent_elements():
+    # Batches of 10 sent by an earlier run: elements 0-9 and 20-22
+    result = parse_file(WALL_TAKEOFF, batch_size=4, sent=[(0, 10), (20, 23)])
+
+    assert [(start, end) for start, end, _ in result['batches']] == [(10, 14), (14, 18), (18, 20)]
+    assert len(_elements(result)) == 10
+
+
+def test_unsent_ranges():
+    assert unsent_ranges(5, [], 2) == [(0, 2), (2, 4), (4, 5)]
+    assert unsent_ranges(5, [(1, 3)], 10) == [(0, 1), (3, 5)]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Tests for lib/takeoff_reader.py"""
+
+import io
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'lib'))
+
+import takeoff_reader
+
+# Tables the backend imports read; the reader keeps a copy since it runs inside Revit
+SHARED_TABLES = os.path.join(HERE, '..', '..', 'backend', 'src', 'config', 'takeoff.json')
+
+
+def test_tables_match_the_backend():
+    with io.open(SHARED_TABLES, 'r', encoding='utf-8') as f:
+        shared = json.load(f)
+
+    assert takeoff_reader.TYPE_HEADERS == shared['typeHeaders']
+    assert takeoff_reader.QUANTITY_HEADERS == shared['quantityHeaders']
+    assert takeoff_reader.MATERIAL_COST_HEADERS == shared['materialCostHeaders']
+    assert takeoff_reader.LABOR_COST_HEADERS == shared['laborCostHeaders']
+    assert takeoff_reader.UNIT_ALIASES == shared['unitAliases']
+    assert [list(pair) for pair in takeoff_reader.CATEGORY_KEYWORDS] == shared['categoryKeywords']
+
+
+def test_split_quantity_normalizes_units():
+    assert takeoff_reader.split_quantity(u'1,935.84 SF') == (1935.84, u'ft²')
+    assert takeoff_reader.split_quantity(u'45 m²') == (45.0, u'm²')
+    assert takeoff_reader.split_quantity(u'n/a') == (None, u'')
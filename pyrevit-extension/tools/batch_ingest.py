@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+Headless batch ingestion of exported takeoffs and element dumps (CPython 3, runs outside Revit)
+
+Parses schedule CSV exports and JSON element dumps in a process pool across all cores,
+normalizes them to the batch endpoint format and uploads them with bounded concurrency.
+Completed batches are recorded in a journal by element range, so an interrupted run can simply
+be restarted (also with a different --batch-size).
+
+Usage:
+    python tools/batch_ingest.py archive/ --token <JWT>
+    python tools/batch_ingest.py archive/ --ai-parse              # parse CSVs with OpenAIScheduleParser
+    python tools/batch_ingest.py archive/ --dry-run               # parse and report only
+    python tools/batch_ingest.py archive/ --restart               # ignore the journal
+
+The token can also be given as BAPS_TOKEN; by default the token of the last
+pyRevit login (%APPDATA%\\BAPS\\config.json) is used.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'lib'))
+
+from api_client import BAPSClient, is_auth_error
+from openai_parser import OpenAIScheduleParser
+from outbox import RECORD_SIZE, is_rejected
+from takeoff_reader import read_takeoff_csv, iter_takeoff_items, normalize_unit, infer_category
+
+DEFAULT_URL = 'http://localhost:3001/api'
+JOURNAL_NAME = '.baps_ingest_journal.jsonl'
+
+# Upload attempts per batch (network errors and 5xx), with exponential backoff
+MAX_ATTEMPTS = 4
+
+
+def find_inputs(paths):
+    """Expand files and directories into a sorted list of .csv / .json files"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in names:
+                    if name.lower().endswith(('.csv', '.json')) and name != JOURNAL_NAME:
+                        found.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            found.append(path)
+    return sorted(set(os.path.abspath(p) for p in found))
+
+
+def file_signature(path):
+    """Identify a file version for the journal (a changed file is ingested again)"""
+    stat = os.stat(path)
+    return '{}:{}'.format(stat.st_size, int(stat.st_mtime))
+
+
+def normalize_element(element, source_file):
+    """Coerce an element dict to what POST /elements/batch accepts, None if unusable"""
+    name = u'{}'.format(element.get('name') or '').strip()
+    if not name:
+        return None
+
+    try:
+        quantity = float(element.get('quantity', 1.0))
+    except (TypeError, ValueError):
+        quantity = 1.0
+
+    properties = element.get('properties') or {}
+    metadata = dict(element.get('bimMetadata') or {})
+    metadata['source_file'] = os.path.basename(source_file)
+
+    normalized = {
+        'name': name,
+        'category': element.get('category') or infer_category(name) or 'Uncategorized',
+        'quantity': quantity,
+        'unit': normalize_unit(element.get('unit')),
+        'properties': properties,
+        'bimMetadata': metadata
+    }
+    for key in ('revitId', 'description', 'projectId'):
+        if element.get(key) is not None:
+            normalized[key] = element[key]
+    return normalized
+
+
+def takeoff_elements(schedule_data):
+    """
+    Elements from the line items of a takeoff export
+    Quantities and units come from the quantity column ("45 m²"); group header and
+    total rows are skipped.
+    """
+    schedule_name = schedule_data['schedule_name']
+    headers = schedule_data['headers']
+    rows = schedule_data['data']
+    elements = []
+    for item in iter_takeoff_items(schedule_data, priced_only=False):
+        index = item['row_index']
+        elements.append({
+            'revitId': '{}_{}'.format(schedule_name, index),
+            'name': item['type_name'],
+            'category': item['category'],
+            'quantity': item['quantity'],
+            'unit': item['unit'],
+            'properties': dict((header, cell) for header, cell in zip(headers, rows[index]) if header),
+            'bimMetadata': {
+                'schedule_name': schedule_name,
+                'row_index': index + 1
+            }
+        })
+    return elements
+
+
+def _load_json_elements(path):
+    with io.open(path, 'r', encoding='utf-8-sig') as f:
+        dump = json.load(f)
+    if isinstance(dump, dict):
+        dump = dump.get('elements', [])
+    return dump if isinstance(dump, list) else []
+
+
+def unsent_ranges(count, sent, batch_size):
+    """
+    Split elements [0, count) into (start, end) batches of at most batch_size elements,
+    leaving out the ranges already sent
+    """
+    done = [False] * count
+    for start, end in sent:
+        for index in range(max(start, 0), min(end, count)):
+            done[index] = True
+
+    ranges = []
+    index = 0
+    while index < count:
+        if done[index]:
+            index += 1
+            continue
+        start = index
+        while index < count and not done[index] and index - start < batch_size:
+            index += 1
+        ranges.append((start, index))
+    return ranges
+
+
+def parse_file(path, ai_parse=False, backend_url=DEFAULT_URL, token=None, batch_size=RECORD_SIZE, sent=()):
+    """
+    Parse and normalize one input file (runs in a worker process)
+    sent: (start, end) element ranges uploaded by an earlier run, left out of the batches
+    Returns: dict with path, elements count, skipped count and batches as (start, end, JSON bytes)
+    """
+    if path.lower().endswith('.json'):
+        raw = _load_json_elements(path)
+    else:
+        schedule_data = read_takeoff_csv(path)
+        if not schedule_data['schedule_name']:
+            schedule_data['schedule_name'] = os.path.splitext(os.path.basename(path))[0]
+        if ai_parse:
+            parser = OpenAIScheduleParser(backend_url=backend_url, token=token)
+            raw = parser.validate_parsed_elements(parser.parse_schedule_intelligently(schedule_data))
+        else:
+            raw = takeoff_elements(schedule_data)
+
+    elements = [e for e in (normalize_element(item, path) for item in raw if isinstance(item, dict)) if e]
+    batches = [(start, end, json.dumps({'elements': elements[start:end]}).encode('utf-8'))
+               for start, end in unsent_ranges(len(elements), sent, batch_size)]
+    return {
+        'path': path,
+        'elements': len(elements),
+        'skipped': len(raw) - len(elements),
+        'batches': batches
+    }
+
+
+class Journal:
+    """
+    Append-only record of uploaded batches per file version
+    Batches are recorded by element range, which does not depend on the batch size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}      # (file, signature) -> list of (start, end) element ranges sent
+        self.finished = set()
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with io.open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of an interrupted run
+                    key = (entry['file'], entry['signature'])
+                    if entry.get('finished'):
+                        self.finished.add(key)
+                    elif 'start' in entry:
+                        self.done.setdefault(key, []).append((entry['start'], entry['end']))
+
+    def _write(self, entry):
+        with self._lock:
+            with io.open(self.path, 'a', encoding='utf-8') as f:
+                f.write(u'{}\n'.format(json.dumps(entry)))
+
+    def batch_done(self, path, signature, start, end):
+        self._write({'file': path, 'signature': signature, 'start': start, 'end': end})
+
+    def file_done(self, path, signature, elements):
+        self._write({'file': path, 'signature': signature, 'finished': True, 'elements': elements})
+
+
+def upload_batch(client, payload):
+    """Upload one batch, retrying network and server errors with backoff"""
+    delay = 1.0
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return client.post_batch_payload(payload)
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS or is_rejected(e) or is_auth_error(e):
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+
+def default_token():
+    """Token from BAPS_TOKEN or the last pyRevit login"""
+    if os.getenv('BAPS_TOKEN'):
+        return os.getenv('BAPS_TOKEN')
+    import baps_session
+    return baps_session.get_auth_token()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest exported takeoff CSVs and JSON element dumps into BAPS')
+    parser.add_argument('paths', nargs='+', help='files or directories (searched recursively)')
+    parser.add_argument('--url', default=DEFAULT_URL, help='backend API URL (default: %(default)s)')
+    parser.add_argument('--token', help='JWT token (default: BAPS_TOKEN or the pyRevit login)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='parser processes (default: all cores)')
+    parser.add_argument('--concurrency', type=int, default=4, help='parallel upload requests (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=RECORD_SIZE, help='elements per request (default: %(default)s)')
+    parser.add_argument('--ai-parse', action='store_true', help='parse CSVs with the backend OpenAI schedule parser')
+    parser.add_argument('--journal', help='resume journal (default: {} in the current directory)'.format(JOURNAL_NAME))
+    parser.add_argument('--restart', action='store_true', help='ignore the journal and ingest everything again')
+    parser.add_argument('--dry-run', action='store_true', help='parse and report only, nothing is uploaded')
+    args = parser.parse_args()
+
+    files = find_inputs(args.paths)
+    if not files:
+        parser.error('no .csv or .json files found')
+
+    token = args.token or default_token()
+    if not token and not args.dry_run:
+        parser.error('no token: pass --token, set BAPS_TOKEN or login from Revit')
+
+    journal_path = args.journal or os.path.abspath(JOURNAL_NAME)
+    if args.restart and not args.dry_run and os.path.exists(journal_path):
+        os.remove(journal_path)
+    journal = Journal(journal_path)
+
+    signatures = dict((path, file_signature(path)) for path in files)
+    pending = [path for path in files if (path, signatures[path]) not in journal.finished]
+    print('{} files, {} already ingested, {} to process'.format(len(files), len(files) - len(pending), len(pending)))
+
+    client = BAPSClient(base_url=args.url, token=token)
+    totals = {'files': 0, 'elements': 0, 'uploaded': 0, 'skipped': 0, 'failed': 0}
+    started = time.time()
+
+    # Bound work in flight so parsed batches do not pile up in memory ahead of the uploads
+    max_parsing = args.workers * 2
+    max_uploading = args.concurrency * 2
+
+    with ProcessPoolExecutor(max_workers=args.workers) as parse_pool, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as upload_pool:
+        queue = list(pending)
+        parsing = {}
+        uploading = {}   # future -> (path, signature, (start, end), count)
+        remaining = {}   # path -> batches still uploading
+        failed_files = set()
+
+        def finish_file(path, signature, elements):
+            totals['files'] += 1
+            if path not in failed_files and not args.dry_run:
+                journal.file_done(path, signature, elements)
+
+        while queue or parsing or uploading:
+            while queue and len(parsing) < max_parsing and len(uploading) < max_uploading:
+                path = queue.pop(0)
+                sent = journal.done.get((path, signatures[path]), [])
+                future = parse_pool.submit(parse_file, path, args.ai_parse, args.url, token, args.batch_size, sent)
+                parsing[future] = path
+
+            done, _ = wait(list(parsing) + list(uploading), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in parsing:
+                    path = parsing.pop(future)
+                    signature = signatures[path]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print('FAILED  {}: {}'.format(path, e))
+                        totals['failed'] += 1
+                        continue
+
+                    totals['elements'] += result['elements']
+                    totals['skipped'] += result['skipped']
+                    print('parsed  {} ({:,} elements, {} skipped)'.format(path, result['elements'], result['skipped']))
+
+                    batches = result['batches']
+                    if args.dry_run or not batches:
+                        finish_file(path, signature, result['elements'])
+                        continue
+
+                    remaining[path] = len(batches)
+                    for start, end, payload in batches:
+                        upload = upload_pool.submit(upload_batch, client, payload)
+                        uploading[upload] = (path, signature, (start, end), result['elements'])
+                else:
+                    path, signature, (start, end), elements = uploading.pop(future)
+                    try:
+                        future.result()
+                        journal.batch_done(path, signature, start, end)
+                        totals['uploaded'] += 1
+                    except Exception as e:
+                        if path not in failed_files:
+                            print('FAILED  {} elements {}-{}: {}'.format(path, start, end - 1, e))
+                            failed_files.add(path)
+                            totals['failed'] += 1
+                        if is_auth_error(e):
+                            print('Authentication failed, stopping. Login again and restart to resume.')
+                            queue = []
+
+                    remaining[path] -= 1
+                    if remaining[path] == 0:
+                        del remaining[path]
+                        finish_file(path, signature, elements)
+
+    print('{} files, {:,} elements ({:,} skipped), {} batches uploaded, {} failed in {:.1f}s'.format(
+        totals['files'], totals['elements'], totals['skipped'], totals['uploaded'],
+        totals['failed'], time.time() - started))
+    if totals['failed']:
+        print('Run again to retry; completed batches are skipped (journal: {})'.format(journal_path))
+    return 1 if totals['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())